@@ -0,0 +1,150 @@
+"""
+Prompt prefill benchmark for the LLM nodes.
+
+Sends each node's prompt to Ollama in graph order, first with a unique
+marker in front of the system prompt so no cached prefix can be reused
+(cold), then after warmup_llm() with the real static prefixes (warm). The
+difference in prompt tokens evaluated and prefill time is what prefix reuse
+saves per call. Each node's prefix stays cached only while Ollama has a free
+slot for it: set OLLAMA_NUM_PARALLEL to at least the number of nodes.
+
+Usage:
+    python -m benchmarks.prefill_benchmark --queries-file queries.txt --rounds 3
+"""
+import argparse
+import statistics
+import sys
+import uuid
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from config import ROUTING_MODE
+from prompts import (
+    CITY_PROMPT,
+    DOCUMENT_ANSWER,
+    PROMPT_PREFIXES,
+    ROUTE_AND_CITY_PROMPT,
+    ROUTING_PROMPT,
+    WEATHER_PROMPT,
+)
+from services.llm_service import llm, profile_kwargs, warmup_llm
+
+SAMPLE_QUERIES = [
+    "What's the weather in Paris?",
+    "Will it rain tomorrow in Mumbai?",
+    "Summarize the uploaded report",
+    "What does the manual say about the warranty?",
+    "How windy is it in Chicago right now?",
+    "List the key findings of the document",
+]
+
+SAMPLE_WEATHER = (
+    '{"weather": [{"description": "scattered clouds"}], "main": {"temp": 21.4, '
+    '"feels_like": 20.9, "humidity": 48, "pressure": 1012}, "wind": {"speed": 3.1}}'
+)
+
+SAMPLE_CONTEXT = (
+    "The warranty covers manufacturing defects for two years from the date of "
+    "purchase. Damage caused by misuse, accidents or unauthorised repairs is "
+    "not covered. To make a claim, contact support with the order number."
+)
+
+TEMPLATES = {
+    "router": lambda query: ROUTING_PROMPT.format(user_query=query),
+    "city": lambda query: CITY_PROMPT.format(user_query=query),
+    "route": lambda query: ROUTE_AND_CITY_PROMPT.format(user_query=query),
+    "weather_answer": lambda query: WEATHER_PROMPT.format(
+        user_query=query, weather_data=SAMPLE_WEATHER
+    ),
+    "document_answer": lambda query: DOCUMENT_ANSWER.format(
+        user_query=query, rag_context=SAMPLE_CONTEXT
+    ),
+}
+
+
+def default_nodes() -> list:
+    """LLM nodes the graph calls in the active ROUTING_MODE, in call order."""
+    routing = ["route"] if ROUTING_MODE == "fused" else ["router", "city"]
+    return routing + ["weather_answer", "document_answer"]
+
+
+def prefill(name: str, query: str, cold: bool) -> tuple:
+    """
+    Send one node prompt with a one-token cap and read Ollama's timings.
+
+    Args:
+        name: Node name in PROMPT_PREFIXES
+        query: User query filled into the node's template
+        cold: Put a unique marker before the system prompt to defeat the cache
+
+    Returns:
+        (prompt tokens evaluated, prefill milliseconds)
+    """
+    profile, system = PROMPT_PREFIXES[name]
+    if cold:
+        system = f"[{uuid.uuid4().hex}]\n{system}"
+
+    response = llm.invoke(
+        [SystemMessage(content=system), HumanMessage(content=TEMPLATES[name](query))],
+        **profile_kwargs(profile, num_predict=1),
+    )
+    metadata = response.response_metadata
+    return (
+        metadata.get("prompt_eval_count") or 0,
+        (metadata.get("prompt_eval_duration") or 0) / 1e6,
+    )
+
+
+def run(nodes: list, queries: list, rounds: int, cold: bool) -> dict:
+    """Prefill every node for every query, in graph order, for some rounds."""
+    samples = {name: [] for name in nodes}
+    for _ in range(rounds):
+        for query in queries:
+            for name in nodes:
+                samples[name].append(prefill(name, query, cold))
+    return samples
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--queries-file", help="text queries, one per line")
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--nodes", nargs="+", choices=list(PROMPT_PREFIXES))
+    args = parser.parse_args(argv)
+
+    nodes = args.nodes or default_nodes()
+    queries = SAMPLE_QUERIES
+    if args.queries_file:
+        with open(args.queries_file, encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+
+    try:
+        # Load the models first so load time does not count as prefill
+        warmup_llm({name: PROMPT_PREFIXES[name] for name in nodes})
+        cold = run(nodes, queries, args.rounds, cold=True)
+        warmup_llm({name: PROMPT_PREFIXES[name] for name in nodes})
+        warm = run(nodes, queries, args.rounds, cold=False)
+    except Exception as e:
+        print(f"Benchmark failed, is Ollama running? {e}")
+        return 1
+
+    print(f"{len(queries)} queries x {args.rounds} rounds, mean per call")
+    print(f"{'node':<16} {'cold tok':>8} {'warm tok':>8} {'cold ms':>8} "
+          f"{'warm ms':>8} {'saved':>6}")
+
+    for name in nodes:
+        cold_tokens = statistics.mean(tokens for tokens, _ in cold[name])
+        warm_tokens = statistics.mean(tokens for tokens, _ in warm[name])
+        cold_ms = statistics.mean(ms for _, ms in cold[name])
+        warm_ms = statistics.mean(ms for _, ms in warm[name])
+        saved = 1 - warm_ms / cold_ms if cold_ms else 0.0
+        print(
+            f"{name:<16} {cold_tokens:>8.0f} {warm_tokens:>8.0f} {cold_ms:>8.1f} "
+            f"{warm_ms:>8.1f} {saved:>6.0%}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+Recall vs latency benchmark for quantization and search settings.
+
+Copies the dense vectors of an existing collection into temporary
+collections, one per quantization mode, then runs the same queries with
+every combination of HNSW ef, oversampling and rescoring. Recall@k is
+measured against exact (brute force) search on the source collection.
+
+Usage:
+    python -m benchmarks.search_benchmark --collection documents \
+        --quantization none scalar binary --ef 64 128 --oversampling 1 2 4
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct, SearchParams
+
+from rag.ingestion import create_collection
+from rag.retriever import search_params
+from services.qdrant_service import get_qdrant_client
+
+
+def load_points(client: QdrantClient, collection_name: str, limit: int) -> list:
+    """
+    Read points with their dense vectors from a collection.
+
+    Args:
+        client: Qdrant client
+        collection_name: Source collection
+        limit: Maximum number of points to read
+
+    Returns:
+        List of PointStruct with dense vectors only
+    """
+    points = []
+    offset = None
+
+    while len(points) < limit:
+        records, offset = client.scroll(
+            collection_name=collection_name,
+            limit=min(256, limit - len(points)),
+            offset=offset,
+            with_payload=False,
+            with_vectors=True,
+        )
+        for record in records:
+            vector = record.vector
+            if isinstance(vector, dict):
+                vector = vector.get("")
+            if vector:
+                points.append(PointStruct(id=record.id, vector=vector))
+        if offset is None:
+            break
+
+    return points
+
+
+def build_collection(
+    client: QdrantClient, collection_name: str, points: list, quantization: str
+) -> None:
+    """Create a dense-only copy of the points with the given quantization."""
+    if client.collection_exists(collection_name):
+        client.delete_collection(collection_name)
+
+    create_collection(
+        client, collection_name, len(points[0].vector), quantization, sparse=False
+    )
+    for start in range(0, len(points), 256):
+        client.upsert(collection_name=collection_name, points=points[start:start + 256])
+
+    # Wait until the HNSW index and quantized vectors are built
+    while client.get_collection(collection_name).status != "green":
+        time.sleep(0.5)
+
+
+def _search(client, collection_name: str, vector: list, k: int, params) -> list:
+    response = client.query_points(
+        collection_name=collection_name,
+        query=vector,
+        limit=k,
+        search_params=params,
+        with_payload=False,
+    )
+    return [point.id for point in response.points]
+
+
+def exact_neighbours(
+    client: QdrantClient, collection_name: str, queries: list, k: int
+) -> list:
+    """Ground-truth top-k IDs for each query from brute force search."""
+    params = SearchParams(exact=True)
+    return [set(_search(client, collection_name, q, k, params)) for q in queries]
+
+
+def measure(
+    client: QdrantClient,
+    collection_name: str,
+    queries: list,
+    truth: list,
+    k: int,
+    params,
+) -> dict:
+    """
+    Run the queries and compare them with the exact results.
+
+    Args:
+        client: Qdrant client
+        collection_name: Collection to search
+        queries: Query vectors
+        truth: Exact top-k ID sets, one per query
+        k: Number of results per query
+        params: SearchParams for the queries
+
+    Returns:
+        Dict with recall, p50_ms and p95_ms
+    """
+    latencies = []
+    hits = 0
+
+    for vector, expected in zip(queries, truth):
+        start = time.perf_counter()
+        found = _search(client, collection_name, vector, k, params)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(expected.intersection(found))
+
+    latencies.sort()
+    return {
+        "recall": hits / max(1, sum(len(expected) for expected in truth)),
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+    }
+
+
+def embed_queries(path: str) -> list:
+    """Embed one query per line of a text file."""
+    from services.embedding_service import get_query_embeddings
+
+    with open(path, encoding="utf-8") as f:
+        queries = [line.strip() for line in f if line.strip()]
+    return get_query_embeddings().embed_documents(queries)
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--collection", default="documents")
+    parser.add_argument("--points", type=int, default=100000, help="points to copy")
+    parser.add_argument("--queries", type=int, default=200, help="sampled query vectors")
+    parser.add_argument("--queries-file", help="text queries, one per line")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--quantization", nargs="+", default=["none", "scalar", "binary"])
+    parser.add_argument("--ef", nargs="+", type=int, default=[0, 64, 128, 256])
+    parser.add_argument("--oversampling", nargs="+", type=float, default=[1.0, 2.0, 4.0])
+    parser.add_argument("--keep", action="store_true", help="keep the benchmark collections")
+    args = parser.parse_args(argv)
+
+    client = get_qdrant_client()
+    points = load_points(client, args.collection, args.points)
+    if not points:
+        print(f"Collection '{args.collection}' has no dense vectors to benchmark.")
+        return 1
+
+    if args.queries_file:
+        queries = embed_queries(args.queries_file)
+    else:
+        sample = random.Random(0).sample(points, min(args.queries, len(points)))
+        queries = [point.vector for point in sample]
+
+    truth = exact_neighbours(client, args.collection, queries, args.k)
+    print(f"{len(points)} points, {len(queries)} queries, recall@{args.k}")
+    print(f"{'quantization':<12} {'ef':>5} {'oversample':>10} {'rescore':>7} "
+          f"{'recall':>7} {'p50 ms':>8} {'p95 ms':>8}")
+
+    for quantization in args.quantization:
+        name = f"{args.collection}_bench_{quantization}"
+        build_collection(client, name, points, quantization)
+
+        quantized = quantization != "none"
+        for ef in args.ef:
+            for oversampling in args.oversampling if quantized else [1.0]:
+                for rescore in (True, False) if quantized else (False,):
+                    params = search_params(ef, oversampling, rescore, quantized)
+                    result = measure(client, name, queries, truth, args.k, params)
+                    print(
+                        f"{quantization:<12} {ef or 'auto':>5} {oversampling:>10.1f} "
+                        f"{str(rescore):>7} {result['recall']:>7.3f} "
+                        f"{result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f}"
+                    )
+
+        if not args.keep:
+            client.delete_collection(name)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv
 
@@ -10,3 +11,215 @@ LANGCHAIN_API_KEY = os.getenv("LANGCHAIN_API_KEY")
 LANGCHAIN_PROJECT = os.getenv("LANGCHAIN_PROJECT")
 
 QDRANT_URL = os.getenv("QDRANT_URL")
+
+EMBEDDING_MODEL = os.getenv(
+    "EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"
+)
+EMBEDDING_DEVICE = os.getenv("EMBEDDING_DEVICE")
+
+# Qdrant connection pooling
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true"
+QDRANT_TIMEOUT = int(os.getenv("QDRANT_TIMEOUT", "10"))
+QDRANT_POOL_SIZE = int(os.getenv("QDRANT_POOL_SIZE", "10"))
+QDRANT_HEALTHCHECK_INTERVAL = float(
+    os.getenv("QDRANT_HEALTHCHECK_INTERVAL", "30")
+)
+
+# Vector store backend: "qdrant" (server at QDRANT_URL) or "local" (in-process
+# float16 index under LOCAL_VECTOR_PATH, no server). LOCAL_VECTOR_INDEX is
+# "hnsw" (approximate, recommended, about 1 ms per query at 300k chunks) or
+# "flat" (exact NumPy search, 50 ms at 300k chunks with the RAM cache).
+# Vectors take dimension * 2 bytes per point on disk, read through the page
+# cache. LOCAL_VECTOR_RAM_CACHE keeps a float32 copy for flat search,
+# dimension * 4 bytes per stored point (460 MB at 300k x 384); without it,
+# flat search scans the file in float32 blocks of about 24 MB and is about
+# six times slower. hnsw keeps its graph in RAM, roughly
+# dimension * 4 + HNSW_M * 8 bytes per point.
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "qdrant").lower()
+LOCAL_VECTOR_PATH = os.getenv("LOCAL_VECTOR_PATH", ".cache/vectors")
+LOCAL_VECTOR_INDEX = os.getenv("LOCAL_VECTOR_INDEX", "flat").lower()
+LOCAL_VECTOR_RAM_CACHE = os.getenv("LOCAL_VECTOR_RAM_CACHE", "true").lower() == "true"
+
+# Query embedding cache
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+EMBEDDING_CACHE_TTL = float(os.getenv("EMBEDDING_CACHE_TTL", "86400"))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH")
+
+# Semantic answer cache
+SEMANTIC_CACHE_ENABLED = (
+    os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+)
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "5000"))
+SEMANTIC_CACHE_TTL_WEATHER = float(os.getenv("SEMANTIC_CACHE_TTL_WEATHER", "600"))
+SEMANTIC_CACHE_TTL_DOCUMENT = float(
+    os.getenv("SEMANTIC_CACHE_TTL_DOCUMENT", "86400")
+)
+
+# Fast-path query router
+ROUTER_FAST_PATH = os.getenv("ROUTER_FAST_PATH", "true").lower() == "true"
+ROUTER_EMBEDDING_MARGIN = float(os.getenv("ROUTER_EMBEDDING_MARGIN", "0.15"))
+
+# Offline city gazetteer. Point GAZETTEER_PATH at a GeoNames dump such as
+# cities15000.txt for full coverage; the bundled table covers major cities.
+GAZETTEER_ENABLED = os.getenv("GAZETTEER_ENABLED", "true").lower() == "true"
+GAZETTEER_PATH = os.getenv(
+    "GAZETTEER_PATH",
+    os.path.join(os.path.dirname(__file__), "services", "data", "cities.tsv"),
+)
+
+# "fused" routes and extracts the city in one structured LLM call,
+# "two_step" uses ROUTING_PROMPT and CITY_PROMPT separately
+ROUTING_MODE = os.getenv("ROUTING_MODE", "fused").lower()
+
+# Weather API client and cache
+OPENWEATHER_URL = os.getenv(
+    "OPENWEATHER_URL", "https://api.openweathermap.org/data/2.5/weather"
+)
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", "600"))
+WEATHER_CACHE_STALE_TTL = float(os.getenv("WEATHER_CACHE_STALE_TTL", "300"))
+WEATHER_CACHE_SIZE = int(os.getenv("WEATHER_CACHE_SIZE", "1000"))
+WEATHER_GEO_PRECISION = int(os.getenv("WEATHER_GEO_PRECISION", "2"))
+WEATHER_POOL_SIZE = int(os.getenv("WEATHER_POOL_SIZE", "10"))
+
+# Stream answer tokens from the LLM instead of waiting for the full response
+ANSWER_STREAMING = os.getenv("ANSWER_STREAMING", "true").lower() == "true"
+
+# Directory ingestion pipeline
+INGESTION_WORKERS = int(os.getenv("INGESTION_WORKERS", str(os.cpu_count() or 1)))
+INGESTION_EMBED_BATCH_SIZE = int(os.getenv("INGESTION_EMBED_BATCH_SIZE", "64"))
+INGESTION_UPSERT_BATCH_SIZE = int(os.getenv("INGESTION_UPSERT_BATCH_SIZE", "256"))
+INGESTION_QUEUE_SIZE = int(os.getenv("INGESTION_QUEUE_SIZE", "8"))
+
+# Ingestion manifest (file and chunk hashes of everything already ingested)
+INGESTION_MANIFEST_PATH = os.getenv("INGESTION_MANIFEST_PATH", ".cache/ingestion_manifest.json")
+
+# Report peak resident memory (RSS) of the process and of the parsing workers
+# during each ingestion run, sampled from /proc/self/statm after every page
+# and embedding batch (a few microseconds each). Linux only.
+INGESTION_TRACE_MEMORY = os.getenv("INGESTION_TRACE_MEMORY", "true").lower() == "true"
+
+# Background ingestion jobs started from the UI
+INGESTION_JOBS_DB = os.getenv("INGESTION_JOBS_DB", ".cache/ingestion_jobs.db")
+INGESTION_JOB_WORKERS = int(os.getenv("INGESTION_JOB_WORKERS", "1"))
+INGESTION_JOB_MAX_ATTEMPTS = int(os.getenv("INGESTION_JOB_MAX_ATTEMPTS", "3"))
+INGESTION_JOB_RETRY_DELAY = float(os.getenv("INGESTION_JOB_RETRY_DELAY", "2"))
+
+# Hybrid retrieval: dense vectors fused with BM25 sparse vectors (RRF)
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() == "true"
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+SPARSE_AVG_DOC_LENGTH = float(os.getenv("SPARSE_AVG_DOC_LENGTH", "150"))
+
+# Retrieval depth and optional cross-encoder reranking
+RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", "3"))
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "30"))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "32"))
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "10000"))
+RERANK_CACHE_TTL = int(os.getenv("RERANK_CACHE_TTL", "86400"))
+
+# Context assembly: token budget for retrieved text in the answer prompt.
+# LLM_TOKENIZER is a Hugging Face tokenizer matching the Ollama model; when
+# unset or unavailable, tokens are estimated from the character count.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+LLM_TOKENIZER = os.getenv("LLM_TOKENIZER", "")
+CHARS_PER_TOKEN = float(os.getenv("CHARS_PER_TOKEN", "4"))
+
+# Chunks below this dense relevance, (cosine + 1) / 2, are not used as
+# context; 0 disables the threshold. When no chunk passes, NO_CONTEXT_MODE
+# "skip" answers without calling the LLM and "shrink" sends a short prompt
+# without context.
+MIN_RELEVANCE_SCORE = float(os.getenv("MIN_RELEVANCE_SCORE", "0.6"))
+NO_CONTEXT_MODE = os.getenv("NO_CONTEXT_MODE", "skip")
+
+# Vector storage and search tuning for new collections.
+# VECTOR_QUANTIZATION is "none", "scalar" (int8, 4x smaller) or "binary"
+# (1 bit per dimension, 32x smaller). Quantized vectors stay in RAM while
+# the originals can live on disk and are only read to rescore candidates.
+VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "none").lower()
+VECTORS_ON_DISK = os.getenv("VECTORS_ON_DISK", "false").lower() == "true"
+PAYLOAD_ON_DISK = os.getenv("PAYLOAD_ON_DISK", "false").lower() == "true"
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCT = int(os.getenv("HNSW_EF_CONSTRUCT", "100"))
+# Search-time HNSW beam width, 0 uses the Qdrant default
+SEARCH_HNSW_EF = int(os.getenv("SEARCH_HNSW_EF", "0"))
+# Quantized search fetches limit * oversampling candidates and rescores
+# them with the original vectors
+SEARCH_OVERSAMPLING = float(os.getenv("SEARCH_OVERSAMPLING", "2.0"))
+SEARCH_RESCORE = os.getenv("SEARCH_RESCORE", "true").lower() == "true"
+
+# Batch query runner: queries are prefetched (embedded and searched) in
+# windows of BATCH_WINDOW, and at most BATCH_MAX_CONCURRENCY run through the
+# graph at once. Keep it at or below the Ollama server's OLLAMA_NUM_PARALLEL.
+BATCH_WINDOW = int(os.getenv("BATCH_WINDOW", "64"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+
+# LLM gateway: at most LLM_MAX_IN_FLIGHT Ollama requests run at once, up to
+# LLM_MAX_QUEUE more wait (interactive chat ahead of batch jobs) for at most
+# LLM_QUEUE_TIMEOUT seconds. Admitted requests time out after
+# LLM_REQUEST_TIMEOUT seconds, 0 for no limit.
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "4"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "64"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "30"))
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "120"))
+
+# LLM profiles, one per kind of call: Ollama model, temperature, max_tokens
+# (num_predict, 0 for no cap), stop sequences, keep_alive and num_ctx (0 for
+# the model default). Routing and city extraction are short, deterministic
+# outputs, so they are capped hard; "answer" is the default for other calls.
+# Override any setting with LLM_<PROFILE>_<SETTING>, for example
+# LLM_ROUTER_MODEL=qwen2.5:0.5b or LLM_CITY_STOP='["\\n"]' (JSON list).
+# A different num_ctx per profile makes Ollama reload the model, so only
+# change it together with the model.
+LLM_MODEL = os.getenv("LLM_MODEL", "ministral-3:3b")
+LLM_NUM_CTX = int(os.getenv("LLM_NUM_CTX", "0"))
+
+
+def _keep_alive(value):
+    """Ollama keep_alive: None, whole seconds, or a duration such as "30m"."""
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+# How long Ollama keeps a model loaded after a request. Negative pins it in
+# memory until `ollama stop`, so the first query after idle does not reload.
+LLM_KEEP_ALIVE = _keep_alive(os.getenv("LLM_KEEP_ALIVE", "-1"))
+
+# Load the models and prefill the static prompt prefixes at startup
+LLM_WARMUP = os.getenv("LLM_WARMUP", "true").lower() == "true"
+
+
+def _llm_profile(name: str, temperature: float, max_tokens: int, stop=()) -> dict:
+    prefix = f"LLM_{name.upper()}_"
+    stop_env = os.getenv(prefix + "STOP")
+    return {
+        "model": os.getenv(prefix + "MODEL", LLM_MODEL),
+        "temperature": float(os.getenv(prefix + "TEMPERATURE", str(temperature))),
+        "max_tokens": int(os.getenv(prefix + "MAX_TOKENS", str(max_tokens))),
+        "stop": json.loads(stop_env) if stop_env else list(stop),
+        "keep_alive": _keep_alive(
+            os.getenv(prefix + "KEEP_ALIVE", "" if LLM_KEEP_ALIVE is None else str(LLM_KEEP_ALIVE))
+        ),
+        "num_ctx": int(os.getenv(prefix + "NUM_CTX", str(LLM_NUM_CTX))),
+    }
+
+
+LLM_PROFILES = {
+    "answer": _llm_profile("answer", temperature=0.7, max_tokens=0),
+    "router": _llm_profile("router", temperature=0.0, max_tokens=8, stop=["\n"]),
+    "city": _llm_profile("city", temperature=0.0, max_tokens=16, stop=["\n"]),
+    "route": _llm_profile("route", temperature=0.0, max_tokens=64),
+}
+
+# Speculative branches: while the route is being decided, document retrieval
+# already runs, and is cancelled or discarded if the route is weather. Sync
+# graph runs share SPECULATIVE_WORKERS threads and do not speculate while all
+# of them are busy.
+SPECULATIVE_BRANCHES = os.getenv("SPECULATIVE_BRANCHES", "false").lower() == "true"
+SPECULATIVE_WORKERS = int(os.getenv("SPECULATIVE_WORKERS", "4"))
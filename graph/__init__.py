@@ -1,2 +1,3 @@
 from graph.state import AgentState
 from graph.workflow import app
+from graph.batch import iter_batch, run_batch
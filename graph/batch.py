@@ -0,0 +1,140 @@
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, List
+
+from config import (
+    BATCH_MAX_CONCURRENCY,
+    BATCH_WINDOW,
+    RERANK_CANDIDATES,
+    RERANK_ENABLED,
+    RETRIEVAL_K,
+)
+from graph.router import classify_by_rules
+from graph.workflow import app
+from rag.retriever import retrieve_batch
+from services.embedding_service import get_query_embeddings
+from services.llm_gateway import BATCH, llm_priority
+
+
+def _windows(queries: Iterable[str], size: int) -> Iterator[list]:
+    iterator = iter(queries)
+    while True:
+        window = list(islice(iterator, size))
+        if not window:
+            return
+        yield window
+
+
+def prefetch(queries: List[str]) -> List[dict]:
+    """
+    Build initial graph states for a window of queries, sharing the work.
+
+    All queries are embedded as one model batch, which fills the query
+    embedding cache used by the answer cache, router and retriever. Queries
+    that are not clearly about the weather are then searched together in a
+    single Qdrant batch request. A failure here only loses the speed-up: the
+    affected queries retrieve on their own inside the graph.
+
+    Args:
+        queries: User queries
+
+    Returns:
+        One initial AgentState per query
+    """
+    states = [{"user_query": query} for query in queries]
+
+    try:
+        get_query_embeddings().embed_queries(queries)
+    except Exception as e:
+        print(f"Batch embedding failed: {e}")
+        return states
+
+    document_states = []
+    for state in states:
+        rule = classify_by_rules(state["user_query"])
+        if rule is None or rule[0] != "weather":
+            document_states.append(state)
+
+    try:
+        results = retrieve_batch(
+            [state["user_query"] for state in document_states],
+            k=RERANK_CANDIDATES if RERANK_ENABLED else RETRIEVAL_K,
+        )
+    except Exception as e:
+        print(f"Batch retrieval failed: {e}")
+        return states
+
+    for state, docs in zip(document_states, results):
+        state["prefetched_docs"] = docs
+    return states
+
+
+def _run_window(states: List[dict], max_concurrency: int) -> List[dict]:
+    # Batch LLM calls queue behind interactive chat in the LLM gateway
+    with llm_priority(BATCH):
+        outputs = app.batch(
+            states, config={"max_concurrency": max_concurrency}, return_exceptions=True
+        )
+
+    results = []
+    for state, output in zip(states, outputs):
+        if isinstance(output, Exception):
+            output = {"user_query": state["user_query"], "errors": [str(output)]}
+        output.pop("prefetched_docs", None)
+        results.append(output)
+    return results
+
+
+def iter_batch(
+    queries: Iterable[str],
+    window: int = BATCH_WINDOW,
+    max_concurrency: int = BATCH_MAX_CONCURRENCY,
+) -> Iterator[dict]:
+    """
+    Run many queries through the graph, yielding results in input order.
+
+    Queries are read in windows. Each window is prefetched (batched
+    embeddings and searches) while the previous one runs through the graph
+    with at most max_concurrency queries, and so LLM calls, in flight. A
+    query that fails yields a state with its "errors" instead of stopping
+    the batch.
+
+    Args:
+        queries: List or any iterable of user queries
+        window: Number of queries prefetched together
+        max_concurrency: Maximum queries running through the graph at once
+
+    Yields:
+        Final AgentState of each query
+    """
+    windows = _windows(queries, window)
+    first = next(windows, None)
+    if first is None:
+        return
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="batch-prefetch") as prefetcher:
+        pending = prefetcher.submit(prefetch, first)
+        for upcoming in windows:
+            states = pending.result()
+            pending = prefetcher.submit(prefetch, upcoming)
+            yield from _run_window(states, max_concurrency)
+        yield from _run_window(pending.result(), max_concurrency)
+
+
+def run_batch(
+    queries: Iterable[str],
+    window: int = BATCH_WINDOW,
+    max_concurrency: int = BATCH_MAX_CONCURRENCY,
+) -> List[dict]:
+    """
+    Run many queries through the graph and collect the results.
+
+    Args:
+        queries: List or any iterable of user queries
+        window: Number of queries prefetched together
+        max_concurrency: Maximum queries running through the graph at once
+
+    Returns:
+        Final AgentState of each query, in input order
+    """
+    return list(iter_batch(queries, window, max_concurrency))
@@ -1,6 +1,9 @@
-from graph.nodes.decision import decision_node_fn
-from graph.nodes.city import city_node_fn
-from graph.nodes.weather import weather_node_fn
-from graph.nodes.context import context_node_fn
-from graph.nodes.answer import answer_node_fn
-from graph.nodes.evaluation import evaluate_response
\ No newline at end of file
+from graph.nodes.decision import decision_node_fn, adecision_node_fn
+from graph.nodes.route import route_node_fn, aroute_node_fn
+from graph.nodes.city import city_node_fn, acity_node_fn
+from graph.nodes.weather import weather_node_fn, aweather_node_fn
+from graph.nodes.context import context_node_fn, acontext_node_fn
+from graph.nodes.answer import answer_node_fn, aanswer_node_fn
+from graph.nodes.evaluation import evaluate_response
+from graph.nodes.cache import cache_lookup_node_fn, cache_store_node_fn
+from graph.nodes.speculate import speculative_node, speculation_stats
@@ -1,25 +1,129 @@
+import time
+
+from config import ANSWER_STREAMING, NO_CONTEXT_MODE
 from graph import AgentState
-from prompts import WEATHER_PROMPT, DOCUMENT_ANSWER
-from services import get_llm_response
+from prompts import (
+    WEATHER_PROMPT,
+    WEATHER_SYSTEM,
+    DOCUMENT_ANSWER,
+    DOCUMENT_SYSTEM,
+    NO_CONTEXT_ANSWER,
+    NO_CONTEXT_PROMPT,
+    NO_CONTEXT_SYSTEM,
+    RETRIEVAL_ERROR_ANSWER,
+)
+from services import (
+    get_llm_response,
+    aget_llm_response,
+    stream_llm_response,
+    astream_llm_response,
+)
 
 
 def answer_node_fn(state: AgentState) -> AgentState:
-    """Generate answer from context."""
+    """Generate answer from context.
+
+    The response is streamed, so callers using app.stream(...,
+    stream_mode="messages") receive tokens as they are generated. When
+    retrieval found nothing relevant, the LLM call is skipped or made with
+    a short prompt, depending on NO_CONTEXT_MODE. When retrieval failed,
+    an error answer is returned without calling the LLM.
+    """
     try:
-        if state["route"].lower() == "weather":
-            state["llm_input"] = WEATHER_PROMPT.format(
-                user_query=state["user_query"],
-                weather_data=state["weather_data"],
-            )
-            state["llm_response"] = get_llm_response(state["llm_input"])
+        if _skip_llm(state):
+            return state
 
+        system, state["llm_input"] = _build_prompt(state)
+
+        if not ANSWER_STREAMING:
+            state["llm_response"] = get_llm_response(state["llm_input"], system=system)
             return state
-        state["llm_input"] = DOCUMENT_ANSWER.format(
-            user_query=state["user_query"],
-            rag_context=state["rag_context"],
-        )
-        state["llm_response"] = get_llm_response(state["llm_input"])
+
+        start = time.perf_counter()
+        parts = []
+        for token in stream_llm_response(state["llm_input"], system=system):
+            if not parts:
+                state["llm_ttft_ms"] = _elapsed_ms(start)
+            parts.append(token)
+
+        state["llm_response"] = "".join(parts)
 
         return state
     except Exception as e:
         return {"errors": [str(e)]}
+
+
+async def aanswer_node_fn(state: AgentState) -> AgentState:
+    """Async variant of answer_node_fn."""
+    try:
+        if _skip_llm(state):
+            return state
+
+        system, state["llm_input"] = _build_prompt(state)
+
+        if not ANSWER_STREAMING:
+            state["llm_response"] = await aget_llm_response(state["llm_input"], system=system)
+            return state
+
+        start = time.perf_counter()
+        parts = []
+        async for token in astream_llm_response(state["llm_input"], system=system):
+            if not parts:
+                state["llm_ttft_ms"] = _elapsed_ms(start)
+            parts.append(token)
+
+        state["llm_response"] = "".join(parts)
+
+        return state
+    except Exception as e:
+        return {"errors": [str(e)]}
+
+
+def _lacks_context(state: AgentState) -> bool:
+    return state["route"].lower() != "weather" and not state.get("rag_context")
+
+
+def _retrieval_failed(state: AgentState) -> bool:
+    """The context node reported an error instead of setting rag_context."""
+    return (
+        state["route"].lower() != "weather"
+        and state.get("rag_context") is None
+        and bool(state.get("errors"))
+    )
+
+
+def _skip_llm(state: AgentState) -> bool:
+    """Answer without the LLM when retrieval failed or found nothing relevant."""
+    if _retrieval_failed(state):
+        # An outage must not read as "nothing relevant in your documents"
+        state["llm_input"] = None
+        state["llm_response"] = RETRIEVAL_ERROR_ANSWER
+        return True
+
+    if NO_CONTEXT_MODE != "skip" or not _lacks_context(state):
+        return False
+
+    state["llm_input"] = None
+    state["llm_response"] = NO_CONTEXT_ANSWER
+    return True
+
+
+def _build_prompt(state: AgentState) -> tuple:
+    """Return the static system prompt and the per-query prompt."""
+    if state["route"].lower() == "weather":
+        return WEATHER_SYSTEM, WEATHER_PROMPT.format(
+            user_query=state["user_query"],
+            weather_data=state["weather_data"],
+        )
+
+    if NO_CONTEXT_MODE == "shrink" and _lacks_context(state):
+        return NO_CONTEXT_SYSTEM, NO_CONTEXT_PROMPT.format(user_query=state["user_query"])
+
+    return DOCUMENT_SYSTEM, DOCUMENT_ANSWER.format(
+        user_query=state["user_query"],
+        rag_context=state["rag_context"],
+    )
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 1)
@@ -0,0 +1,49 @@
+from config import SEMANTIC_CACHE_ENABLED
+from graph import AgentState
+from services.answer_cache import answer_cache
+
+
+def cache_lookup_node_fn(state: AgentState) -> AgentState:
+    """Short-circuit with a cached answer to an equivalent query."""
+    state["cache_hit"] = False
+
+    if not SEMANTIC_CACHE_ENABLED:
+        return state
+
+    try:
+        entry = answer_cache.lookup(state["user_query"])
+    except Exception as e:
+        # A cache failure must never fail the query
+        print(f"Semantic cache lookup failed: {e}")
+        return state
+
+    if entry is not None:
+        state["cache_hit"] = True
+        state["route"] = entry["route"]
+        state["weather_city"] = entry["weather_city"]
+        state["llm_response"] = entry["answer"]
+        state["final_answer"] = entry["answer"]
+
+    return state
+
+
+def cache_store_node_fn(state: AgentState) -> AgentState:
+    """Remember the generated answer for future equivalent queries."""
+    if not SEMANTIC_CACHE_ENABLED or state.get("errors"):
+        return state
+
+    answer = state.get("llm_response")
+    if not answer:
+        return state
+
+    try:
+        answer_cache.store(
+            state["user_query"],
+            answer,
+            route=state.get("route"),
+            weather_city=state.get("weather_city"),
+        )
+    except Exception as e:
+        print(f"Semantic cache store failed: {e}")
+
+    return state
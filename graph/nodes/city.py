@@ -1,15 +1,57 @@
+from config import GAZETTEER_ENABLED
 from graph import AgentState
-from prompts import CITY_PROMPT
-from services import get_llm_response
+from prompts import CITY_PROMPT, CITY_SYSTEM
+from services import get_llm_response, aget_llm_response
+from services.gazetteer import extract_city
 
 
 def city_node_fn(state: AgentState) -> AgentState:
     """Extract City name with Country code from query."""
     try:
+        if _resolve_city(state) or state.get("weather_city"):
+            return state
+
         state["weather_city"] = get_llm_response(
-            CITY_PROMPT.format(user_query=state["user_query"])
+            CITY_PROMPT.format(user_query=state["user_query"]),
+            profile="city",
+            system=CITY_SYSTEM,
         )
         return state
 
     except Exception as e:
         return {"errors": [str(e)]}
+
+
+async def acity_node_fn(state: AgentState) -> AgentState:
+    """Async variant of city_node_fn."""
+    try:
+        if _resolve_city(state) or state.get("weather_city"):
+            return state
+
+        state["weather_city"] = await aget_llm_response(
+            CITY_PROMPT.format(user_query=state["user_query"]),
+            profile="city",
+            system=CITY_SYSTEM,
+        )
+        return state
+
+    except Exception as e:
+        return {"errors": [str(e)]}
+
+
+def _resolve_city(state: AgentState) -> bool:
+    """Fill weather_city and weather_coords from the gazetteer if possible."""
+    if not GAZETTEER_ENABLED:
+        return False
+
+    # The fused route node may already have extracted "City, CC"
+    text = state.get("weather_city") or state["user_query"]
+    country = text.rpartition(",")[2].strip() if "," in text else None
+    match = extract_city(text, country)
+
+    if match is None:
+        return False
+
+    state["weather_city"] = f"{match['name']}, {match['country']}"
+    state["weather_coords"] = {"lat": match["lat"], "lon": match["lon"]}
+    return True
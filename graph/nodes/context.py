@@ -1,15 +1,71 @@
+from config import (
+    MIN_RELEVANCE_SCORE,
+    RERANK_CANDIDATES,
+    RERANK_ENABLED,
+    RETRIEVAL_K,
+)
 from graph import AgentState
-from rag import retrieve_with_scores
+from rag import retrieve_with_scores, aretrieve_with_scores
+from rag.retriever import relevance_score
+from rag.context import SEPARATOR, build_context
+from services.rerank_service import rerank, arerank
 
 
 def context_node_fn(state: AgentState) -> AgentState:
-    """RAG orchestration, Retrieve and process documents."""
+    """RAG orchestration, Retrieve and process documents.
+
+    With reranking enabled, more candidates are fetched and a cross-encoder
+    keeps the best RETRIEVAL_K, so the answer prompt stays small. Chunks
+    below MIN_RELEVANCE_SCORE are dropped, and the rest are deduplicated,
+    merged and fitted to CONTEXT_TOKEN_BUDGET. Results prefetched by the
+    batch runner are used instead of a new search.
+    """
     try:
-        docs = retrieve_with_scores(query=state["user_query"], k=3)
+        query = state["user_query"]
+        docs = state.get("prefetched_docs")
+
+        if RERANK_ENABLED:
+            if docs is None:
+                docs = retrieve_with_scores(query=query, k=RERANK_CANDIDATES)
+            docs = rerank(query, docs, top_k=RETRIEVAL_K)
+        elif docs is None:
+            docs = retrieve_with_scores(query=query, k=RETRIEVAL_K)
 
-        state["retrieved_chunks"] = [doc[0].page_content for doc in docs]
-        state["rag_context"] = "\n\n".join(state["retrieved_chunks"])
+        _set_context(state, docs)
 
         return state
     except Exception as e:
         return {"errors": [str(e)]}
+
+
+async def acontext_node_fn(state: AgentState) -> AgentState:
+    """Async variant of context_node_fn."""
+    try:
+        query = state["user_query"]
+        docs = state.get("prefetched_docs")
+
+        if RERANK_ENABLED:
+            if docs is None:
+                docs = await aretrieve_with_scores(query=query, k=RERANK_CANDIDATES)
+            docs = await arerank(query, docs, top_k=RETRIEVAL_K)
+        elif docs is None:
+            docs = await aretrieve_with_scores(query=query, k=RETRIEVAL_K)
+
+        _set_context(state, docs)
+
+        return state
+    except Exception as e:
+        return {"errors": [str(e)]}
+
+
+def _set_context(state: AgentState, docs: list) -> None:
+    docs = [
+        (doc, score)
+        for doc, score in docs
+        if relevance_score(doc, score) >= MIN_RELEVANCE_SCORE
+    ]
+    chunks, scores, tokens = build_context(docs)
+    state["retrieved_chunks"] = chunks
+    state["retrieved_scores"] = scores
+    state["rag_context"] = SEPARATOR.join(chunks)
+    state["context_tokens"] = tokens
@@ -1,17 +1,58 @@
+import asyncio
+
+from config import ROUTER_FAST_PATH
 from graph import AgentState
-from prompts import ROUTING_PROMPT
-from services import get_llm_response
+from graph.router import classify_route, router_stats
+from prompts import ROUTING_PROMPT, ROUTING_SYSTEM
+from services import get_llm_response, aget_llm_response
 
 
 def decision_node_fn(state: AgentState) -> AgentState:
     """Route between Weather and RAG based on query."""
     try:
+        if ROUTER_FAST_PATH:
+            result = classify_route(state["user_query"])
+            if result is not None:
+                state["route"], state["route_confidence"], state["route_source"] = result
+                return state
+
         route = get_llm_response(
-            ROUTING_PROMPT.format(user_query=state["user_query"])
-        ).lower().strip()
-        state["route"] = route
+            ROUTING_PROMPT.format(user_query=state["user_query"]),
+            profile="router",
+            system=ROUTING_SYSTEM,
+        )
+        return _apply_llm_route(state, route)
+    except Exception as e:
+        state["errors"] = [str(e)]
+        state["route"] = "rag"
         return state
+
+
+async def adecision_node_fn(state: AgentState) -> AgentState:
+    """Async variant of decision_node_fn."""
+    try:
+        if ROUTER_FAST_PATH:
+            # The embedding classifier may run model inference
+            result = await asyncio.to_thread(classify_route, state["user_query"])
+            if result is not None:
+                state["route"], state["route_confidence"], state["route_source"] = result
+                return state
+
+        route = await aget_llm_response(
+            ROUTING_PROMPT.format(user_query=state["user_query"]),
+            profile="router",
+            system=ROUTING_SYSTEM,
+        )
+        return _apply_llm_route(state, route)
     except Exception as e:
         state["errors"] = [str(e)]
         state["route"] = "rag"
         return state
+
+
+def _apply_llm_route(state: AgentState, route: str) -> AgentState:
+    router_stats["llm"] += 1
+    state["route"] = route.lower().strip()
+    state["route_source"] = "llm"
+    state["route_confidence"] = None
+    return state
@@ -43,6 +43,9 @@ def _compute_local_metrics(state: AgentState) -> dict:
         "has_response": bool(response),
         "query_length": len(query),
         "route": state.get("route", "unknown"),
+        "route_source": state.get("route_source"),
+        "ttft_ms": state.get("llm_ttft_ms"),
+        "context_tokens": state.get("context_tokens"),
     }
 
     # Compute relevance score (0-1) based on query/response overlap
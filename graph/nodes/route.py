@@ -0,0 +1,74 @@
+import asyncio
+
+from config import ROUTER_FAST_PATH
+from graph import AgentState
+from graph.router import classify_route, router_stats
+from prompts import (
+    ROUTE_AND_CITY_PROMPT,
+    ROUTE_AND_CITY_SCHEMA,
+    ROUTE_AND_CITY_SYSTEM,
+)
+from services.llm_service import (
+    aget_structured_llm_response,
+    get_structured_llm_response,
+)
+
+
+def route_node_fn(state: AgentState) -> AgentState:
+    """Route the query and extract the weather city in a single LLM call."""
+    try:
+        if ROUTER_FAST_PATH:
+            result = classify_route(state["user_query"])
+            if result is not None:
+                state["route"], state["route_confidence"], state["route_source"] = result
+                return state
+
+        result = get_structured_llm_response(
+            ROUTE_AND_CITY_PROMPT.format(user_query=state["user_query"]),
+            ROUTE_AND_CITY_SCHEMA,
+            profile="route",
+            system=ROUTE_AND_CITY_SYSTEM,
+        )
+        return _apply_llm_result(state, result)
+    except Exception as e:
+        state["errors"] = [str(e)]
+        state["route"] = "rag"
+        return state
+
+
+async def aroute_node_fn(state: AgentState) -> AgentState:
+    """Async variant of route_node_fn."""
+    try:
+        if ROUTER_FAST_PATH:
+            result = await asyncio.to_thread(classify_route, state["user_query"])
+            if result is not None:
+                state["route"], state["route_confidence"], state["route_source"] = result
+                return state
+
+        result = await aget_structured_llm_response(
+            ROUTE_AND_CITY_PROMPT.format(user_query=state["user_query"]),
+            ROUTE_AND_CITY_SCHEMA,
+            profile="route",
+            system=ROUTE_AND_CITY_SYSTEM,
+        )
+        return _apply_llm_result(state, result)
+    except Exception as e:
+        state["errors"] = [str(e)]
+        state["route"] = "rag"
+        return state
+
+
+def _apply_llm_result(state: AgentState, result: dict) -> AgentState:
+    router_stats["llm"] += 1
+
+    route = str(result.get("route") or "other").lower().strip()
+    state["route"] = "weather" if route == "weather" else "other"
+    state["route_source"] = "llm"
+    state["route_confidence"] = None
+
+    city = (result.get("city") or "").strip()
+    if state["route"] == "weather" and city:
+        country = (result.get("country") or "").strip().upper()
+        state["weather_city"] = f"{city}, {country}" if country else city
+
+    return state
@@ -0,0 +1,154 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Tuple
+
+from config import (
+    RERANK_CANDIDATES,
+    RERANK_ENABLED,
+    RETRIEVAL_K,
+    ROUTER_FAST_PATH,
+    SPECULATIVE_WORKERS,
+)
+from graph import AgentState
+from graph.router import classify_by_rules
+from rag import retrieve_with_scores, aretrieve_with_scores
+
+# Shared by all sync graph runs; retrieval is I/O bound
+_executor = ThreadPoolExecutor(
+    max_workers=SPECULATIVE_WORKERS, thread_name_prefix="speculate"
+)
+# Free workers; a discarded search keeps its worker until it finishes
+_slots = threading.BoundedSemaphore(SPECULATIVE_WORKERS)
+
+speculation_stats = {"used": 0, "discarded": 0, "skipped": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(outcome: str) -> None:
+    with _stats_lock:
+        speculation_stats[outcome] += 1
+
+
+def _submit(fn, *args, **kwargs):
+    """
+    Run fn in a free worker, or return None when all workers are busy.
+
+    Queueing behind discarded searches could take longer than searching
+    after routing, so a busy pool means no speculation.
+    """
+    if not _slots.acquire(blocking=False):
+        return None
+    try:
+        # Carry context variables (tracing) into the worker thread
+        future = _executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+    except BaseException:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+    return future
+
+
+def _retrieval_k() -> int:
+    return RERANK_CANDIDATES if RERANK_ENABLED else RETRIEVAL_K
+
+
+def _should_speculate(state: AgentState) -> bool:
+    """Speculate only while the route is really unknown."""
+    if state.get("prefetched_docs") is not None:
+        return False
+    if ROUTER_FAST_PATH and classify_by_rules(state["user_query"]) is not None:
+        return False
+    return True
+
+
+def _is_weather(state: AgentState) -> bool:
+    return (state.get("route") or "").lower() == "weather"
+
+
+def _apply_docs(state: AgentState, docs) -> AgentState:
+    """Keep the speculative search unless the route picked weather."""
+    if docs is not None and not _is_weather(state):
+        # The context node uses these instead of searching again
+        state["prefetched_docs"] = docs
+    return state
+
+
+def speculative_node(
+    route_fn: Callable, aroute_fn: Callable
+) -> Tuple[Callable, Callable]:
+    """
+    Wrap a routing node so document retrieval starts while it decides.
+
+    Once the route is known, the search results are put in the state as
+    prefetched_docs, or the search is cancelled or, when already running in
+    a thread, discarded if the route is weather. The weather branch is not
+    speculated, since its city lookup is an in-memory gazetteer match.
+    Queries the routing rules decide at once, and sync runs that find every
+    worker busy, are routed without speculation and search after routing.
+
+    Args:
+        route_fn: Sync routing node, decision_node_fn or route_node_fn
+        aroute_fn: Its async variant
+
+    Returns:
+        (sync node, async node)
+    """
+
+    def node(state: AgentState) -> AgentState:
+        if not _should_speculate(state):
+            return route_fn(state)
+
+        docs = _submit(retrieve_with_scores, query=state["user_query"], k=_retrieval_k())
+        if docs is None:
+            _count("skipped")
+            return route_fn(state)
+
+        state = route_fn(state)
+
+        if _is_weather(state):
+            docs.cancel()
+            _count("discarded")
+            return state
+
+        try:
+            docs = docs.result()
+            _count("used")
+        except Exception as e:
+            print(f"Speculative retrieval failed: {e}")
+            docs = None
+
+        return _apply_docs(state, docs)
+
+    async def anode(state: AgentState) -> AgentState:
+        if not _should_speculate(state):
+            return await aroute_fn(state)
+
+        docs = asyncio.create_task(
+            aretrieve_with_scores(query=state["user_query"], k=_retrieval_k())
+        )
+
+        try:
+            state = await aroute_fn(state)
+        except BaseException:
+            docs.cancel()
+            raise
+
+        if _is_weather(state):
+            docs.cancel()
+            _count("discarded")
+            return state
+
+        try:
+            docs = await docs
+            _count("used")
+        except Exception as e:
+            print(f"Speculative retrieval failed: {e}")
+            docs = None
+
+        return _apply_docs(state, docs)
+
+    node.__name__ = f"speculative_{route_fn.__name__}"
+    anode.__name__ = f"aspeculative_{route_fn.__name__}"
+    return node, anode
@@ -1,4 +1,4 @@
-from services import fetch_weather
+from services import fetch_weather, afetch_weather
 
 from graph import AgentState
 
@@ -6,7 +6,24 @@ from graph import AgentState
 def weather_node_fn(state: AgentState) -> AgentState:
     """Handle weather related queries via API."""
     try:
-        state["weather_data"] = fetch_weather(state["weather_city"])
+        coords = state.get("weather_coords") or {}
+        state["weather_data"] = fetch_weather(
+            state["weather_city"], lat=coords.get("lat"), lon=coords.get("lon")
+        )
+
+        return state
+
+    except Exception as e:
+        return {"errors": [str(e)]}
+
+
+async def aweather_node_fn(state: AgentState) -> AgentState:
+    """Async variant of weather_node_fn."""
+    try:
+        coords = state.get("weather_coords") or {}
+        state["weather_data"] = await afetch_weather(
+            state["weather_city"], lat=coords.get("lat"), lon=coords.get("lon")
+        )
 
         return state
 
@@ -0,0 +1,182 @@
+import re
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+
+from config import GAZETTEER_ENABLED, ROUTER_EMBEDDING_MARGIN
+from services.embedding_service import (
+    get_embeddings,
+    get_embedding_model_name,
+    get_query_embeddings,
+)
+from services.gazetteer import extract_city
+
+# Phrasing that only shows up in weather questions
+WEATHER_PATTERN = re.compile(
+    r"\b(weather|how (?:hot|cold|warm) is it)\b",
+    re.IGNORECASE,
+)
+
+# Weather words that also appear in technical and document questions
+# ("operating temperature range", "sales forecast", "fog computing"). They
+# only count together with a known city. "climate" is left out on purpose:
+# "climate change" questions belong to the document route.
+WEATHER_TERM_PATTERN = re.compile(
+    r"\b("
+    r"forecasts?|temperatures?|rain(?:s|ing|y|fall)?|snow(?:s|ing|y)?|"
+    r"humidity|humid|windy|wind speed|sunny|cloudy|overcast|thunderstorms?|"
+    r"storms?|drizzle|hail|fog(?:gy)?|celsius|fahrenheit|umbrella|"
+    r"sunrise|sunset|heatwave"
+    r")\b",
+    re.IGNORECASE,
+)
+
+# Phrasing that points at the uploaded documents rather than the weather
+DOCUMENT_PATTERN = re.compile(
+    r"\b(pdf|document|manual|according to|the (?:file|report|paper)|summari[sz]e)\b",
+    re.IGNORECASE,
+)
+
+WEATHER_EXEMPLARS = [
+    "What's the weather in Paris?",
+    "Will it rain tomorrow in New York?",
+    "Temperature in Tokyo today",
+    "Is it cold outside in Berlin right now?",
+    "Do I need a jacket in London today?",
+    "How hot is it in Dubai?",
+    "Current conditions in Mumbai",
+    "Is it going to be sunny in Madrid this afternoon?",
+]
+
+OTHER_EXEMPLARS = [
+    "What is machine learning?",
+    "Summarize the uploaded document",
+    "Explain how neural networks work",
+    "What does the manual say about installation?",
+    "Who wrote this report?",
+    "How do I configure the product?",
+    "Tell me about Python",
+    "What are the main findings of the paper?",
+]
+
+router_stats = {"rules": 0, "embedding": 0, "llm": 0}
+
+_exemplar_vectors = {}
+_lock = threading.Lock()
+
+
+def classify_by_rules(query: str) -> Optional[Tuple[str, float]]:
+    """
+    Classify a query with keyword rules.
+
+    Ambiguous weather words ("forecast", "temperature", "rain") only count
+    when the query also names a known city; otherwise the embedding
+    classifier or the LLM decides.
+
+    Returns:
+        (route, confidence) when a rule fires, otherwise None
+    """
+    certain = WEATHER_PATTERN.search(query) is not None
+    weather = certain or (
+        WEATHER_TERM_PATTERN.search(query) is not None and _names_city(query)
+    )
+    document = DOCUMENT_PATTERN.search(query) is not None
+
+    if weather and not document:
+        return "weather", 0.95 if certain else 0.85
+    if document and not weather:
+        return "other", 0.9
+
+    return None
+
+
+def _names_city(query: str) -> bool:
+    """True when the gazetteer finds a known city in the query."""
+    try:
+        return GAZETTEER_ENABLED and extract_city(query) is not None
+    except Exception as e:
+        print(f"Gazetteer unavailable for routing: {e}")
+        return False
+
+
+def classify_by_embedding(
+    query: str, margin: float = ROUTER_EMBEDDING_MARGIN
+) -> Optional[Tuple[str, float]]:
+    """
+    Classify a query by nearest labeled exemplar.
+
+    Args:
+        query: User query
+        margin: Minimum gap between the best weather and best other
+            similarity for the decision to count as confident
+
+    Returns:
+        (route, confidence) when confident, otherwise None
+    """
+    weather_vectors, other_vectors = _get_exemplar_vectors()
+
+    vector = np.asarray(get_query_embeddings().embed_query(query), dtype=np.float32)
+    vector /= np.linalg.norm(vector) or 1.0
+
+    weather_score = float(np.max(weather_vectors @ vector))
+    other_score = float(np.max(other_vectors @ vector))
+    gap = abs(weather_score - other_score)
+
+    if gap < margin:
+        return None
+
+    route = "weather" if weather_score > other_score else "other"
+    return route, round(min(0.5 + gap, 1.0), 4)
+
+
+def classify_route(query: str) -> Optional[Tuple[str, float, str]]:
+    """
+    Try the cheap classifiers in order of cost.
+
+    Returns:
+        (route, confidence, source) or None when the LLM must decide
+    """
+    result = classify_by_rules(query)
+    if result is not None:
+        router_stats["rules"] += 1
+        return (*result, "rules")
+
+    try:
+        result = classify_by_embedding(query)
+    except Exception as e:
+        print(f"Embedding router unavailable: {e}")
+        result = None
+
+    if result is not None:
+        router_stats["embedding"] += 1
+        return (*result, "embedding")
+
+    return None
+
+
+def _get_exemplar_vectors() -> Tuple[np.ndarray, np.ndarray]:
+    """Embed and normalize the exemplars once per embedding model."""
+    name = get_embedding_model_name()
+
+    vectors = _exemplar_vectors.get(name)
+    if vectors is not None:
+        return vectors
+
+    with _lock:
+        vectors = _exemplar_vectors.get(name)
+        if vectors is None:
+            embeddings = get_embeddings()
+            vectors = tuple(
+                _normalize(embeddings.embed_documents(exemplars))
+                for exemplars in (WEATHER_EXEMPLARS, OTHER_EXEMPLARS)
+            )
+            _exemplar_vectors[name] = vectors
+
+    return vectors
+
+
+def _normalize(vectors: list) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
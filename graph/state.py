@@ -7,22 +7,37 @@ class AgentState(TypedDict):
 
     # Routing: "weather" | "other"
     route: Optional[str]
+    # "rules" | "embedding" | "llm"
+    route_source: Optional[str]
+    route_confidence: Optional[float]
 
     # Weather Tool
     weather_city: Optional[str]
+    weather_coords: Optional[Dict[str, float]]
     weather_data: Optional[Dict[str, Any]]
 
     # RAG Pipeline
+    # (document, score) results fetched ahead by the batch runner
+    prefetched_docs: Optional[List[Any]]
     retrieved_chunks: Optional[List[str]]
+    # Score of each retrieved chunk, same order as retrieved_chunks
+    retrieved_scores: Optional[List[float]]
     rag_context: Optional[str]
+    # Size of rag_context in LLM tokens
+    context_tokens: Optional[int]
 
     # LLM Processing
     llm_input: Optional[str]
     llm_response: Optional[str]
+    # Time to first streamed token of the answer, in milliseconds
+    llm_ttft_ms: Optional[float]
 
     # Final Output
     final_answer: Optional[str]
 
+    # Semantic Answer Cache
+    cache_hit: Optional[bool]
+
     # Evaluation
     evaluation_metrics: Optional[Dict[str, Any]]
 
@@ -1,28 +1,64 @@
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, START, END
 
+from config import ROUTING_MODE, SPECULATIVE_BRANCHES
 from graph import AgentState
 from graph.nodes import (
     decision_node_fn,
+    adecision_node_fn,
+    route_node_fn,
+    aroute_node_fn,
     city_node_fn,
+    acity_node_fn,
     weather_node_fn,
+    aweather_node_fn,
     context_node_fn,
+    acontext_node_fn,
     answer_node_fn,
+    aanswer_node_fn,
     evaluate_response,
+    cache_lookup_node_fn,
+    cache_store_node_fn,
+    speculative_node,
 )
 
+
+def _node(func, afunc) -> RunnableLambda:
+    """Node with a native async implementation used by app.ainvoke()."""
+    return RunnableLambda(func, afunc=afunc, name=func.__name__)
+
+
 flow_graph = StateGraph(state_schema=AgentState)
 
-flow_graph.add_node("decision_node", decision_node_fn)
+flow_graph.add_node("cache_lookup_node", cache_lookup_node_fn)
+flow_graph.add_node("cache_store_node", cache_store_node_fn)
+
+routing = (
+    (route_node_fn, aroute_node_fn)
+    if ROUTING_MODE == "fused"
+    else (decision_node_fn, adecision_node_fn)
+)
+if SPECULATIVE_BRANCHES:
+    # Retrieval and the city lookup start while the route is being decided
+    routing = speculative_node(*routing)
 
-flow_graph.add_node("city_node", city_node_fn)
-flow_graph.add_node("weather_node", weather_node_fn)
+flow_graph.add_node("decision_node", _node(*routing))
 
-flow_graph.add_node("context_node", context_node_fn)
+flow_graph.add_node("city_node", _node(city_node_fn, acity_node_fn))
+flow_graph.add_node("weather_node", _node(weather_node_fn, aweather_node_fn))
 
-flow_graph.add_node("answer_node", answer_node_fn)
+flow_graph.add_node("context_node", _node(context_node_fn, acontext_node_fn))
+
+flow_graph.add_node("answer_node", _node(answer_node_fn, aanswer_node_fn))
 
 flow_graph.add_node("evaluation_node", evaluate_response)
 
+flow_graph.add_conditional_edges(
+    "cache_lookup_node",
+    lambda state: "hit_edge" if state.get("cache_hit") else "miss_edge",
+    {"hit_edge": END, "miss_edge": "decision_node"},
+)
+
 flow_graph.add_conditional_edges(
     "decision_node",
     lambda state: "city_edge"
@@ -36,9 +72,10 @@ flow_graph.add_edge("weather_node", "answer_node")
 
 flow_graph.add_edge("context_node", "answer_node")
 
-flow_graph.add_edge("answer_node", "evaluation_node")
+flow_graph.add_edge("answer_node", "cache_store_node")
+flow_graph.add_edge("cache_store_node", "evaluation_node")
 
-flow_graph.add_edge(START, "decision_node")
+flow_graph.add_edge(START, "cache_lookup_node")
 flow_graph.add_edge("evaluation_node", END)
 
 app = flow_graph.compile()
@@ -1,8 +1,13 @@
 import streamlit as st
 from pathlib import Path
 from graph import app
-from rag import ingest_pdf_to_qdrant
+from rag import get_job_queue
+from config import LLM_WARMUP, ROUTING_MODE
+from prompts import PROMPT_PREFIXES
+from services import warmup_embeddings, warmup_llm
+from services.llm_gateway import llm_gateway
 import hashlib
+import time
 
 # Page configuration
 st.set_page_config(
@@ -12,6 +17,70 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
+
+@st.cache_resource(show_spinner="Loading embedding model...")
+def load_models():
+    """Load shared models once per process, not once per rerun."""
+    return warmup_embeddings()
+
+
+load_models()
+
+
+@st.cache_resource(show_spinner="Warming up the LLM...")
+def load_llm():
+    """Load the LLMs and prefill the prompt prefixes of the active routing mode."""
+    unused = "router" if ROUTING_MODE == "fused" else "route"
+    return warmup_llm(
+        {name: prefix for name, prefix in PROMPT_PREFIXES.items() if name != unused}
+    )
+
+
+if LLM_WARMUP:
+    load_llm()
+
+
+JOB_ICONS = {
+    "queued": "⏳",
+    "running": "🔄",
+    "done": "✅",
+    "failed": "❌",
+    "cancelled": "🚫",
+}
+
+
+@st.fragment(run_every=2)
+def ingestion_jobs():
+    """Show background ingestion progress, refreshed without a full rerun."""
+    jobs = get_job_queue().list_jobs(limit=5)
+    if not jobs:
+        return
+
+    st.subheader("Ingestion jobs")
+    for job in jobs:
+        name = Path(job["path"]).name
+        status = job["status"]
+        st.markdown(f"{JOB_ICONS.get(status, '')} **{name}** — {status}")
+
+        if status == "running":
+            total = job["total_pages"] or 0
+            fraction = min(job["pages"] / total, 1.0) if total else 0.0
+            st.progress(
+                fraction,
+                text=f"{job['pages']}/{total or '?'} pages, {job['chunks']} chunks",
+            )
+        elif status == "done":
+            st.caption(f"{job['pages']} pages, {job['points']} new chunks")
+        elif status == "failed" and job["error"]:
+            st.caption(f"Attempt {job['attempts']}: {job['error']}")
+
+        if status in ("queued", "running"):
+            if st.button("Cancel", key=f"cancel_{job['id']}"):
+                get_job_queue().cancel(job["id"])
+        elif status in ("failed", "cancelled"):
+            if st.button("Retry", key=f"retry_{job['id']}"):
+                get_job_queue().retry(job["id"])
+
 # Initialize session state
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
@@ -102,43 +171,34 @@ with st.sidebar:
             # Save the uploaded file
             file_path = documents_dir / uploaded_file.name
 
-            with st.spinner(f"Uploading {uploaded_file.name}..."):
-                try:
-                    # Save file to documents directory
-                    with open(file_path, "wb") as f:
-                        f.write(uploaded_file.getbuffer())
-
-                    st.success(f"✅ File saved: {uploaded_file.name}")
-
-                    # Start ingestion
-                    with st.spinner(
-                        f"🔄 Ingesting {uploaded_file.name} into Qdrant..."
-                    ):
-                        ingest_pdf_to_qdrant(
-                            str(file_path),
-                            collection_name="documents",
-                            chunk_size=1000,
-                            chunk_overlap=200,
-                        )
-
-                    # Mark file as uploaded
-                    st.session_state.uploaded_files.add(file_hash)
-                    
-                    st.success(
-                        f"✅ Successfully ingested {uploaded_file.name} to the knowledge base!"
-                    )
-                    st.balloons()
-                    
-                    # Reset file uploader by incrementing key
-                    st.session_state.uploader_key += 1
-                    st.rerun()
-
-                except Exception as e:
-                    st.error(f"❌ Error processing file: {str(e)}")
-                    st.error(f"Details: {type(e).__name__}")
+            try:
+                # Save file to documents directory
+                with open(file_path, "wb") as f:
+                    f.write(uploaded_file.getbuffer())
+
+                # Ingest in the background so the chat stays responsive
+                get_job_queue().submit(
+                    str(file_path),
+                    collection_name="documents",
+                    chunk_size=1000,
+                    chunk_overlap=200,
+                )
+
+                # Mark file as uploaded
+                st.session_state.uploaded_files.add(file_hash)
+
+                # Reset file uploader by incrementing key
+                st.session_state.uploader_key += 1
+                st.rerun()
+
+            except Exception as e:
+                st.error(f"❌ Error processing file: {str(e)}")
+                st.error(f"Details: {type(e).__name__}")
         else:
             st.info(f"ℹ️ {uploaded_file.name} has already been uploaded.")
 
+    ingestion_jobs()
+
 # Main content
 st.divider()
 
@@ -189,13 +249,35 @@ if submit_button and user_query:
         "content": user_query
     })
     
+    st.markdown("🤖 **Assistant**")
+    answer_placeholder = st.empty()
+
     with st.spinner("Processing your query..."):
         try:
-            # Invoke the workflow
-            result = app.invoke({"user_query": user_query})
+            # Stream the workflow: answer tokens arrive as "messages" events,
+            # full state snapshots as "values" events
+            result = {}
+            streamed_answer = ""
+            started_at = time.perf_counter()
+            ttft_ms = None
+
+            for mode, payload in app.stream(
+                {"user_query": user_query}, stream_mode=["messages", "values"]
+            ):
+                if mode == "values":
+                    result = payload
+                    continue
+
+                chunk, metadata = payload
+                if metadata.get("langgraph_node") == "answer_node" and chunk.content:
+                    if ttft_ms is None:
+                        ttft_ms = round((time.perf_counter() - started_at) * 1000, 1)
+                    streamed_answer += chunk.content
+                    answer_placeholder.markdown(streamed_answer + "▌")
 
             # Extract the final answer
-            final_answer = result.get("final_answer") or result.get("llm_response", "No response generated.")
+            final_answer = result.get("final_answer") or result.get("llm_response") or streamed_answer or "No response generated."
+            answer_placeholder.markdown(final_answer)
             
             # Add assistant message to chat history
             st.session_state.chat_history.append({
@@ -205,6 +287,16 @@ if submit_button and user_query:
 
             # Debug info (collapsible)
             with st.expander("📊 Debug Information"):
+                if ttft_ms is not None:
+                    st.metric("Time to first token", f"{ttft_ms:.0f} ms")
+
+                llm_stats = llm_gateway.stats()
+                st.caption(
+                    f"LLM queue: {llm_stats['queue_depth']} waiting, "
+                    f"{llm_stats['in_flight']} running, "
+                    f"p95 wait {llm_stats['wait_ms_p95']:.0f} ms"
+                )
+
                 if result.get("retrieved_chunks"):
                     st.subheader("Retrieved Chunks")
                     for i, chunk in enumerate(result["retrieved_chunks"], 1):
@@ -1,4 +1,9 @@
-ROUTING_PROMPT = """You are an AI assistant whose task is to classify user queries.
+# Each prompt is a static system prompt plus a short template for the
+# variable part. The system prompt is sent first and never changes, so
+# Ollama reuses its cached prefill (KV cache) instead of re-reading the
+# instructions on every call. Keep them free of per-request values.
+
+ROUTING_SYSTEM = """You are an AI assistant whose task is to classify user queries.
 
 The user query will fall into either "weather or "other":
 
@@ -19,22 +24,23 @@ Rules:
 - Choose ONLY one category out off weather or other.
 - Do NOT explain your reasoning.
 - Output must be a single category.
+"""
 
-User query:
+ROUTING_PROMPT = """User query:
 "{user_query}"
-
 """
 
-CITY_PROMPT = """Identify the city mentioned in the sentence below. Respond only with the city name followed by its ISO 3166-1 two-letter country code.
+CITY_SYSTEM = """Identify the city mentioned in the sentence below. Respond only with the city name followed by its ISO 3166-1 two-letter country code.
 Example:
 What is the weather of Sydney?
 Response: Sydney, AU
+"""
 
-Sentence:
+CITY_PROMPT = """Sentence:
 {user_query}
 """
 
-WEATHER_PROMPT = """Analyze the weather data below and answer the weather question in plain language:
+WEATHER_SYSTEM = """Analyze the weather data below and answer the weather question in plain language:
 Example:
 Weather in Pune:
 
@@ -51,16 +57,67 @@ direction.
 
 The weather feels pleasant but could feel slightly cooler due to the wind 
 chill.
+"""
 
-Weather question:
+WEATHER_PROMPT = """Weather question:
 {user_query}
 Weather data:
 {weather_data}
 """
 
-DOCUMENT_ANSWER = """Analyze the data provided below and use it to answer the question. Refer only the given data.
+DOCUMENT_SYSTEM = """Analyze the data provided below and use it to answer the question. Refer only the given data.
+"""
+
+DOCUMENT_ANSWER = """Data context:
+{rag_context}
 Question:
 {user_query}
-Data context:
-{rag_context}
 """
+
+ROUTE_AND_CITY_SYSTEM = """You are an AI assistant that classifies user queries and extracts locations.
+
+Classify the user query as "weather" or "other":
+- "weather": the user asks about weather conditions, forecasts, temperature, rain, snow, wind or atmospheric conditions.
+- "other": everything else.
+
+For "weather" queries, also return the city mentioned in the query and its ISO 3166-1 two-letter country code. Use null when no city or country can be identified, and always use null for "other" queries.
+
+Respond with JSON only, for example:
+{"route": "weather", "city": "Sydney", "country": "AU"}
+{"route": "other", "city": null, "country": null}
+"""
+
+ROUTE_AND_CITY_PROMPT = """User query:
+"{user_query}"
+"""
+
+ROUTE_AND_CITY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "route": {"type": "string", "enum": ["weather", "other"]},
+        "city": {"type": ["string", "null"]},
+        "country": {"type": ["string", "null"]},
+    },
+    "required": ["route", "city", "country"],
+}
+
+NO_CONTEXT_ANSWER = "I couldn't find anything relevant to your question in the uploaded documents. Try rephrasing it, or upload a document that covers this topic."
+
+RETRIEVAL_ERROR_ANSWER = "I couldn't search the uploaded documents right now, so I can't answer this question. Please try again in a moment."
+
+NO_CONTEXT_SYSTEM = """No uploaded document is relevant to the question below. Answer briefly from general knowledge and say that the documents did not cover it.
+"""
+
+NO_CONTEXT_PROMPT = """Question:
+{user_query}
+"""
+
+# Static prefixes by node, with the LLM profile each is sent with. Used to
+# prefill Ollama's prompt cache at startup and by the prefill benchmark.
+PROMPT_PREFIXES = {
+    "router": ("router", ROUTING_SYSTEM),
+    "city": ("city", CITY_SYSTEM),
+    "route": ("route", ROUTE_AND_CITY_SYSTEM),
+    "weather_answer": ("answer", WEATHER_SYSTEM),
+    "document_answer": ("answer", DOCUMENT_SYSTEM),
+}
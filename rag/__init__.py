@@ -1,2 +1,3 @@
 from rag.ingestion import ingest_directory, ingest_pdf_to_qdrant
-from rag.retriever import retrieve_with_scores
\ No newline at end of file
+from rag.jobs import get_job_queue
+from rag.retriever import retrieve_with_scores, aretrieve_with_scores, retrieve_batch
\ No newline at end of file
@@ -0,0 +1,122 @@
+from config import CHARS_PER_TOKEN, CONTEXT_TOKEN_BUDGET
+from services.llm_service import count_tokens
+
+# Separator between context blocks in the answer prompt
+SEPARATOR = "\n\n"
+
+# Shortest suffix/prefix match treated as chunk overlap when chunks carry
+# no start_index (collections ingested before it was recorded)
+MIN_TEXT_OVERLAP = 20
+
+# Chunks of one page this close together are adjacent; the splitter strips
+# the whitespace it splits on, so consecutive chunks can leave a small gap
+MAX_ADJACENT_GAP = 2
+
+
+def _text_overlap(first: str, second: str) -> int:
+    """Length of the longest suffix of first that is a prefix of second."""
+    for size in range(min(len(first), len(second)), MIN_TEXT_OVERLAP - 1, -1):
+        if first.endswith(second[:size]):
+            return size
+    return 0
+
+
+def _merge_group(blocks: list) -> list:
+    """
+    Merge overlapping or adjacent chunks from the same page.
+
+    Blocks are dicts with text, score and start (None when unknown).
+    """
+    positioned = sorted(
+        (b for b in blocks if b["start"] is not None), key=lambda b: b["start"]
+    )
+    merged = []
+
+    for block in positioned:
+        if merged and block["start"] <= merged[-1]["end"] + MAX_ADJACENT_GAP:
+            last = merged[-1]
+            if block["start"] > last["end"]:
+                last["text"] += " " + block["text"]
+            else:
+                last["text"] += block["text"][last["end"] - block["start"]:]
+            last["end"] = max(last["end"], block["start"] + len(block["text"]))
+            last["score"] = max(last["score"], block["score"])
+        else:
+            merged.append({**block, "end": block["start"] + len(block["text"])})
+
+    # Without offsets, fall back to matching the overlapping text itself
+    for block in (b for b in blocks if b["start"] is None):
+        for other in merged:
+            overlap = _text_overlap(other["text"], block["text"])
+            if overlap:
+                other["text"] += block["text"][overlap:]
+            else:
+                overlap = _text_overlap(block["text"], other["text"])
+                if overlap:
+                    other["text"] = block["text"] + other["text"][overlap:]
+            if overlap:
+                other["score"] = max(other["score"], block["score"])
+                break
+        else:
+            merged.append(dict(block))
+
+    return merged
+
+
+def build_context(results: list, budget: int = CONTEXT_TOKEN_BUDGET) -> tuple:
+    """
+    Assemble retrieved chunks into a prompt context within a token budget.
+
+    Duplicate chunks are dropped and chunks of the same page that overlap
+    (from chunk_overlap) or touch are merged into one block, so shared text
+    is only paid for once. Blocks are then added best score first; a block
+    that would exceed the budget is skipped in favour of smaller ones. If
+    even the best block does not fit, it is truncated to the budget.
+
+    Args:
+        results: List of (document, score) tuples
+        budget: Maximum context size in LLM tokens
+
+    Returns:
+        Tuple of (selected block texts, their scores, token count)
+    """
+    groups = {}
+    seen = set()
+
+    for document, score in results:
+        text = document.page_content.strip()
+        if not text or text in seen:
+            continue
+        seen.add(text)
+
+        metadata = document.metadata or {}
+        key = (metadata.get("source"), metadata.get("page"))
+        groups.setdefault(key, []).append(
+            {"text": text, "score": score, "start": metadata.get("start_index")}
+        )
+
+    blocks = [block for group in groups.values() for block in _merge_group(group)]
+    blocks.sort(key=lambda b: b["score"], reverse=True)
+
+    separator_tokens = count_tokens(SEPARATOR)
+    selected = []
+    scores = []
+    used = 0
+
+    for block in blocks:
+        cost = count_tokens(block["text"]) + (separator_tokens if selected else 0)
+        if used + cost <= budget:
+            selected.append(block["text"])
+            scores.append(block["score"])
+            used += cost
+
+    if not selected and blocks:
+        text = blocks[0]["text"][: int(budget * CHARS_PER_TOKEN)]
+        while text and count_tokens(text) > budget:
+            text = text[: int(len(text) * 0.9)]
+        if text:
+            selected.append(text)
+            scores.append(blocks[0]["score"])
+            used = count_tokens(text)
+
+    return selected, scores, used
@@ -1,13 +1,41 @@
 import os
+import uuid
 from pathlib import Path
+from typing import Iterator
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_qdrant import QdrantVectorStore
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams
-
-from config import QDRANT_URL
-from services import get_embeddings
+from qdrant_client.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    Distance,
+    HnswConfigDiff,
+    Modifier,
+    PointIdsList,
+    PointStruct,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SparseIndexParams,
+    SparseVectorParams,
+    VectorParams,
+)
+
+from config import (
+    HNSW_EF_CONSTRUCT,
+    HNSW_M,
+    HYBRID_SEARCH,
+    INGESTION_UPSERT_BATCH_SIZE,
+    INGESTION_WORKERS,
+    PAYLOAD_ON_DISK,
+    VECTOR_QUANTIZATION,
+    VECTORS_ON_DISK,
+)
+from rag.manifest import load_manifest, source_key
+from rag.sparse import SPARSE_VECTOR_NAME, document_vector
+from services.answer_cache import answer_cache
+from services.embedding_service import get_query_embeddings
+from services.qdrant_service import get_qdrant_client
 
 
 def extract_pdf_text(pdf_path: str) -> list:
@@ -46,14 +74,124 @@ def chunk_documents(
     Returns:
         List of chunked documents
     """
-    splitter = RecursiveCharacterTextSplitter(
+    splitter = make_splitter(chunk_size, chunk_overlap)
+
+    chunks = splitter.split_documents(documents)
+    return chunks
+
+
+def make_splitter(
+    chunk_size: int = 1000, chunk_overlap: int = 200
+) -> RecursiveCharacterTextSplitter:
+    """Text splitter shared by the batch and streaming ingestion paths.
+
+    Chunks record their start_index in the page, which lets retrieval merge
+    overlapping neighbours back together.
+    """
+    return RecursiveCharacterTextSplitter(
         chunk_size=chunk_size,
         chunk_overlap=chunk_overlap,
         separators=["\n\n", "\n", " ", ""],
+        add_start_index=True,
     )
 
-    chunks = splitter.split_documents(documents)
-    return chunks
+
+def iter_page_chunks(
+    pdf_path: str, chunk_size: int = 1000, chunk_overlap: int = 200
+) -> Iterator[list]:
+    """
+    Stream a PDF page by page and yield the chunks of each page.
+
+    Only one page is held in memory at a time, unlike extract_pdf_text.
+    Chunking is per page in both paths, so the chunks are identical.
+
+    Args:
+        pdf_path: Path to the PDF file
+        chunk_size: Size of each chunk in characters
+        chunk_overlap: Overlap between chunks
+
+    Yields:
+        List of chunked documents for one page
+    """
+    if not os.path.exists(pdf_path):
+        raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+
+    splitter = make_splitter(chunk_size, chunk_overlap)
+    pages = 0
+
+    for page in PyPDFLoader(pdf_path).lazy_load():
+        pages += 1
+        yield splitter.split_documents([page])
+
+    if not pages:
+        raise ValueError(f"No text extracted from PDF: {pdf_path}")
+
+
+def quantization_config(mode: str = VECTOR_QUANTIZATION):
+    """
+    Qdrant quantization settings for a quantization mode.
+
+    Quantized vectors are kept in RAM for the HNSW search, so only they need
+    to fit in memory when the original vectors are stored on disk.
+
+    Args:
+        mode: "none", "scalar" (int8) or "binary" (1 bit per dimension)
+
+    Returns:
+        Quantization config, or None for "none"
+    """
+    if mode == "none":
+        return None
+    if mode == "scalar":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8, quantile=0.99, always_ram=True
+            )
+        )
+    if mode == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    raise ValueError(f"Unknown vector quantization: {mode}")
+
+
+def create_collection(
+    client: QdrantClient,
+    collection_name: str,
+    dimension: int,
+    quantization: str = VECTOR_QUANTIZATION,
+    sparse: bool = HYBRID_SEARCH,
+) -> None:
+    """
+    Create a collection with the configured storage and index settings.
+
+    Args:
+        client: Qdrant client
+        collection_name: Name of the collection
+        dimension: Dense vector size
+        quantization: "none", "scalar" or "binary"
+        sparse: Also store BM25 sparse vectors
+    """
+    # BM25 term weights are stored per chunk, Qdrant applies IDF at query time
+    sparse_config = (
+        {
+            SPARSE_VECTOR_NAME: SparseVectorParams(
+                index=SparseIndexParams(on_disk=VECTORS_ON_DISK),
+                modifier=Modifier.IDF,
+            )
+        }
+        if sparse
+        else None
+    )
+
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=VectorParams(
+            size=dimension, distance=Distance.COSINE, on_disk=VECTORS_ON_DISK
+        ),
+        sparse_vectors_config=sparse_config,
+        hnsw_config=HnswConfigDiff(m=HNSW_M, ef_construct=HNSW_EF_CONSTRUCT),
+        quantization_config=quantization_config(quantization),
+        on_disk_payload=PAYLOAD_ON_DISK,
+    )
 
 
 def initialize_qdrant_collection(
@@ -62,83 +200,218 @@ def initialize_qdrant_collection(
     """
     Initialize Qdrant client and create/check collection.
 
+    Storage settings (quantization, on-disk vectors and payload, HNSW
+    parameters) only apply when the collection is created; re-create the
+    collection to change them.
+
     Args:
         collection_name: Name of the collection
 
     Returns:
         QdrantClient instance
     """
-    client = QdrantClient(url=QDRANT_URL)
+    client = get_qdrant_client()
 
     # Check if collection exists
     try:
-        client.get_collection(collection_name)
+        info = client.get_collection(collection_name)
         print(f"Collection '{collection_name}' already exists.")
+        if HYBRID_SEARCH and SPARSE_VECTOR_NAME not in (
+            info.config.params.sparse_vectors or {}
+        ):
+            print(
+                f"Collection '{collection_name}' has no sparse vectors, "
+                "retrieval will use dense search only."
+            )
     except Exception:
         # Collection doesn't exist, create it
-        embeddings = get_embeddings()
+        embeddings = get_query_embeddings()
         embedding_dim = len(embeddings.embed_query("test"))
 
-        client.create_collection(
-            collection_name=collection_name,
-            vectors_config=VectorParams(
-                size=embedding_dim, distance=Distance.COSINE
-            ),
+        create_collection(
+            client,
+            collection_name,
+            embedding_dim,
+            quantization=VECTOR_QUANTIZATION,
+            sparse=HYBRID_SEARCH,
         )
         print(
-            f"Created collection '{collection_name}' with dimension {embedding_dim}."
+            f"Created collection '{collection_name}' with dimension {embedding_dim} "
+            f"(quantization: {VECTOR_QUANTIZATION})."
         )
 
     return client
 
 
+def upsert_chunks(
+    client: QdrantClient,
+    collection_name: str,
+    chunks: list,
+    vectors: list,
+    batch_size: int = INGESTION_UPSERT_BATCH_SIZE,
+    ids: list = None,
+    sparse: bool = False,
+) -> int:
+    """
+    Upsert embedded chunks into Qdrant in fixed-size batches.
+
+    Payloads use the same page_content/metadata layout as QdrantVectorStore,
+    so points written here are readable by the retriever.
+
+    Args:
+        client: Qdrant client
+        collection_name: Name of the Qdrant collection
+        chunks: Chunked Document objects
+        vectors: Embedding for each chunk
+        batch_size: Points per upsert request
+        ids: Point ID for each chunk, random UUIDs if omitted
+        sparse: Also store BM25 sparse vectors for hybrid search
+
+    Returns:
+        Number of points written
+    """
+    if ids is None:
+        ids = [str(uuid.uuid4()) for _ in chunks]
+
+    points = []
+    for point_id, chunk, vector in zip(ids, chunks, vectors):
+        if sparse:
+            # "" is the collection's unnamed dense vector
+            vector = {
+                "": list(vector),
+                SPARSE_VECTOR_NAME: document_vector(chunk.page_content),
+            }
+        else:
+            vector = list(vector)
+
+        points.append(
+            PointStruct(
+                id=point_id,
+                vector=vector,
+                payload={"page_content": chunk.page_content, "metadata": chunk.metadata},
+            )
+        )
+
+    for start in range(0, len(points), batch_size):
+        client.upsert(
+            collection_name=collection_name,
+            points=points[start:start + batch_size],
+        )
+
+    return len(points)
+
+
+def delete_points(client: QdrantClient, collection_name: str, ids: list) -> int:
+    """
+    Delete points by ID.
+
+    Args:
+        client: Qdrant client
+        collection_name: Name of the Qdrant collection
+        ids: Point IDs to delete
+
+    Returns:
+        Number of IDs requested for deletion
+    """
+    if ids:
+        client.delete(
+            collection_name=collection_name,
+            points_selector=PointIdsList(points=list(ids)),
+        )
+    return len(ids)
+
+
+def remove_deleted_sources(
+    directory_path: str, collection_name: str, manifest
+) -> int:
+    """
+    Drop points of files that were ingested from a directory and no longer exist.
+
+    Args:
+        directory_path: Directory that was ingested
+        collection_name: Name of the Qdrant collection
+        manifest: IngestionManifest to update
+
+    Returns:
+        Number of points deleted
+    """
+    directory = source_key(directory_path)
+    removed = 0
+
+    for source in manifest.sources(collection_name):
+        if str(Path(source).parent) == directory and not os.path.exists(source):
+            print(f"Removing deleted file from collection: {source}")
+            removed += delete_points(
+                get_qdrant_client(),
+                collection_name,
+                manifest.remove(collection_name, source),
+            )
+
+    return removed
+
+
 def ingest_pdf_to_qdrant(
     pdf_path: str,
     collection_name: str = "documents",
     chunk_size: int = 1000,
     chunk_overlap: int = 200,
-) -> None:
+    progress=None,
+    cancel_event=None,
+) -> dict:
     """
     Complete pipeline: Extract PDF text, chunk it, embed, and store in Qdrant.
 
+    Ingestion is incremental: an unchanged file is skipped, and for a changed
+    file only new chunks are embedded while removed chunks are deleted.
+
     Args:
         pdf_path: Path to the PDF file
         collection_name: Name of the Qdrant collection
         chunk_size: Size of text chunks
         chunk_overlap: Overlap between chunks
+        progress: Called after each page with pages, chunks and points so far
+        cancel_event: threading.Event that stops the run when set
+
+    Returns:
+        Ingestion statistics (pages, chunks, points added and removed)
     """
-    print(f"Starting ingestion for: {pdf_path}")
+    from rag.pipeline import IngestionCancelled, run_ingestion_pipeline
 
-    # Extract text from PDF
-    print("Extracting text from PDF...")
-    documents = extract_pdf_text(pdf_path)
-    print(f"Extracted {len(documents)} pages from PDF.")
+    if not os.path.exists(pdf_path):
+        raise FileNotFoundError(f"PDF file not found: {pdf_path}")
 
-    # Chunk documents
-    print("Chunking documents...")
-    chunks = chunk_documents(documents, chunk_size, chunk_overlap)
-    print(f"Created {len(chunks)} chunks from documents.")
+    print(f"Starting ingestion for: {pdf_path}")
 
     # Initialize Qdrant
     print("Initializing Qdrant collection...")
     initialize_qdrant_collection(collection_name)
 
-    # Get embeddings and store in Qdrant
-    print("Creating embeddings and storing in Qdrant...")
-    embeddings = get_embeddings()
+    try:
+        stats = run_ingestion_pipeline(
+            [pdf_path],
+            collection_name,
+            chunk_size,
+            chunk_overlap,
+            workers=0,
+            progress=progress,
+            cancel_event=cancel_event,
+        )
+    except IngestionCancelled:
+        # Pages before the cancellation were stored
+        answer_cache.invalidate("document")
+        raise
+    if stats["failed"]:
+        raise ValueError(stats["errors"][pdf_path])
 
-    vector_store = QdrantVectorStore.from_documents(
-        chunks,
-        embedding=embeddings,
-        url=QDRANT_URL,
-        collection_name=collection_name,
-        prefer_grpc=False,
-    )
+    # Cached document answers may be outdated by the new content
+    if stats["points"] or stats["removed"]:
+        answer_cache.invalidate("document")
 
     print(
-        f"Successfully ingested {len(chunks)} chunks into Qdrant collection '{collection_name}'."
+        f"Successfully ingested {pdf_path} into Qdrant collection '{collection_name}' "
+        f"({stats['points']} chunks added, {stats['removed']} removed)."
     )
-    return vector_store
+    return stats
 
 
 def ingest_directory(
@@ -146,16 +419,28 @@ def ingest_directory(
     collection_name: str = "documents",
     chunk_size: int = 1000,
     chunk_overlap: int = 200,
-) -> None:
+    workers: int = INGESTION_WORKERS,
+) -> dict:
     """
     Ingest all PDF files from a directory.
 
+    Unchanged files are skipped and files deleted since the last run are
+    removed from the collection. New or changed PDFs are parsed and chunked
+    in parallel worker processes, embedded in batches that span files, and
+    upserted by a background uploader.
+
     Args:
         directory_path: Path to directory containing PDFs
         collection_name: Name of the Qdrant collection
         chunk_size: Size of text chunks
         chunk_overlap: Overlap between chunks
+        workers: Parsing processes, 0 parses in the calling process
+
+    Returns:
+        Ingestion statistics (files, pages, chunks, throughput)
     """
+    from rag.pipeline import run_ingestion_pipeline
+
     pdf_dir = Path(directory_path)
 
     if not pdf_dir.exists():
@@ -163,20 +448,33 @@ def ingest_directory(
 
     pdf_files = list(pdf_dir.glob("*.pdf"))
 
+    initialize_qdrant_collection(collection_name)
+
+    manifest = load_manifest()
+    deleted = remove_deleted_sources(directory_path, collection_name, manifest)
+
     if not pdf_files:
         print(f"No PDF files found in {directory_path}")
-        return
+        manifest.save()
+        if deleted:
+            answer_cache.invalidate("document")
+        return {}
 
     print(f"Found {len(pdf_files)} PDF files to ingest.")
 
-    for pdf_file in pdf_files:
-        try:
-            ingest_pdf_to_qdrant(
-                str(pdf_file), collection_name, chunk_size, chunk_overlap
-            )
-        except Exception as e:
-            print(f"Error processing {pdf_file.name}: {e}")
-            continue
+    stats = run_ingestion_pipeline(
+        [str(pdf_file) for pdf_file in pdf_files],
+        collection_name,
+        chunk_size,
+        chunk_overlap,
+        workers=workers,
+        manifest=manifest,
+    )
+    stats["removed"] += deleted
+
+    if stats["points"] or stats["removed"]:
+        answer_cache.invalidate("document")
+    return stats
 
 
 if __name__ == "__main__":
@@ -0,0 +1,303 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Iterator
+
+from pypdf import PdfReader
+
+from config import (
+    INGESTION_JOBS_DB,
+    INGESTION_JOB_MAX_ATTEMPTS,
+    INGESTION_JOB_RETRY_DELAY,
+    INGESTION_JOB_WORKERS,
+)
+from rag.ingestion import ingest_pdf_to_qdrant
+from rag.pipeline import IngestionCancelled
+
+# Job statuses. "queued" and "running" jobs are resumed after a restart.
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    collection_name TEXT NOT NULL,
+    chunk_size INTEGER NOT NULL,
+    chunk_overlap INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    total_pages INTEGER,
+    pages INTEGER NOT NULL DEFAULT 0,
+    chunks INTEGER NOT NULL DEFAULT 0,
+    points INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+_job_queue = None
+_lock = threading.Lock()
+
+
+class IngestionJobQueue:
+    """
+    Runs PDF ingestion in background threads, tracked in a SQLite table.
+
+    Jobs survive restarts: anything still queued or running when the process
+    stopped is picked up again on start. Each job reports page, chunk and
+    point progress, can be cancelled, and is retried with a growing delay
+    when it fails.
+    """
+
+    def __init__(
+        self,
+        db_path: str = INGESTION_JOBS_DB,
+        workers: int = INGESTION_JOB_WORKERS,
+        max_attempts: int = INGESTION_JOB_MAX_ATTEMPTS,
+        retry_delay: float = INGESTION_JOB_RETRY_DELAY,
+    ):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="ingestion-job"
+        )
+        self._cancel_events = {}
+        self._db_lock = threading.Lock()
+        self._stopping = False
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute(_SCHEMA)
+            rows = conn.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                (QUEUED, RUNNING),
+            ).fetchall()
+
+        for (job_id,) in rows:
+            self._update(job_id, status=QUEUED)
+            self._schedule(job_id)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _update(self, job_id: str, **fields) -> None:
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._db_lock, self._connect() as conn:
+            conn.execute(
+                f"UPDATE jobs SET {columns} WHERE id = ?",
+                (*fields.values(), job_id),
+            )
+
+    def _schedule(self, job_id: str) -> None:
+        self._cancel_events[job_id] = threading.Event()
+        self._executor.submit(self._run, job_id)
+
+    def submit(
+        self,
+        pdf_path: str,
+        collection_name: str = "documents",
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+    ) -> str:
+        """
+        Queue a PDF for ingestion.
+
+        Args:
+            pdf_path: Path to the PDF file
+            collection_name: Name of the Qdrant collection
+            chunk_size: Size of text chunks
+            chunk_overlap: Overlap between chunks
+
+        Returns:
+            Job ID
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+
+        with self._db_lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, path, collection_name, chunk_size, "
+                "chunk_overlap, status, max_attempts, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job_id,
+                    pdf_path,
+                    collection_name,
+                    chunk_size,
+                    chunk_overlap,
+                    QUEUED,
+                    self.max_attempts,
+                    now,
+                    now,
+                ),
+            )
+
+        self._schedule(job_id)
+        return job_id
+
+    def get(self, job_id: str) -> dict:
+        """Job row as a dict, or None if the ID is unknown."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def list_jobs(self, limit: int = 20) -> list:
+        """Most recent jobs first."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a queued or running job.
+
+        A running job stops after its current page.
+
+        Args:
+            job_id: Job to cancel
+
+        Returns:
+            True if the job was still active
+        """
+        job = self.get(job_id)
+        if job is None or job["status"] not in (QUEUED, RUNNING):
+            return False
+
+        event = self._cancel_events.get(job_id)
+        if event is not None:
+            event.set()
+        if job["status"] == QUEUED:
+            self._update(job_id, status=CANCELLED)
+        return True
+
+    def retry(self, job_id: str) -> bool:
+        """
+        Run a failed or cancelled job again with a fresh attempt budget.
+
+        Args:
+            job_id: Job to retry
+
+        Returns:
+            True if the job was requeued
+        """
+        job = self.get(job_id)
+        if job is None or job["status"] not in (FAILED, CANCELLED):
+            return False
+
+        self._update(job_id, status=QUEUED, attempts=0, error=None)
+        self._schedule(job_id)
+        return True
+
+    def _run(self, job_id: str) -> None:
+        cancel_event = self._cancel_events[job_id]
+        job = self.get(job_id)
+
+        try:
+            total_pages = len(PdfReader(job["path"]).pages)
+        except Exception:
+            total_pages = None
+
+        while job["status"] == QUEUED and not cancel_event.is_set():
+            attempts = job["attempts"] + 1
+            self._update(
+                job_id,
+                status=RUNNING,
+                attempts=attempts,
+                total_pages=total_pages,
+                pages=0,
+                chunks=0,
+                points=0,
+            )
+
+            try:
+                stats = ingest_pdf_to_qdrant(
+                    job["path"],
+                    collection_name=job["collection_name"],
+                    chunk_size=job["chunk_size"],
+                    chunk_overlap=job["chunk_overlap"],
+                    progress=lambda counts: self._update(job_id, **counts),
+                    cancel_event=cancel_event,
+                )
+            except IngestionCancelled:
+                self._update(job_id, status=self._interrupted_status())
+                break
+            except Exception as e:
+                print(f"Ingestion job {job_id} failed (attempt {attempts}): {e}")
+                if attempts >= job["max_attempts"]:
+                    self._update(job_id, status=FAILED, error=str(e))
+                    break
+                self._update(job_id, status=QUEUED, error=str(e))
+                # Wake early if the job is cancelled while waiting
+                if cancel_event.wait(self.retry_delay * attempts):
+                    self._update(job_id, status=self._interrupted_status())
+                    break
+            else:
+                self._update(
+                    job_id,
+                    status=DONE,
+                    error=None,
+                    pages=stats["pages"],
+                    chunks=stats["chunks"],
+                    points=stats["points"],
+                )
+                break
+
+            job = self.get(job_id)
+
+        if self._cancel_events.get(job_id) is cancel_event:
+            del self._cancel_events[job_id]
+
+    def _interrupted_status(self) -> str:
+        # Jobs stopped by shutdown() resume on the next start
+        return QUEUED if self._stopping else CANCELLED
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Interrupt running jobs and stop the worker threads.
+
+        Interrupted and still queued jobs stay queued and are resumed the
+        next time a queue is opened on the same database.
+        """
+        self._stopping = True
+        for event in list(self._cancel_events.values()):
+            event.set()
+        self._executor.shutdown(wait=wait)
+
+
+def get_job_queue() -> IngestionJobQueue:
+    """
+    Get the process-wide ingestion job queue, creating it on first use.
+
+    Returns:
+        IngestionJobQueue instance
+    """
+    global _job_queue
+
+    if _job_queue is None:
+        with _lock:
+            if _job_queue is None:
+                _job_queue = IngestionJobQueue()
+    return _job_queue
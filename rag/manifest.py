@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from config import INGESTION_MANIFEST_PATH
+
+# Namespace for deterministic point IDs, so the same chunk of the same file
+# always maps to the same Qdrant point and re-ingestion overwrites in place.
+POINT_NAMESPACE = uuid.UUID("6f1c3a52-3d0e-4c8e-9a57-0b6f2f1d9e41")
+
+# Serialises manifest saves in this process; the file lock covers others
+_lock = threading.Lock()
+
+
+@contextmanager
+def _file_lock(path: str):
+    """Hold an exclusive lock on a sidecar file while the manifest is rewritten."""
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def file_hash(path: str) -> str:
+    """
+    Hash a file's bytes.
+
+    Args:
+        path: File to hash
+
+    Returns:
+        SHA-256 hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_hash(text: str) -> str:
+    """Hash a chunk's text content."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def source_key(path: str) -> str:
+    """Stable manifest key for a file path."""
+    return str(Path(path).resolve())
+
+
+def point_id(source: str, content_hash: str) -> str:
+    """
+    Deterministic point ID for a chunk of a source file.
+
+    Args:
+        source: Manifest key of the file
+        content_hash: Hash of the chunk text
+
+    Returns:
+        UUID string accepted by Qdrant
+    """
+    return str(uuid.uuid5(POINT_NAMESPACE, f"{source}:{content_hash}"))
+
+
+def assign_point_ids(source: str, chunks: list) -> tuple:
+    """
+    Give each chunk a deterministic ID, dropping repeated chunks.
+
+    Args:
+        source: Manifest key of the file
+        chunks: Chunked Document objects
+
+    Returns:
+        Tuple of (unique chunks, their point IDs)
+    """
+    unique = {}
+    for chunk in chunks:
+        unique.setdefault(point_id(source, chunk_hash(chunk.page_content)), chunk)
+    return list(unique.values()), list(unique.keys())
+
+
+class IngestionManifest:
+    """
+    Record of ingested files per collection.
+
+    Each source stores the hash of the file it was built from and the IDs of
+    its points, which is enough to skip unchanged files, upsert only new
+    chunks and delete chunks that disappeared.
+
+    Changes are kept per source until save(), which re-reads the file and
+    applies only the sources this instance changed, so concurrent runs on
+    the same file do not drop each other's entries.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self._data = self._read()
+        # (collection, source) -> new entry, or None when removed
+        self._pending = {}
+
+    def _read(self) -> dict:
+        if self.path and os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return {}
+
+    def get(self, collection_name: str, source: str) -> dict:
+        """Entry for a source, or None if it was never ingested."""
+        return self._data.get(collection_name, {}).get(source)
+
+    def is_current(self, collection_name: str, source: str, digest: str) -> bool:
+        """Whether the source was ingested from a file with this hash."""
+        entry = self.get(collection_name, source)
+        return entry is not None and entry["file_hash"] == digest
+
+    def point_ids(self, collection_name: str, source: str) -> set:
+        """Point IDs currently stored for a source."""
+        entry = self.get(collection_name, source)
+        return set(entry["points"]) if entry else set()
+
+    def update(
+        self, collection_name: str, source: str, digest: str, ids: list
+    ) -> None:
+        """Record a source's file hash and point IDs."""
+        entry = {"file_hash": digest, "points": list(ids)}
+        self._data.setdefault(collection_name, {})[source] = entry
+        self._pending[(collection_name, source)] = entry
+
+    def remove(self, collection_name: str, source: str) -> list:
+        """Forget a source and return the point IDs it owned."""
+        entry = self._data.get(collection_name, {}).pop(source, None)
+        self._pending[(collection_name, source)] = None
+        return entry["points"] if entry else []
+
+    def sources(self, collection_name: str) -> list:
+        """All sources recorded for a collection."""
+        return list(self._data.get(collection_name, {}))
+
+    def save(self) -> None:
+        """Merge this instance's changes into the file and write it atomically."""
+        if not self.path:
+            self._pending = {}
+            return
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with _lock, _file_lock(self.path):
+            # Re-read under the lock so entries saved by other runs survive
+            data = self._read()
+            for (collection_name, source), entry in self._pending.items():
+                if entry is None:
+                    data.get(collection_name, {}).pop(source, None)
+                else:
+                    data.setdefault(collection_name, {})[source] = entry
+
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+
+        self._data = data
+        self._pending = {}
+
+
+def load_manifest(path: str = None) -> IngestionManifest:
+    """
+    Load the ingestion manifest.
+
+    Args:
+        path: Manifest file, defaults to INGESTION_MANIFEST_PATH
+
+    Returns:
+        IngestionManifest instance
+    """
+    return IngestionManifest(path or INGESTION_MANIFEST_PATH)
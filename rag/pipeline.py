@@ -0,0 +1,452 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator
+
+from config import (
+    HYBRID_SEARCH,
+    INGESTION_EMBED_BATCH_SIZE,
+    INGESTION_QUEUE_SIZE,
+    INGESTION_TRACE_MEMORY,
+    INGESTION_UPSERT_BATCH_SIZE,
+)
+from rag.ingestion import delete_points, iter_page_chunks, upsert_chunks
+from rag.manifest import assign_point_ids, file_hash, load_manifest, source_key
+from rag.retriever import collection_has_sparse
+from services.embedding_service import get_embeddings
+from services.qdrant_service import get_qdrant_client
+
+# Results queue of the current worker process, set by _init_worker
+_results = None
+
+
+def _rss_mb() -> float:
+    """
+    Current resident memory of this process in MB, from /proc/self/statm.
+
+    Returns:
+        Resident set size, or None where /proc is not available
+    """
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+class IngestionCancelled(Exception):
+    """Raised when an ingestion run is stopped through its cancel event."""
+
+
+def stream_file(pdf_path: str, chunk_size: int, chunk_overlap: int) -> Iterator[tuple]:
+    """
+    Stream one PDF as pipeline events.
+
+    Args:
+        pdf_path: Path to the PDF file
+        chunk_size: Size of text chunks
+        chunk_overlap: Overlap between chunks
+
+    Yields:
+        ("chunks", pdf_path, chunks) per page, then ("done", pdf_path, pages),
+        or ("error", pdf_path, message) if the file cannot be parsed
+    """
+    pages = 0
+    try:
+        for chunks in iter_page_chunks(pdf_path, chunk_size, chunk_overlap):
+            pages += 1
+            yield "chunks", pdf_path, chunks
+    except Exception as e:
+        yield "error", pdf_path, str(e)
+        return
+    yield "done", pdf_path, pages
+
+
+def _init_worker(results) -> None:
+    global _results
+    _results = results
+
+
+def _parse_in_worker(
+    pdf_path: str, chunk_size: int, chunk_overlap: int, trace_memory: bool = False
+) -> None:
+    """
+    Worker entry point: push a file's events onto the shared queue.
+
+    With trace_memory the worker samples its resident memory after each page
+    and sends the peak as a ("memory", pdf_path, mb) event before the file's
+    final event.
+    """
+    peak = 0.0
+    for kind, path, payload in stream_file(pdf_path, chunk_size, chunk_overlap):
+        if trace_memory:
+            peak = max(peak, _rss_mb() or 0.0)
+            if kind != "chunks":
+                _results.put(("memory", path, round(peak, 1)))
+        _results.put((kind, path, payload))
+
+
+def _worker_events(
+    pdf_paths: list,
+    chunk_size: int,
+    chunk_overlap: int,
+    workers: int,
+    queue_size: int,
+    trace_memory: bool = False,
+) -> Iterator[tuple]:
+    """
+    Events from a process pool, in arrival order.
+
+    Workers block on the bounded results queue when the caller falls behind,
+    so pages are only parsed as fast as they can be embedded.
+    """
+    results = multiprocessing.Queue(maxsize=queue_size)
+    remaining = set(pdf_paths)
+    pool = ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(results,)
+    )
+    futures = [
+        pool.submit(_parse_in_worker, path, chunk_size, chunk_overlap, trace_memory)
+        for path in pdf_paths
+    ]
+
+    try:
+        while remaining:
+            try:
+                event = results.get(timeout=0.5)
+            except queue.Empty:
+                # A crashed worker never sends its "done" event
+                for future in futures:
+                    if future.done() and future.exception() is not None:
+                        raise future.exception()
+                continue
+            if event[0] not in ("chunks", "memory"):
+                remaining.discard(event[1])
+            yield event
+    finally:
+        # If the caller stopped early, workers may be blocked on a full queue
+        for future in futures:
+            future.cancel()
+        while not all(future.done() for future in futures):
+            try:
+                results.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        pool.shutdown()
+
+
+class Uploader(threading.Thread):
+    """
+    Background thread that upserts embedded batches into Qdrant.
+
+    The queue is bounded, so a slow Qdrant applies back-pressure to the
+    embedding stage instead of buffering every vector in memory.
+    """
+
+    def __init__(
+        self,
+        client,
+        collection_name: str,
+        batch_size: int,
+        queue_size: int,
+        sparse: bool = False,
+    ):
+        super().__init__(name="qdrant-uploader", daemon=True)
+        self.client = client
+        self.collection_name = collection_name
+        self.batch_size = batch_size
+        self.sparse = sparse
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.error = None
+        self.points = 0
+
+    def submit(self, chunks: list, vectors: list, ids: list) -> None:
+        """Queue a batch, re-raising any upload failure."""
+        while True:
+            if self.error is not None:
+                raise self.error
+            try:
+                self.queue.put((chunks, vectors, ids), timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def run(self) -> None:
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            # Keep draining after a failure so submit() never blocks forever
+            if self.error is not None:
+                continue
+            chunks, vectors, ids = item
+            try:
+                self.points += upsert_chunks(
+                    self.client,
+                    self.collection_name,
+                    chunks,
+                    vectors,
+                    self.batch_size,
+                    ids,
+                    self.sparse,
+                )
+            except Exception as e:
+                self.error = e
+
+    def close(self) -> None:
+        """Flush remaining batches and wait for the thread to finish."""
+        self.queue.put(None)
+        self.join()
+        if self.error is not None:
+            raise self.error
+
+
+def run_ingestion_pipeline(
+    pdf_paths: list,
+    collection_name: str = "documents",
+    chunk_size: int = 1000,
+    chunk_overlap: int = 200,
+    workers: int = 1,
+    embed_batch_size: int = INGESTION_EMBED_BATCH_SIZE,
+    upsert_batch_size: int = INGESTION_UPSERT_BATCH_SIZE,
+    queue_size: int = INGESTION_QUEUE_SIZE,
+    manifest=None,
+    progress: Callable[[dict], None] = None,
+    cancel_event: threading.Event = None,
+) -> dict:
+    """
+    Parse, embed and upsert many PDFs as overlapping, streaming stages.
+
+    PDFs are read page by page (in worker processes when workers > 0), the
+    calling thread embeds chunks in batches that span pages and files, and a
+    background thread upserts the vectors. Stages are connected by bounded
+    queues, so memory stays flat regardless of document size. A file that
+    fails to parse is reported and skipped.
+
+    Files whose hash matches the manifest are not parsed at all. For changed
+    files only chunks without a stored point are embedded, and points of
+    chunks that disappeared are deleted. The manifest is saved once every
+    upsert has succeeded.
+
+    Setting cancel_event stops the run after the current page. Chunks that
+    were already parsed are still uploaded and recorded, so a later run
+    resumes without duplicates, and IngestionCancelled is raised.
+
+    Args:
+        pdf_paths: PDF files to ingest
+        collection_name: Name of the Qdrant collection (must exist)
+        chunk_size: Size of text chunks
+        chunk_overlap: Overlap between chunks
+        workers: Parsing processes, 0 parses in the calling process
+        embed_batch_size: Chunks per embedding call
+        upsert_batch_size: Points per upsert request
+        queue_size: Batches buffered between stages
+        manifest: IngestionManifest to consult and update, loaded if omitted
+        progress: Called after each page with pages, chunks and points so far
+        cancel_event: Event that requests cancellation when set
+
+    Returns:
+        Ingestion statistics (files, pages, chunks, throughput and, when
+        enabled, the peak resident memory of this process and of the largest
+        parsing worker during this run, sampled after every page and batch)
+    """
+    start = time.perf_counter()
+    if manifest is None:
+        manifest = load_manifest()
+
+    trace_memory = INGESTION_TRACE_MEMORY and _rss_mb() is not None
+    memory = {"peak": 0.0, "workers": 0.0}
+
+    def sample_memory():
+        if trace_memory:
+            memory["peak"] = max(memory["peak"], _rss_mb() or 0.0)
+
+    sample_memory()
+
+    client = get_qdrant_client()
+    embeddings = get_embeddings()
+    uploader = Uploader(
+        client,
+        collection_name,
+        upsert_batch_size,
+        queue_size,
+        sparse=HYBRID_SEARCH and collection_has_sparse(collection_name, client),
+    )
+    uploader.start()
+
+    stats = {
+        "files": 0,
+        "skipped": 0,
+        "failed": 0,
+        "pages": 0,
+        "chunks": 0,
+        "removed": 0,
+        "errors": {},
+    }
+    read = {"pages": 0, "chunks": 0}
+    hashes = {}
+    # Per-file progress: point IDs stored before this run and IDs seen so far
+    files = {}
+    pending = []
+
+    def file_state(pdf_path):
+        if pdf_path not in files:
+            files[pdf_path] = {
+                "stored": manifest.point_ids(collection_name, source_key(pdf_path)),
+                "seen": {},
+            }
+        return files[pdf_path]
+
+    def flush(count):
+        batch = pending[:count]
+        del pending[:count]
+        chunks = [chunk for chunk, _ in batch]
+        vectors = embeddings.embed_documents([c.page_content for c in chunks])
+        sample_memory()
+        uploader.submit(chunks, vectors, [point_id for _, point_id in batch])
+
+    def failed(pdf_path, error):
+        print(f"Error processing {pdf_path}: {error}")
+        stats["failed"] += 1
+        stats["errors"][pdf_path] = str(error)
+
+    def on_chunks(pdf_path, chunks):
+        sample_memory()
+        read["pages"] += 1
+        read["chunks"] += len(chunks)
+        state = file_state(pdf_path)
+        chunks, ids = assign_point_ids(source_key(pdf_path), chunks)
+        for chunk, point_id in zip(chunks, ids):
+            if point_id in state["seen"]:
+                continue
+            state["seen"][point_id] = None
+            if point_id not in state["stored"]:
+                pending.append((chunk, point_id))
+
+        while len(pending) >= embed_batch_size:
+            flush(embed_batch_size)
+
+    def on_done(pdf_path, pages):
+        state = file_state(pdf_path)
+        del files[pdf_path]
+        ids = list(state["seen"])
+        stale = state["stored"] - set(ids)
+        new = len(set(ids) - state["stored"])
+
+        print(
+            f"Parsed {pdf_path}: {pages} pages, {len(ids)} chunks "
+            f"({new} new, {len(stale)} removed)."
+        )
+        stats["files"] += 1
+        stats["pages"] += pages
+        stats["chunks"] += len(ids)
+        stats["removed"] += delete_points(client, collection_name, stale)
+        manifest.update(collection_name, source_key(pdf_path), hashes[pdf_path], ids)
+
+    def record_partial(pdf_path):
+        state = files.pop(pdf_path, None)
+        if state and state["seen"]:
+            # Remember chunks already queued so a retry can clean them up
+            manifest.update(
+                collection_name,
+                source_key(pdf_path),
+                None,
+                sorted(state["stored"] | set(state["seen"])),
+            )
+
+    def on_error(pdf_path, message):
+        failed(pdf_path, message)
+        record_partial(pdf_path)
+
+    for path in pdf_paths:
+        try:
+            digest = file_hash(path)
+        except OSError as e:
+            failed(path, e)
+            continue
+        if manifest.is_current(collection_name, source_key(path), digest):
+            stats["skipped"] += 1
+            continue
+        hashes[path] = digest
+
+    def on_memory(pdf_path, mb):
+        memory["workers"] = max(memory["workers"], mb)
+
+    handlers = {
+        "chunks": on_chunks,
+        "done": on_done,
+        "error": on_error,
+        "memory": on_memory,
+    }
+    events = None
+    cancelled = False
+
+    try:
+        if workers > 0 and hashes:
+            events = _worker_events(
+                list(hashes),
+                chunk_size,
+                chunk_overlap,
+                workers,
+                queue_size * workers,
+                trace_memory,
+            )
+        else:
+            events = (
+                event
+                for path in hashes
+                for event in stream_file(path, chunk_size, chunk_overlap)
+            )
+
+        for kind, pdf_path, payload in events:
+            if cancel_event is not None and cancel_event.is_set():
+                cancelled = True
+                break
+            handlers[kind](pdf_path, payload)
+            if progress is not None and kind == "chunks":
+                progress({**read, "points": uploader.points})
+
+        if cancelled:
+            for pdf_path in list(files):
+                record_partial(pdf_path)
+
+        if pending:
+            flush(len(pending))
+    finally:
+        if events is not None:
+            events.close()
+        uploader.close()
+        if trace_memory:
+            sample_memory()
+            stats["peak_memory_mb"] = round(memory["peak"], 1)
+            stats["peak_worker_memory_mb"] = memory["workers"]
+
+    manifest.save()
+
+    if cancelled:
+        raise IngestionCancelled(f"Ingestion cancelled after {read['pages']} pages")
+
+    elapsed = time.perf_counter() - start
+    stats["points"] = uploader.points
+    stats["seconds"] = round(elapsed, 2)
+    stats["pages_per_sec"] = round(stats["pages"] / elapsed, 1) if elapsed else 0.0
+    stats["chunks_per_sec"] = round(stats["chunks"] / elapsed, 1) if elapsed else 0.0
+
+    memory = (
+        f", peak memory {stats['peak_memory_mb']} MB"
+        f" (workers {stats['peak_worker_memory_mb']} MB)"
+        if trace_memory
+        else ""
+    )
+    print(
+        f"Ingested {stats['files']} files ({stats['skipped']} unchanged, "
+        f"{stats['failed']} failed), "
+        f"{stats['pages']} pages, {stats['chunks']} chunks in {stats['seconds']}s "
+        f"({stats['pages_per_sec']} pages/s, {stats['chunks_per_sec']} chunks/s"
+        f"{memory})."
+    )
+    return stats
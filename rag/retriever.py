@@ -1,33 +1,275 @@
+import asyncio
+import math
+import threading
+
+from langchain_core.documents import Document
 from langchain_qdrant import QdrantVectorStore
-from config import QDRANT_URL
-from services.embedding_service import get_embeddings
+from qdrant_client.http.exceptions import ResponseHandlingException
+from qdrant_client.models import QuantizationSearchParams, QueryRequest, SearchParams
+
+from config import (
+    HYBRID_CANDIDATES,
+    HYBRID_SEARCH,
+    RRF_K,
+    SEARCH_HNSW_EF,
+    SEARCH_OVERSAMPLING,
+    SEARCH_RESCORE,
+    VECTOR_BACKEND,
+    VECTOR_QUANTIZATION,
+)
+from rag.sparse import SPARSE_VECTOR_NAME, query_vector
+from services.embedding_service import get_embeddings, CachedQueryEmbeddings
+from services.qdrant_service import (
+    get_async_qdrant_client,
+    get_qdrant_client,
+    reset_qdrant_client,
+)
+
+# Vector store handles keyed by collection name. Each entry remembers the
+# client it was built on, so a reconnect transparently rebuilds the handle.
+_vector_stores = {}
+_lock = threading.Lock()
+
+# Whether each collection has a sparse vector, keyed by collection name and
+# remembered together with the client that answered
+_sparse_collections = {}
 
 
 def get_vector_store(collection_name: str = "documents") -> QdrantVectorStore:
     """
     Get QdrantVectorStore instance connected to the collection.
-    
+
+    The handle is built once per collection on the shared Qdrant client and
+    reused for later queries. Query vectors go through the embedding cache.
+
     Args:
         collection_name: Name of the Qdrant collection
-        
+
     Returns:
         QdrantVectorStore instance
     """
+    client = get_qdrant_client()
     embeddings = get_embeddings()
-    
-    vector_store = QdrantVectorStore.from_existing_collection(
-        embedding=embeddings,
-        url=QDRANT_URL,
+
+    cached = _vector_stores.get(collection_name)
+    if cached is not None and cached[0] is client and cached[1] is embeddings:
+        return cached[2]
+
+    with _lock:
+        vector_store = QdrantVectorStore(
+            client=client,
+            collection_name=collection_name,
+            embedding=CachedQueryEmbeddings(embeddings),
+        )
+        _vector_stores[collection_name] = (client, embeddings, vector_store)
+
+    return vector_store
+
+
+def reset_vector_stores() -> None:
+    """Forget cached vector store handles."""
+    with _lock:
+        _vector_stores.clear()
+        _sparse_collections.clear()
+
+
+def _known_sparse(collection_name: str, client=None) -> bool:
+    """Cached sparse flag for the collection, or None if not checked yet."""
+    cached = _sparse_collections.get(collection_name)
+    if cached is not None and (client is None or cached[0] is client):
+        return cached[1]
+    return None
+
+
+def collection_has_sparse(collection_name: str = "documents", client=None) -> bool:
+    """
+    Check whether a collection stores BM25 sparse vectors.
+
+    Collections created before hybrid search only have dense vectors, and
+    retrieval falls back to dense search for them.
+
+    Args:
+        collection_name: Name of the Qdrant collection
+        client: Qdrant client, defaults to the shared client
+
+    Returns:
+        True if the collection has the sparse vector
+    """
+    client = client or get_qdrant_client()
+
+    known = _known_sparse(collection_name, client)
+    if known is not None:
+        return known
+
+    try:
+        info = client.get_collection(collection_name)
+    except Exception:
+        # Missing collection or no connection, ask again next time
+        return False
+
+    sparse_vectors = info.config.params.sparse_vectors or {}
+    has_sparse = SPARSE_VECTOR_NAME in sparse_vectors
+    _sparse_collections[collection_name] = (client, has_sparse)
+    return has_sparse
+
+
+def search_params(
+    hnsw_ef: int = None,
+    oversampling: float = None,
+    rescore: bool = None,
+    quantized: bool = None,
+) -> SearchParams:
+    """
+    Search-time parameters for dense queries.
+
+    On quantized collections the search runs on the compressed vectors,
+    fetches limit * oversampling candidates and, with rescore, reorders them
+    using the original vectors. That recovers most of the recall lost to
+    quantization at the cost of reading the originals (from disk when
+    VECTORS_ON_DISK is set). Arguments left as None come from config.
+
+    Args:
+        hnsw_ef: HNSW beam width, 0 for the Qdrant default
+        oversampling: Candidate multiplier for quantized search
+        rescore: Rescore candidates with the original vectors
+        quantized: Whether the collection uses quantization
+
+    Returns:
+        SearchParams, or None when all defaults apply
+    """
+    hnsw_ef = SEARCH_HNSW_EF if hnsw_ef is None else hnsw_ef
+    if quantized is None:
+        quantized = VECTOR_QUANTIZATION != "none"
+
+    quantization = None
+    if quantized:
+        quantization = QuantizationSearchParams(
+            rescore=SEARCH_RESCORE if rescore is None else rescore,
+            oversampling=SEARCH_OVERSAMPLING if oversampling is None else oversampling,
+        )
+
+    if not hnsw_ef and quantization is None:
+        return None
+    return SearchParams(hnsw_ef=hnsw_ef or None, quantization=quantization)
+
+
+def _hybrid_requests(vector: list, query: str, candidates: int) -> list:
+    """Dense and sparse searches sent to Qdrant as one batch."""
+    return [
+        QueryRequest(
+            query=vector, limit=candidates, params=search_params(), with_payload=True
+        ),
+        # Dense vectors of sparse hits give every result a dense relevance
+        QueryRequest(
+            query=query_vector(query),
+            using=SPARSE_VECTOR_NAME,
+            limit=candidates,
+            with_payload=True,
+            with_vector=[""],
+        ),
+    ]
+
+
+def _cosine(a: list, b: list) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def fuse_results(
+    responses: list,
+    k: int,
+    collection_name: str,
+    rrf_k: int = RRF_K,
+    vector: list = None,
+) -> list:
+    """
+    Merge dense and sparse result lists with reciprocal rank fusion.
+
+    Each point scores sum(1 / (rrf_k + rank)) over the lists it appears in.
+    The fused score is scaled so a point ranked first in every list gets 1.0,
+    which keeps it in the same 0-1 range as dense relevance scores. The dense
+    relevance is kept in metadata as "dense_score": taken from the dense
+    results, or computed from the returned vector for sparse-only hits.
+
+    Args:
+        responses: Query responses, dense first
+        k: Number of documents to return
+        collection_name: Name of the Qdrant collection
+        rrf_k: Rank offset that dampens the weight of top ranks
+        vector: Dense query vector, used to score sparse-only hits
+
+    Returns:
+        List of (document, score) tuples, best first
+    """
+    fused = {}
+    points = {}
+    dense_scores = {}
+
+    for list_index, response in enumerate(responses):
+        for rank, point in enumerate(response.points, start=1):
+            fused[point.id] = fused.get(point.id, 0.0) + 1.0 / (rrf_k + rank)
+            points.setdefault(point.id, point)
+            if list_index == 0:
+                dense_scores[point.id] = (point.score + 1.0) / 2.0
+            elif point.id not in dense_scores and vector and point.vector:
+                stored = point.vector
+                if isinstance(stored, dict):
+                    stored = stored.get("")
+                if stored:
+                    dense_scores[point.id] = (_cosine(vector, stored) + 1.0) / 2.0
+
+    best = len(responses) / (rrf_k + 1)
+    ranked = sorted(fused, key=fused.get, reverse=True)[:k]
+
+    results = []
+    for point_id in ranked:
+        document, _ = _to_document(points[point_id], collection_name)
+        if point_id in dense_scores:
+            document.metadata["dense_score"] = dense_scores[point_id]
+        results.append((document, fused[point_id] / best))
+    return results
+
+
+def _dense_search(query: str, k: int, collection_name: str) -> list:
+    if VECTOR_BACKEND == "local":
+        # QdrantVectorStore needs a real Qdrant client, query the backend directly
+        vector = CachedQueryEmbeddings(get_embeddings()).embed_query(query)
+        response = get_qdrant_client().query_points(
+            collection_name=collection_name,
+            query=vector,
+            limit=k,
+            search_params=search_params(),
+            with_payload=True,
+        )
+        results = [_to_document(point, collection_name) for point in response.points]
+    else:
+        vector_store = get_vector_store(collection_name)
+        results = vector_store.similarity_search_with_relevance_scores(
+            query, k=k, search_params=search_params()
+        )
+
+    for document, score in results:
+        document.metadata["dense_score"] = score
+    return results
+
+
+def _hybrid_search(query: str, k: int, collection_name: str) -> list:
+    vector = CachedQueryEmbeddings(get_embeddings()).embed_query(query)
+    responses = get_qdrant_client().query_batch_points(
         collection_name=collection_name,
-        prefer_grpc=False
+        requests=_hybrid_requests(vector, query, max(k, HYBRID_CANDIDATES)),
     )
-    
-    return vector_store
+    return fuse_results(responses, k, collection_name, vector=vector)
 
 
 def retrieve_with_scores(query: str, k: int = 3, collection_name: str = "documents") -> list:
     """
     Retrieve relevant documents with similarity scores.
+
+    Collections with BM25 sparse vectors are searched in hybrid mode: dense
+    and sparse results are fused with RRF, so exact terms such as part
+    numbers are found even when their embedding is not close to the query.
     
     Args:
         query: Search query
@@ -37,10 +279,158 @@ def retrieve_with_scores(query: str, k: int = 3, collection_name: str = "documen
     Returns:
         List of (document, score) tuples
     """
-    vector_store = get_vector_store(collection_name)
-    
-    # Perform similarity search with relevance scores
-    results = vector_store.similarity_search_with_relevance_scores(query, k=k)
-    
+    if HYBRID_SEARCH and collection_has_sparse(collection_name):
+        search = _hybrid_search
+    else:
+        search = _dense_search
+
+    try:
+        results = search(query, k, collection_name)
+    except (ResponseHandlingException, ConnectionError):
+        # Stale connection, reconnect once and retry
+        reset_qdrant_client()
+        reset_vector_stores()
+        results = search(query, k, collection_name)
+
+    return results
+
+
+def _batch_search(queries: list, vectors: list, k: int, collection_name: str) -> list:
+    hybrid = HYBRID_SEARCH and collection_has_sparse(collection_name)
+
+    requests = []
+    for query, vector in zip(queries, vectors):
+        if hybrid:
+            requests.extend(_hybrid_requests(vector, query, max(k, HYBRID_CANDIDATES)))
+        else:
+            requests.append(
+                QueryRequest(
+                    query=vector, limit=k, params=search_params(), with_payload=True
+                )
+            )
+
+    responses = get_qdrant_client().query_batch_points(
+        collection_name=collection_name, requests=requests
+    )
+
+    if hybrid:
+        return [
+            fuse_results(responses[2 * i:2 * i + 2], k, collection_name, vector=vector)
+            for i, vector in enumerate(vectors)
+        ]
+
+    results = []
+    for response in responses:
+        docs = [_to_document(point, collection_name) for point in response.points]
+        for document, score in docs:
+            document.metadata["dense_score"] = score
+        results.append(docs)
+    return results
+
+
+def retrieve_batch(
+    queries: list, k: int = 3, collection_name: str = "documents"
+) -> list:
+    """
+    Retrieve documents for many queries with one embedding and search call.
+
+    The queries are embedded as a single model batch and all their dense
+    (and sparse) searches go to Qdrant in one query_batch_points request.
+    Scores match retrieve_with_scores.
+
+    Args:
+        queries: Search queries
+        k: Number of documents to retrieve per query
+        collection_name: Name of the Qdrant collection
+
+    Returns:
+        One list of (document, score) tuples per query, in order
+    """
+    if not queries:
+        return []
+
+    vectors = CachedQueryEmbeddings(get_embeddings()).embed_queries(queries)
+
+    try:
+        return _batch_search(queries, vectors, k, collection_name)
+    except (ResponseHandlingException, ConnectionError):
+        # Stale connection, reconnect once and retry
+        reset_qdrant_client()
+        reset_vector_stores()
+        return _batch_search(queries, vectors, k, collection_name)
+
+
+async def aretrieve_with_scores(
+    query: str, k: int = 3, collection_name: str = "documents"
+) -> list:
+    """
+    Async variant of retrieve_with_scores using the async Qdrant client.
+
+    Scores are normalized the same way as the sync path: (cosine + 1) / 2
+    for dense search, scaled RRF for hybrid search.
+
+    Args:
+        query: Search query
+        k: Number of documents to retrieve
+        collection_name: Name of the Qdrant collection
+
+    Returns:
+        List of (document, score) tuples
+    """
+    embeddings = CachedQueryEmbeddings(get_embeddings())
+    vector = await embeddings.aembed_query(query)
+
+    client = get_async_qdrant_client()
+
+    if HYBRID_SEARCH:
+        has_sparse = _known_sparse(collection_name)
+        if has_sparse is None:
+            has_sparse = await asyncio.to_thread(collection_has_sparse, collection_name)
+
+        if has_sparse:
+            responses = await client.query_batch_points(
+                collection_name=collection_name,
+                requests=_hybrid_requests(vector, query, max(k, HYBRID_CANDIDATES)),
+            )
+            return fuse_results(responses, k, collection_name, vector=vector)
+
+    response = await client.query_points(
+        collection_name=collection_name,
+        query=vector,
+        limit=k,
+        search_params=search_params(),
+        with_payload=True,
+    )
+
+    results = [_to_document(point, collection_name) for point in response.points]
+    for document, score in results:
+        document.metadata["dense_score"] = score
     return results
 
+
+def relevance_score(document: Document, score: float) -> float:
+    """
+    Query relevance of a retrieved document on the dense 0-1 scale.
+
+    Hybrid and reranked results are ordered by scores on other scales, so
+    thresholds use the dense relevance recorded at retrieval when present.
+
+    Args:
+        document: Retrieved document
+        score: Score returned alongside it
+
+    Returns:
+        Relevance between 0 and 1
+    """
+    return document.metadata.get("dense_score", score)
+
+
+def _to_document(point, collection_name: str) -> tuple:
+    """Convert a scored Qdrant point into the (Document, score) shape."""
+    payload = point.payload or {}
+    metadata = payload.get("metadata") or {}
+    metadata["_id"] = point.id
+    metadata["_collection_name"] = collection_name
+
+    document = Document(page_content=payload.get("page_content", ""), metadata=metadata)
+    return document, (point.score + 1.0) / 2.0
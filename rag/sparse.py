@@ -0,0 +1,96 @@
+import re
+import unicodedata
+import zlib
+from collections import Counter
+
+from qdrant_client.models import SparseVector
+
+from config import SPARSE_AVG_DOC_LENGTH
+
+# Name of the sparse vector in the Qdrant collection
+SPARSE_VECTOR_NAME = "sparse"
+
+# BM25 term-frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Words, numbers and joined codes such as "ab-1234" or "v2.1"
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+_SEPARATORS = re.compile(r"[-_./]")
+
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how",
+    "in", "is", "it", "of", "on", "or", "that", "the", "this", "to", "was",
+    "what", "when", "where", "which", "who", "with",
+}
+
+
+def tokenize(text: str) -> list:
+    """
+    Split text into lowercase terms for sparse matching.
+
+    Joined codes are kept whole and also split into their parts, so a part
+    number matches exactly while its pieces still match partially.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of terms, repeated as often as they occur
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    terms = []
+    for token in _TOKEN_PATTERN.findall(text):
+        if token in _STOPWORDS:
+            continue
+        terms.append(token)
+        if _SEPARATORS.search(token):
+            terms.extend(part for part in _SEPARATORS.split(token) if part)
+    return terms
+
+
+def term_index(term: str) -> int:
+    """Stable sparse-vector index for a term."""
+    return zlib.crc32(term.encode("utf-8")) & 0x7FFFFFFF
+
+
+def _to_sparse(weights: Counter) -> SparseVector:
+    indices = sorted(weights)
+    return SparseVector(indices=indices, values=[float(weights[i]) for i in indices])
+
+
+def document_vector(text: str, avg_length: float = SPARSE_AVG_DOC_LENGTH) -> SparseVector:
+    """
+    BM25 term weights for a stored chunk.
+
+    Only the term-frequency half of BM25 is computed here. The collection's
+    sparse vector uses the IDF modifier, so Qdrant applies inverse document
+    frequency at query time from its own statistics.
+
+    Args:
+        text: Chunk text
+        avg_length: Expected chunk length in terms
+
+    Returns:
+        SparseVector for the chunk
+    """
+    terms = tokenize(text)
+    length_norm = 1 - BM25_B + BM25_B * len(terms) / avg_length
+
+    weights = Counter()
+    for term, tf in Counter(terms).items():
+        weights[term_index(term)] += tf * (BM25_K1 + 1) / (tf + BM25_K1 * length_norm)
+    return _to_sparse(weights)
+
+
+def query_vector(text: str) -> SparseVector:
+    """
+    Sparse query vector with unit weight per distinct term.
+
+    Args:
+        text: Search query
+
+    Returns:
+        SparseVector for the query
+    """
+    return _to_sparse(Counter(term_index(term) for term in set(tokenize(text))))
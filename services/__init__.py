@@ -1,3 +1,14 @@
-from services.weather_service import fetch_weather
-from services.embedding_service import get_embeddings
-from services.llm_service import get_llm_response
\ No newline at end of file
+from services.weather_service import fetch_weather, afetch_weather
+from services.embedding_service import (
+    get_embeddings,
+    get_query_embeddings,
+    warmup_embeddings,
+    set_embedding_model,
+)
+from services.llm_service import (
+    get_llm_response,
+    aget_llm_response,
+    stream_llm_response,
+    astream_llm_response,
+    warmup_llm,
+)
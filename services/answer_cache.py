@@ -0,0 +1,221 @@
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+from config import (
+    GAZETTEER_ENABLED,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_SIZE,
+    SEMANTIC_CACHE_TTL_WEATHER,
+    SEMANTIC_CACHE_TTL_DOCUMENT,
+)
+from services.embedding_service import get_query_embeddings
+from services.gazetteer import extract_city, tokenize
+
+# Marks a query whose city has not been looked up yet
+_UNRESOLVED = object()
+
+
+def _city_key(name: str, country: Optional[str]) -> tuple:
+    """Comparable form of a city: folded name tokens and country code."""
+    return tuple(tokenize(name)), (country or "").strip().upper() or None
+
+
+def _query_city(query: str) -> Optional[tuple]:
+    """City key of the place a query names, from the gazetteer."""
+    if not GAZETTEER_ENABLED:
+        return None
+    try:
+        match = extract_city(query)
+    except Exception as e:
+        print(f"Gazetteer unavailable for answer cache: {e}")
+        return None
+    return _city_key(match["name"], match["country"]) if match else None
+
+
+class SemanticAnswerCache:
+    """
+    In-memory cache of final answers looked up by query similarity.
+
+    Queries are embedded with the shared embedding model and compared by
+    cosine similarity against every live entry, which is cheap for the few
+    thousand entries this cache holds.
+    """
+
+    def __init__(
+        self,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        maxsize: int = SEMANTIC_CACHE_SIZE,
+        ttls: Optional[dict] = None,
+    ):
+        """
+        Args:
+            threshold: Minimum cosine similarity for a cache hit
+            maxsize: Maximum number of cached answers
+            ttls: Seconds to keep an answer, keyed by "weather"/"document"
+        """
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttls = ttls or {
+            "weather": SEMANTIC_CACHE_TTL_WEATHER,
+            "document": SEMANTIC_CACHE_TTL_DOCUMENT,
+        }
+        self.hits = 0
+        self.misses = 0
+        self._entries = []
+        self._vectors = None
+        self._lock = threading.Lock()
+
+    def lookup(self, query: str) -> Optional[dict]:
+        """
+        Find a cached answer for a semantically equivalent query.
+
+        Args:
+            query: Incoming user query
+
+        Returns:
+            The cached entry dict, or None on a miss
+        """
+        vector = self._embed(query)
+
+        with self._lock:
+            self._prune()
+
+            if not self._entries:
+                self.misses += 1
+                return None
+
+            similarities = self._vectors @ vector
+            query_city = _UNRESOLVED
+            for index in np.argsort(-similarities):
+                if similarities[index] < self.threshold:
+                    break
+
+                entry = self._entries[index]
+                if entry["city_key"] is not None and query_city is _UNRESOLVED:
+                    query_city = _query_city(query)
+                if self._matches(entry, query_city):
+                    self.hits += 1
+                    return dict(entry, similarity=float(similarities[index]))
+
+            self.misses += 1
+            return None
+
+    def store(
+        self,
+        query: str,
+        answer: str,
+        route: str,
+        weather_city: Optional[str] = None,
+    ) -> None:
+        """
+        Cache the answer produced for a query.
+
+        Args:
+            query: User query the answer belongs to
+            answer: Final answer text
+            route: Route taken by the graph, selects the TTL
+            weather_city: City the weather answer is about, if any
+        """
+        kind = self._kind(route)
+        city_key = None
+        if kind == "weather" and weather_city:
+            name, _, country = weather_city.partition(",")
+            city_key = _city_key(name, country)
+        entry = {
+            "query": query,
+            "answer": answer,
+            "route": route,
+            "kind": kind,
+            "weather_city": weather_city,
+            "city_key": city_key,
+            "expires_at": time.time() + self.ttls[kind],
+        }
+        vector = self._embed(query)
+
+        with self._lock:
+            self._entries.append(entry)
+            self._vectors = (
+                vector[np.newaxis, :]
+                if self._vectors is None
+                else np.vstack([self._vectors, vector])
+            )
+
+            overflow = len(self._entries) - self.maxsize
+            if overflow > 0:
+                self._keep(range(overflow, len(self._entries)))
+
+    def invalidate(self, kind: Optional[str] = None) -> int:
+        """
+        Drop cached answers.
+
+        Args:
+            kind: "weather" or "document", or every entry when omitted
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            before = len(self._entries)
+            self._keep(
+                i
+                for i, entry in enumerate(self._entries)
+                if kind is not None and entry["kind"] != kind
+            )
+            return before - len(self._entries)
+
+    def clear(self) -> None:
+        self.invalidate()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    @staticmethod
+    def _kind(route: Optional[str]) -> str:
+        return "weather" if (route or "").lower() == "weather" else "document"
+
+    @staticmethod
+    def _matches(entry: dict, query_city: Optional[tuple]) -> bool:
+        # "weather in Paris" and "weather in Rome" embed very closely, so a
+        # weather answer is only reused when the gazetteer finds the same
+        # city in the query ("Venice" or "nice weather" do not match Nice).
+        if entry["city_key"] is None:
+            return True
+        if query_city is None:
+            return False
+
+        name, country = entry["city_key"]
+        return query_city[0] == name and country in (None, query_city[1])
+
+    @staticmethod
+    def _embed(query: str) -> np.ndarray:
+        vector = np.asarray(get_query_embeddings().embed_query(query), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _prune(self) -> None:
+        now = time.time()
+        if any(entry["expires_at"] <= now for entry in self._entries):
+            self._keep(
+                i
+                for i, entry in enumerate(self._entries)
+                if entry["expires_at"] > now
+            )
+
+    def _keep(self, indices) -> None:
+        indices = list(indices)
+        self._entries = [self._entries[i] for i in indices]
+        self._vectors = self._vectors[indices] if indices else None
+
+
+answer_cache = SemanticAnswerCache()
@@ -0,0 +1,148 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe, size-bounded LRU cache whose entries expire after a TTL.
+
+    Keys must be hashable. When persisted, keys and values must also be
+    JSON serializable (tuples are stored as lists and restored as tuples).
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        """
+        Args:
+            maxsize: Maximum number of entries before the least recently
+                used one is evicted
+            ttl: Seconds an entry stays valid, or None to never expire
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing/expired."""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+
+            if entry is _MISSING or self._expired(entry[0]):
+                if entry is not _MISSING:
+                    del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store value under key, evicting the oldest entry when full.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl: Override the cache-wide TTL for this entry
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl is not None else None
+
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove every entry and reset the hit/miss counters."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Return size and hit/miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def save(self, path: str) -> None:
+        """
+        Write unexpired entries to a JSON file.
+
+        Args:
+            path: Destination file, written atomically via a temp file
+        """
+        with self._lock:
+            entries = [
+                [list(key) if isinstance(key, tuple) else key, expires_at, value]
+                for key, (expires_at, value) in self._data.items()
+                if not self._expired(expires_at)
+            ]
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> int:
+        """
+        Load entries previously written by save().
+
+        Args:
+            path: JSON file to read; a missing file is not an error
+
+        Returns:
+            Number of entries loaded
+        """
+        if not os.path.exists(path):
+            return 0
+
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f)
+
+        loaded = 0
+        with self._lock:
+            for key, expires_at, value in entries:
+                if self._expired(expires_at):
+                    continue
+                key = tuple(key) if isinstance(key, list) else key
+                self._data[key] = (expires_at, value)
+                loaded += 1
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+        return loaded
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @staticmethod
+    def _expired(expires_at: Optional[float]) -> bool:
+        return expires_at is not None and expires_at <= time.time()
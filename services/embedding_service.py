@@ -1,11 +1,217 @@
+import asyncio
+import atexit
+import threading
+import unicodedata
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
 from langchain_huggingface import HuggingFaceEmbeddings
 
-model_name = "sentence-transformers/all-MiniLM-L6-v2"
+from config import (
+    EMBEDDING_DEVICE,
+    EMBEDDING_MODEL,
+    EMBEDDING_CACHE_SIZE,
+    EMBEDDING_CACHE_TTL,
+    EMBEDDING_CACHE_PATH,
+)
+from services.cache import TTLCache
+
+model_name = EMBEDDING_MODEL
 
+# Loaded models keyed by (model_name, device). Module state survives
+# Streamlit reruns, so the weights are loaded once per process.
+_models = {}
+_lock = threading.Lock()
 
-def get_embeddings():
-    """Embedding service for vector embeddings."""
+
+def _load_model(name: str, device: Optional[str]) -> HuggingFaceEmbeddings:
+    """Construct a HuggingFaceEmbeddings instance for the given model."""
+    model_kwargs = {"device": device} if device else {}
 
     return HuggingFaceEmbeddings(
-        model_name=model_name,
+        model_name=name,
+        model_kwargs=model_kwargs,
     )
+
+
+def get_embeddings(name: Optional[str] = None, device: Optional[str] = None):
+    """Embedding service for vector embeddings.
+
+    Returns a shared, lazily loaded model instance. Repeated calls with the
+    same model name and device reuse the already loaded weights.
+
+    Args:
+        name: Model name, defaults to the active model
+        device: Torch device, defaults to EMBEDDING_DEVICE
+
+    Returns:
+        HuggingFaceEmbeddings instance
+    """
+    key = (name or model_name, device or EMBEDDING_DEVICE)
+
+    embeddings = _models.get(key)
+    if embeddings is not None:
+        return embeddings
+
+    with _lock:
+        # Another thread may have finished loading while we waited
+        embeddings = _models.get(key)
+        if embeddings is None:
+            embeddings = _load_model(*key)
+            _models[key] = embeddings
+
+    return embeddings
+
+
+def warmup_embeddings(name: Optional[str] = None, device: Optional[str] = None):
+    """Load the model and run one inference so the first query is fast."""
+    embeddings = get_embeddings(name, device)
+    embeddings.embed_query("warmup")
+
+    return embeddings
+
+
+def set_embedding_model(name: str, warmup: bool = False) -> None:
+    """
+    Switch the active embedding model without restarting the process.
+
+    Args:
+        name: Model name to use for subsequent get_embeddings() calls
+        warmup: Load the new model immediately instead of on first use
+    """
+    global model_name
+
+    with _lock:
+        model_name = name
+
+    if warmup:
+        warmup_embeddings(name)
+
+
+def get_embedding_model_name() -> str:
+    """Return the name of the active embedding model."""
+    return model_name
+
+
+def clear_embeddings(name: Optional[str] = None) -> None:
+    """
+    Drop loaded models so their memory can be reclaimed.
+
+    Args:
+        name: Only drop this model, or every model when omitted
+    """
+    with _lock:
+        for key in list(_models):
+            if name is None or key[0] == name:
+                del _models[key]
+
+
+# Query vectors keyed by (model_name, normalized query)
+query_cache = TTLCache(maxsize=EMBEDDING_CACHE_SIZE, ttl=EMBEDDING_CACHE_TTL)
+
+if EMBEDDING_CACHE_PATH:
+    try:
+        query_cache.load(EMBEDDING_CACHE_PATH)
+    except (OSError, ValueError) as e:
+        print(f"Could not load embedding cache from {EMBEDDING_CACHE_PATH}: {e}")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query for use as a cache key.
+
+    Unicode forms, case and whitespace are folded. all-MiniLM-L6-v2 uses an
+    uncased tokenizer, so this does not change the resulting vector.
+    """
+    return " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """Embeddings wrapper that memoizes embed_query() results."""
+
+    def __init__(self, embeddings: Embeddings, name: Optional[str] = None):
+        self.embeddings = embeddings
+        self.name = name or model_name
+
+    def embed_query(self, text: str) -> List[float]:
+        key = (self.name, normalize_query(text))
+
+        vector = query_cache.get(key)
+        if vector is None:
+            vector = self._embed_and_store(key, text)
+
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = (self.name, normalize_query(text))
+
+        vector = query_cache.get(key)
+        if vector is None:
+            # Model inference is CPU bound, keep it off the event loop
+            vector = await asyncio.to_thread(self._embed_and_store, key, text)
+
+        return vector
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed many queries, running the uncached ones as one model batch.
+
+        The batch goes through embed_documents, which gives the same vectors
+        as embed_query unless the model is configured with a query prompt.
+
+        Args:
+            texts: Queries to embed
+
+        Returns:
+            One vector per query, in order
+        """
+        keys = [(self.name, normalize_query(text)) for text in texts]
+        vectors = [query_cache.get(key) for key in keys]
+
+        missing = {}
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                missing.setdefault(keys[i], []).append(i)
+
+        if missing:
+            first = [indices[0] for indices in missing.values()]
+            embedded = self.embeddings.embed_documents([texts[i] for i in first])
+            for (key, indices), vector in zip(missing.items(), embedded):
+                vector = list(vector)
+                query_cache.set(key, vector)
+                for i in indices:
+                    vectors[i] = vector
+
+        return vectors
+
+    def _embed_and_store(self, key: tuple, text: str) -> List[float]:
+        vector = list(self.embeddings.embed_query(text))
+        query_cache.set(key, vector)
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Document chunks are embedded once at ingestion, not worth caching
+        return self.embeddings.embed_documents(texts)
+
+
+def get_query_embeddings(
+    name: Optional[str] = None, device: Optional[str] = None
+) -> CachedQueryEmbeddings:
+    """Return the shared embedding model wrapped with the query cache."""
+    return CachedQueryEmbeddings(get_embeddings(name, device), name or model_name)
+
+
+def save_embedding_cache(path: Optional[str] = None) -> None:
+    """
+    Persist the query embedding cache to disk.
+
+    Args:
+        path: Destination file, defaults to EMBEDDING_CACHE_PATH
+    """
+    path = path or EMBEDDING_CACHE_PATH
+    if path:
+        query_cache.save(path)
+
+
+if EMBEDDING_CACHE_PATH:
+    atexit.register(save_embedding_cache)
@@ -0,0 +1,202 @@
+import re
+import threading
+import unicodedata
+from typing import List, Optional
+
+from config import GAZETTEER_PATH
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+# Tokens that precede a place name in a weather question
+_PREPOSITIONS = {"in", "at", "for", "of", "near", "around", "to"}
+
+# Single-token names that collide with everyday words ("Is it nice out?",
+# "Will it rain?"). They only count as a city right after a preposition.
+_STOPWORDS = {
+    "a", "an", "and", "are", "be", "can", "cold", "day", "do", "does", "for",
+    "forecast", "hot", "how", "i", "in", "is", "it", "like", "me", "mobile",
+    "nice", "now", "of", "on", "rain", "reading", "snow", "split", "sun",
+    "sunny", "the", "today", "tomorrow", "weather", "what", "when", "will",
+    "wind", "with", "you",
+}
+
+# GeoNames "geoname" table columns used when loading a raw dump
+_GEONAMES_NAME = 1
+_GEONAMES_ASCII = 2
+_GEONAMES_ALT = 3
+_GEONAMES_LAT = 4
+_GEONAMES_LON = 5
+_GEONAMES_COUNTRY = 8
+_GEONAMES_POPULATION = 14
+
+
+def _fold(text: str) -> str:
+    """Strip accents so "São Paulo" and "Sao Paulo" compare equal."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(_fold(text).casefold())
+
+
+class Gazetteer:
+    """
+    In-memory city lookup backed by a token trie.
+
+    Every name and alias is inserted as a sequence of word tokens, so a
+    single left-to-right scan over the query finds all multi-word city
+    names ("new york", "rio de janeiro") in time linear in query length.
+    """
+
+    def __init__(self):
+        self.cities = []
+        self._trie = {}
+
+    def add(
+        self,
+        name: str,
+        country: str,
+        lat: float,
+        lon: float,
+        population: int = 0,
+        aliases: Optional[List[str]] = None,
+    ) -> None:
+        """Register a city under its name and aliases."""
+        index = len(self.cities)
+        self.cities.append((name, country.upper(), lat, lon, population))
+
+        for label in {name, *(aliases or [])}:
+            tokens = tokenize(label)
+            if not tokens:
+                continue
+
+            node = self._trie
+            for token in tokens:
+                node = node.setdefault(token, {})
+            node.setdefault(None, []).append(index)
+
+    def find(self, text: str, country: Optional[str] = None) -> Optional[dict]:
+        """
+        Find the most likely city mentioned in text.
+
+        Matches in the given country win, then matches following a
+        preposition, then longer names, then the more populous city (so
+        "Paris" resolves to Paris, FR).
+
+        Args:
+            text: Free text to search
+            country: Preferred ISO country code, if already known
+
+        Returns:
+            Dict with name, country, lat and lon, or None
+        """
+        raw_tokens = _TOKEN_PATTERN.findall(_fold(text))
+        tokens = [token.casefold() for token in raw_tokens]
+        best = None
+
+        for start in range(len(tokens)):
+            node = self._trie
+            for end in range(start, len(tokens)):
+                node = node.get(tokens[end])
+                if node is None:
+                    break
+                if None not in node:
+                    continue
+
+                length = end - start + 1
+                after_preposition = start > 0 and tokens[start - 1] in _PREPOSITIONS
+                if length == 1 and not after_preposition and (
+                    tokens[start] in _STOPWORDS
+                    or (len(tokens[start]) <= 3 and not raw_tokens[start].isupper())
+                ):
+                    continue
+
+                for index in node[None]:
+                    city = self.cities[index]
+                    score = (
+                        country is not None and city[1] == country.upper(),
+                        after_preposition,
+                        length,
+                        city[4],
+                    )
+                    if best is None or score > best[0]:
+                        best = (score, index)
+
+        if best is None:
+            return None
+
+        name, country, lat, lon, _ = self.cities[best[1]]
+        return {"name": name, "country": country, "lat": lat, "lon": lon}
+
+    def __len__(self) -> int:
+        return len(self.cities)
+
+
+def load_gazetteer(path: str = GAZETTEER_PATH) -> Gazetteer:
+    """
+    Load a city table from disk.
+
+    Accepts either the bundled TSV (header row: name, country, latitude,
+    longitude, population, aliases) or a raw GeoNames dump.
+
+    Args:
+        path: Path to the city table
+
+    Returns:
+        Gazetteer instance
+    """
+    gazetteer = Gazetteer()
+
+    with open(path, encoding="utf-8") as f:
+        first = f.readline().rstrip("\n").split("\t")
+        geonames = first[0] != "name"
+        if geonames:
+            f.seek(0)
+
+        for line in f:
+            row = line.rstrip("\n").split("\t")
+            if geonames:
+                if len(row) <= _GEONAMES_POPULATION:
+                    continue
+                aliases = [row[_GEONAMES_ASCII]] + [
+                    alias for alias in row[_GEONAMES_ALT].split(",") if alias
+                ]
+                gazetteer.add(
+                    row[_GEONAMES_NAME],
+                    row[_GEONAMES_COUNTRY],
+                    float(row[_GEONAMES_LAT]),
+                    float(row[_GEONAMES_LON]),
+                    int(row[_GEONAMES_POPULATION] or 0),
+                    aliases,
+                )
+            else:
+                if len(row) < 5:
+                    continue
+                aliases = row[5].split("|") if len(row) > 5 and row[5] else []
+                gazetteer.add(
+                    row[0], row[1], float(row[2]), float(row[3]), int(row[4]), aliases
+                )
+
+    return gazetteer
+
+
+_gazetteer = None
+_lock = threading.Lock()
+
+
+def get_gazetteer() -> Gazetteer:
+    """Return the shared gazetteer, loading it on first use."""
+    global _gazetteer
+
+    if _gazetteer is None:
+        with _lock:
+            if _gazetteer is None:
+                _gazetteer = load_gazetteer()
+
+    return _gazetteer
+
+
+def extract_city(text: str, country: Optional[str] = None) -> Optional[dict]:
+    """Find the city mentioned in text using the shared gazetteer."""
+    return get_gazetteer().find(text, country)
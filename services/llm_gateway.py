@@ -0,0 +1,316 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from collections import Counter, deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator, Optional
+
+from config import (
+    LLM_MAX_IN_FLIGHT,
+    LLM_MAX_QUEUE,
+    LLM_QUEUE_TIMEOUT,
+    LLM_REQUEST_TIMEOUT,
+)
+
+# Request priorities, lower runs first
+INTERACTIVE = 0
+BATCH = 10
+
+# Priority of LLM calls made from the current context (thread or task)
+_priority = contextvars.ContextVar("llm_priority", default=INTERACTIVE)
+
+# Wait times kept for the percentile metrics
+_WAIT_SAMPLES = 1000
+
+
+class LLMQueueFull(RuntimeError):
+    """Raised when too many requests are already waiting for the LLM."""
+
+
+class LLMTimeout(TimeoutError):
+    """Raised when a request waits or generates longer than allowed."""
+
+
+class LLMCancelled(RuntimeError):
+    """Raised when a request is cancelled through its cancel event."""
+
+
+@contextmanager
+def llm_priority(priority: int) -> Iterator[None]:
+    """
+    Run LLM calls made inside the block at the given priority.
+
+    The priority is a context variable, so it follows the calls into
+    threads started by LangChain's batch executors and into async tasks.
+
+    Args:
+        priority: INTERACTIVE, BATCH or any int (lower runs first)
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def _set_result(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class _Ticket:
+    """One request's place in the queue and, once admitted, its slot."""
+
+    def __init__(self, priority: int, cancel_event=None, loop=None):
+        self.priority = priority
+        self.cancel_event = cancel_event
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+        self.abandoned = False
+        self.wait_ms = 0.0
+        self.deadline = None
+        self.loop = loop
+        self.future = loop.create_future() if loop is not None else None
+        self.event = threading.Event() if loop is None else None
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the request times out, None for no limit."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def check(self) -> None:
+        """Raise if the request timed out or was cancelled mid-generation."""
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise LLMCancelled("LLM request cancelled")
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise LLMTimeout("LLM request timed out")
+
+
+class LLMGateway:
+    """
+    Admission control in front of the Ollama model.
+
+    At most max_in_flight requests run at once. Others wait in a priority
+    queue, so interactive chat is served before batch jobs and requests of
+    equal priority keep their arrival order. When max_queue requests are
+    already waiting, new ones fail fast with LLMQueueFull instead of adding
+    to the backlog. Works from threads and from asyncio tasks alike.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = LLM_MAX_IN_FLIGHT,
+        max_queue: int = LLM_MAX_QUEUE,
+        queue_timeout: float = LLM_QUEUE_TIMEOUT,
+        request_timeout: float = LLM_REQUEST_TIMEOUT,
+    ):
+        """
+        Args:
+            max_in_flight: Requests allowed to run at the same time
+            max_queue: Requests allowed to wait at the same time
+            queue_timeout: Seconds a request may wait for a slot
+            request_timeout: Seconds a request may run once admitted, 0 for no limit
+        """
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.request_timeout = request_timeout
+
+        self._lock = threading.Lock()
+        self._queue = []
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._waiting = 0
+        self._peak_waiting = 0
+        self._waits = deque(maxlen=_WAIT_SAMPLES)
+        self._counters = Counter()
+
+    def _enqueue(self, ticket: _Ticket) -> None:
+        """Admit the ticket or queue it; call with the lock held."""
+        self._counters["requests"] += 1
+
+        if self._in_flight < self.max_in_flight and not self._waiting:
+            self._in_flight += 1
+            self._grant(ticket)
+            return
+
+        if self._waiting >= self.max_queue:
+            self._counters["rejected"] += 1
+            raise LLMQueueFull(f"{self._waiting} LLM requests already waiting")
+
+        heapq.heappush(self._queue, (ticket.priority, next(self._sequence), ticket))
+        self._waiting += 1
+        self._peak_waiting = max(self._peak_waiting, self._waiting)
+
+    def _grant(self, ticket: _Ticket) -> None:
+        ticket.granted = True
+        ticket.wait_ms = (time.monotonic() - ticket.enqueued_at) * 1000
+        self._waits.append(ticket.wait_ms)
+
+        if ticket.future is not None:
+            ticket.loop.call_soon_threadsafe(_set_result, ticket.future)
+        else:
+            ticket.event.set()
+
+    def _abandon(self, ticket: _Ticket, reason: str) -> bool:
+        """Leave the queue; returns True if the slot was granted meanwhile."""
+        with self._lock:
+            if ticket.granted:
+                return True
+            ticket.abandoned = True
+            self._waiting -= 1
+            self._counters[reason] += 1
+            return False
+
+    def _release(self) -> None:
+        with self._lock:
+            while self._queue:
+                _, _, ticket = heapq.heappop(self._queue)
+                if ticket.abandoned:
+                    continue
+                # Hand the slot straight to the next request
+                self._waiting -= 1
+                self._grant(ticket)
+                return
+            self._in_flight -= 1
+
+    def _start(self, ticket: _Ticket) -> _Ticket:
+        if self.request_timeout:
+            ticket.deadline = time.monotonic() + self.request_timeout
+        return ticket
+
+    def acquire(
+        self,
+        priority: Optional[int] = None,
+        timeout: Optional[float] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> _Ticket:
+        """
+        Wait for a slot, blocking the calling thread.
+
+        Args:
+            priority: Request priority, defaults to the llm_priority context
+            timeout: Seconds to wait, defaults to queue_timeout
+            cancel_event: Event that aborts the wait and the generation
+
+        Returns:
+            Ticket to pass to release()
+        """
+        priority = _priority.get() if priority is None else priority
+        timeout = self.queue_timeout if timeout is None else timeout
+        ticket = _Ticket(priority, cancel_event)
+
+        with self._lock:
+            self._enqueue(ticket)
+
+        deadline = time.monotonic() + timeout
+        # Poll so a cancel event is noticed while waiting
+        poll = 0.05 if cancel_event is not None else None
+
+        while not ticket.event.wait(poll or max(0.0, deadline - time.monotonic())):
+            if cancel_event is not None and cancel_event.is_set():
+                if not self._abandon(ticket, "cancelled"):
+                    raise LLMCancelled("LLM request cancelled while queued")
+                break
+            if time.monotonic() >= deadline:
+                if not self._abandon(ticket, "timeouts"):
+                    raise LLMTimeout(f"No LLM slot free within {timeout:g}s")
+                break
+
+        return self._start(ticket)
+
+    async def aacquire(
+        self, priority: Optional[int] = None, timeout: Optional[float] = None
+    ) -> _Ticket:
+        """
+        Wait for a slot without blocking the event loop.
+
+        Cancelling the awaiting task removes the request from the queue.
+
+        Args:
+            priority: Request priority, defaults to the llm_priority context
+            timeout: Seconds to wait, defaults to queue_timeout
+
+        Returns:
+            Ticket to pass to release()
+        """
+        priority = _priority.get() if priority is None else priority
+        timeout = self.queue_timeout if timeout is None else timeout
+        ticket = _Ticket(priority, loop=asyncio.get_running_loop())
+
+        with self._lock:
+            self._enqueue(ticket)
+
+        if not ticket.granted:
+            try:
+                await asyncio.wait_for(asyncio.shield(ticket.future), timeout)
+            except asyncio.TimeoutError:
+                if not self._abandon(ticket, "timeouts"):
+                    raise LLMTimeout(f"No LLM slot free within {timeout:g}s")
+            except asyncio.CancelledError:
+                if self._abandon(ticket, "cancelled"):
+                    # Granted while being cancelled, pass the slot on
+                    self._release()
+                raise
+
+        return self._start(ticket)
+
+    def release(self, ticket: _Ticket) -> None:
+        """Free the slot held by a ticket from acquire() or aacquire()."""
+        with self._lock:
+            self._counters["completed"] += 1
+        self._release()
+
+    @contextmanager
+    def slot(
+        self,
+        priority: Optional[int] = None,
+        timeout: Optional[float] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> Iterator[_Ticket]:
+        """Hold a slot for the duration of the block."""
+        ticket = self.acquire(priority, timeout, cancel_event)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    @asynccontextmanager
+    async def aslot(
+        self, priority: Optional[int] = None, timeout: Optional[float] = None
+    ) -> AsyncIterator[_Ticket]:
+        """Async variant of slot()."""
+        ticket = await self.aacquire(priority, timeout)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def stats(self) -> dict:
+        """
+        Current load and queueing metrics.
+
+        Returns:
+            Dict with in_flight, queue_depth, peak_queue_depth, wait_ms_avg,
+            wait_ms_p95 over recent requests, and requests, completed,
+            rejected, timeouts and cancelled counts
+        """
+        with self._lock:
+            waits = sorted(self._waits)
+            stats = {
+                "in_flight": self._in_flight,
+                "queue_depth": self._waiting,
+                "peak_queue_depth": self._peak_waiting,
+                "wait_ms_avg": sum(waits) / len(waits) if waits else 0.0,
+                "wait_ms_p95": waits[int(len(waits) * 0.95)] if waits else 0.0,
+            }
+            for name in ("requests", "completed", "rejected", "timeouts", "cancelled"):
+                stats[name] = self._counters[name]
+        return stats
+
+
+llm_gateway = LLMGateway()
@@ -1,15 +1,328 @@
+import asyncio
+import json
+import math
+import threading
+import time
+from typing import AsyncIterator, Dict, Iterator, Tuple
+
 from langchain_ollama import ChatOllama
-from langchain_core.messages import HumanMessage
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.runnables import ensure_config
+
+from config import (
+    CHARS_PER_TOKEN,
+    LLM_PROFILES,
+    LLM_REQUEST_TIMEOUT,
+    LLM_TOKENIZER,
+)
+from services.llm_gateway import llm_gateway
+
+# Profile the shared client is configured with, used when a call names none
+DEFAULT_PROFILE = "answer"
+
 
+def _options(profile: dict) -> dict:
+    """Ollama generation options of a profile, leaving unset ones out."""
+    options = {"temperature": profile["temperature"]}
+    if profile["max_tokens"]:
+        options["num_predict"] = profile["max_tokens"]
+    if profile["num_ctx"]:
+        options["num_ctx"] = profile["num_ctx"]
+    if profile["stop"]:
+        options["stop"] = profile["stop"]
+    return options
+
+
+_default = LLM_PROFILES[DEFAULT_PROFILE]
 llm = ChatOllama(
-    model="ministral-3:3b",
-    temperature=0.7,
+    model=_default["model"],
+    keep_alive=_default["keep_alive"],
+    # Bounds each HTTP read, so a stalled server cannot hold a slot forever
+    client_kwargs={"timeout": LLM_REQUEST_TIMEOUT or None},
+    **_options(_default),
 )
 
 
-def get_llm_response(prompt: str):
-    """LangChain LLM with local ollama models."""
+def profile_kwargs(profile: str = None, **options) -> dict:
+    """
+    Per-call arguments that apply an LLM profile to the shared client.
+
+    Profiles share one ChatOllama client, and so its HTTP connections; the
+    model, generation options and keep_alive are sent with each request.
+
+    Args:
+        profile: Name in config.LLM_PROFILES, None for the default profile
+        **options: Ollama options overriding the profile's, e.g. num_predict=1
+
+    Returns:
+        Keyword arguments for llm.invoke / stream and their async variants
+    """
+    profile = profile or DEFAULT_PROFILE
+    if profile not in LLM_PROFILES:
+        raise ValueError(f"Unknown LLM profile: {profile}")
+    if profile == DEFAULT_PROFILE and not options:
+        return {}
+
+    settings = LLM_PROFILES[profile]
+    kwargs = {"model": settings["model"], "options": {**_options(settings), **options}}
+    if settings["keep_alive"] is not None:
+        kwargs["keep_alive"] = settings["keep_alive"]
+    return kwargs
+
+
+def _messages(prompt: str, system: str = None) -> list:
+    """
+    Chat messages for a prompt.
+
+    The static instructions go in a leading system message, so consecutive
+    calls share a token prefix and Ollama skips re-evaluating it.
+    """
+    if system:
+        return [SystemMessage(content=system), HumanMessage(content=prompt)]
+    return [HumanMessage(content=prompt)]
+
+
+class _DeadlineCallback(BaseCallbackHandler):
+    """Stops a blocking call once its gateway ticket runs out of time."""
+
+    # Without this, LangChain logs the callback's exception and carries on
+    raise_error = True
+
+    def __init__(self, ticket):
+        self.ticket = ticket
 
-    response = llm.invoke([HumanMessage(content=prompt)])
+    def on_llm_new_token(self, token: str, **kwargs) -> None:
+        self.ticket.check()
+
+
+def _deadline_config(ticket) -> dict:
+    """
+    Run config that enforces the ticket's deadline during llm.invoke.
+
+    ChatOllama streams from Ollama even for invoke(), so the ticket is
+    checked on every token. Callbacks inherited from the graph (tracing,
+    message streaming) are kept.
+    """
+    handler = _DeadlineCallback(ticket)
+    callbacks = ensure_config().get("callbacks")
+    if callbacks is None:
+        callbacks = [handler]
+    elif isinstance(callbacks, list):
+        callbacks = [*callbacks, handler]
+    else:
+        callbacks = callbacks.copy()
+        callbacks.add_handler(handler, inherit=False)
+    return {"callbacks": callbacks}
+
+
+# Tokenizer for counting prompt tokens, loaded on first use. False marks a
+# failed load so we fall back to the character estimate without retrying.
+_tokenizer = None
+_tokenizer_lock = threading.Lock()
+
+
+def get_llm_response(prompt: str, profile: str = None, system: str = None):
+    """LangChain LLM with local ollama models.
+
+    Every call in this module goes through llm_gateway, which limits how
+    many requests reach Ollama at once and queues the rest by priority.
+    profile names the config.LLM_PROFILES entry (model, temperature, token
+    cap, ...) to generate with; the default is the answer profile. system
+    is the static prompt prefix, sent as a system message. Generation past
+    LLM_REQUEST_TIMEOUT raises LLMTimeout, as on the async and streaming
+    paths.
+    """
+
+    with llm_gateway.slot() as ticket:
+        response = llm.invoke(
+            _messages(prompt, system),
+            config=_deadline_config(ticket),
+            **profile_kwargs(profile),
+        )
 
     return response.content
+
+
+async def aget_llm_response(prompt: str, profile: str = None, system: str = None):
+    """Async variant of get_llm_response."""
+
+    async with llm_gateway.aslot() as ticket:
+        response = await asyncio.wait_for(
+            llm.ainvoke(_messages(prompt, system), **profile_kwargs(profile)),
+            ticket.remaining(),
+        )
+
+    return response.content
+
+
+def stream_llm_response(
+    prompt: str,
+    cancel_event: threading.Event = None,
+    profile: str = None,
+    system: str = None,
+) -> Iterator[str]:
+    """Yield the LLM response incrementally as tokens are generated.
+
+    The gateway slot is held until the stream is exhausted or closed.
+    Setting cancel_event stops the stream between tokens.
+    """
+
+    with llm_gateway.slot(cancel_event=cancel_event) as ticket:
+        for chunk in llm.stream(_messages(prompt, system), **profile_kwargs(profile)):
+            ticket.check()
+            if chunk.content:
+                yield chunk.content
+
+
+async def astream_llm_response(
+    prompt: str, profile: str = None, system: str = None
+) -> AsyncIterator[str]:
+    """Async variant of stream_llm_response."""
+
+    async with llm_gateway.aslot() as ticket:
+        stream = llm.astream(
+            _messages(prompt, system), **profile_kwargs(profile)
+        ).__aiter__()
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), ticket.remaining())
+                except StopAsyncIteration:
+                    break
+                if chunk.content:
+                    yield chunk.content
+        finally:
+            await stream.aclose()
+
+
+def get_structured_llm_response(
+    prompt: str, schema: dict, profile: str = None, system: str = None
+) -> dict:
+    """LLM call constrained to a JSON schema via Ollama's format option."""
+
+    with llm_gateway.slot() as ticket:
+        response = llm.invoke(
+            _messages(prompt, system),
+            config=_deadline_config(ticket),
+            format=schema,
+            **profile_kwargs(profile),
+        )
+
+    return parse_json_response(response.content)
+
+
+async def aget_structured_llm_response(
+    prompt: str, schema: dict, profile: str = None, system: str = None
+) -> dict:
+    """Async variant of get_structured_llm_response."""
+
+    async with llm_gateway.aslot() as ticket:
+        response = await asyncio.wait_for(
+            llm.ainvoke(
+                _messages(prompt, system), format=schema, **profile_kwargs(profile)
+            ),
+            ticket.remaining(),
+        )
+
+    return parse_json_response(response.content)
+
+
+def warmup_llm(prefixes: Dict[str, Tuple[str, str]]) -> Dict[str, float]:
+    """
+    Load the models and prefill their static prompt prefixes.
+
+    Each system prompt is sent once with its profile and a one-token cap, so
+    Ollama loads the model (kept resident for the profile's keep_alive) and
+    holds the prefix in its KV cache before the first user query. A failed
+    prefix is reported and skipped; the app still works, only colder.
+
+    Args:
+        prefixes: Node name -> (profile, system prompt), e.g. PROMPT_PREFIXES
+
+    Returns:
+        Milliseconds taken per warmed node
+    """
+    timings = {}
+    for name, (profile, system) in prefixes.items():
+        kwargs = profile_kwargs(profile, num_predict=1)
+        start = time.perf_counter()
+        try:
+            with llm_gateway.slot():
+                llm.invoke(_messages("", system), **kwargs)
+        except Exception as e:
+            print(f"LLM warmup failed for {name}: {e}")
+            continue
+        timings[name] = round((time.perf_counter() - start) * 1000, 1)
+
+    return timings
+
+
+def parse_json_response(text: str) -> dict:
+    """
+    Parse a JSON object out of model output.
+
+    Tolerates markdown code fences and text around the object, which small
+    models still produce occasionally even in JSON mode.
+
+    Returns:
+        Parsed dict, or an empty dict when no JSON object is found
+    """
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        text = text[text.find("\n") + 1:] if "\n" in text else text
+
+    try:
+        parsed = json.loads(text)
+        return parsed if isinstance(parsed, dict) else {}
+    except json.JSONDecodeError:
+        pass
+
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        try:
+            parsed = json.loads(text[start:end + 1])
+            return parsed if isinstance(parsed, dict) else {}
+        except json.JSONDecodeError:
+            pass
+
+    return {}
+
+
+def get_tokenizer():
+    """
+    Load the tokenizer named by LLM_TOKENIZER.
+
+    Returns:
+        tokenizers.Tokenizer, or None when unset or unavailable
+    """
+    global _tokenizer
+
+    if _tokenizer is None:
+        with _tokenizer_lock:
+            if _tokenizer is None:
+                _tokenizer = False
+                if LLM_TOKENIZER:
+                    try:
+                        from tokenizers import Tokenizer
+
+                        _tokenizer = Tokenizer.from_pretrained(LLM_TOKENIZER)
+                    except Exception as e:
+                        print(f"Could not load tokenizer {LLM_TOKENIZER}: {e}")
+
+    return _tokenizer or None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count the tokens the LLM will see for a piece of text.
+
+    Uses the model's tokenizer when configured, otherwise estimates from
+    the character count with CHARS_PER_TOKEN.
+    """
+    tokenizer = get_tokenizer()
+    if tokenizer is not None:
+        return len(tokenizer.encode(text, add_special_tokens=False).ids)
+
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
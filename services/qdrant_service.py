@@ -0,0 +1,155 @@
+import asyncio
+import threading
+import time
+import weakref
+
+from qdrant_client import AsyncQdrantClient, QdrantClient
+
+from config import (
+    QDRANT_URL,
+    QDRANT_PREFER_GRPC,
+    QDRANT_TIMEOUT,
+    QDRANT_POOL_SIZE,
+    QDRANT_HEALTHCHECK_INTERVAL,
+    VECTOR_BACKEND,
+)
+from services.vector_backend import AsyncLocalVectorBackend, LocalVectorBackend
+
+# One long-lived client per process. QdrantClient keeps its HTTP (or gRPC)
+# connections open, so reusing it avoids a new handshake per query.
+_client = None
+_last_health_check = 0.0
+_lock = threading.Lock()
+
+# Async clients hold loop-bound connections, so there is one per event loop
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _create_client() -> QdrantClient:
+    """
+    Construct the vector store client from config.
+
+    With VECTOR_BACKEND "local" this is an in-process LocalVectorBackend,
+    which implements the QdrantClient methods the app uses.
+    """
+    if VECTOR_BACKEND == "local":
+        return LocalVectorBackend()
+    return QdrantClient(
+        url=QDRANT_URL,
+        prefer_grpc=QDRANT_PREFER_GRPC,
+        timeout=QDRANT_TIMEOUT,
+        pool_size=QDRANT_POOL_SIZE,
+    )
+
+
+def get_qdrant_client() -> QdrantClient:
+    """
+    Get the shared Qdrant client, reconnecting if it has become unhealthy.
+
+    The connection is probed at most once every QDRANT_HEALTHCHECK_INTERVAL
+    seconds, so the common path is a plain attribute lookup. The probe runs
+    outside the lock: other threads keep using the current client while a
+    slow server is checked.
+
+    Returns:
+        QdrantClient instance
+    """
+    global _client, _last_health_check
+
+    with _lock:
+        now = time.monotonic()
+
+        if _client is None:
+            _client = _create_client()
+            _last_health_check = now
+            return _client
+
+        client = _client
+        if now - _last_health_check < QDRANT_HEALTHCHECK_INTERVAL:
+            return client
+        # Claim this check so concurrent callers do not probe as well
+        _last_health_check = now
+
+    if _ping(client):
+        return client
+
+    with _lock:
+        if _client is client:
+            print("Qdrant health check failed, reconnecting...")
+            _retire(client)
+            _client = _create_client()
+        return _client
+
+
+def get_async_qdrant_client() -> AsyncQdrantClient:
+    """
+    Get the shared async Qdrant client for the running event loop.
+
+    Returns:
+        AsyncQdrantClient instance
+    """
+    loop = asyncio.get_running_loop()
+
+    client = _async_clients.get(loop)
+    if client is None:
+        if VECTOR_BACKEND == "local":
+            # The local store is shared in-process, only the calls are async
+            client = AsyncLocalVectorBackend(get_qdrant_client())
+        else:
+            client = AsyncQdrantClient(
+                url=QDRANT_URL,
+                prefer_grpc=QDRANT_PREFER_GRPC,
+                timeout=QDRANT_TIMEOUT,
+                pool_size=QDRANT_POOL_SIZE,
+            )
+        _async_clients[loop] = client
+
+    return client
+
+
+def check_qdrant_health() -> bool:
+    """Return True if the Qdrant server answers a lightweight request."""
+    return _ping(get_qdrant_client())
+
+
+def reset_qdrant_client() -> None:
+    """Drop the shared client so the next call opens a fresh connection."""
+    global _client
+
+    with _lock:
+        if _client is not None:
+            _retire(_client)
+        _client = None
+        _async_clients.clear()
+
+
+def _ping(client: QdrantClient) -> bool:
+    try:
+        client.get_collections()
+        return True
+    except Exception:
+        return False
+
+
+def _retire(client: QdrantClient) -> None:
+    """
+    Close a replaced client once requests already using it have finished.
+
+    Other threads may still be searching with it, so it is closed only after
+    QDRANT_TIMEOUT seconds, by which time their requests have completed or
+    timed out. A local store is left to the garbage collector instead: its
+    writes are already on disk, and a late close() could save its HNSW graph
+    over the one of the store that replaced it.
+    """
+    if isinstance(client, LocalVectorBackend):
+        return
+    timer = threading.Timer(QDRANT_TIMEOUT, _close, args=(client,))
+    timer.daemon = True
+    timer.start()
+
+
+def _close(client: QdrantClient) -> None:
+    try:
+        client.close()
+    except Exception:
+        pass
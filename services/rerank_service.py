@@ -0,0 +1,124 @@
+import asyncio
+import hashlib
+import math
+import threading
+from typing import List, Optional
+
+from config import (
+    EMBEDDING_DEVICE,
+    RERANK_BATCH_SIZE,
+    RERANK_CACHE_SIZE,
+    RERANK_CACHE_TTL,
+    RERANK_MODEL,
+)
+from services.cache import TTLCache
+from services.embedding_service import normalize_query
+
+# Loaded cross-encoder, created on first use
+_model = None
+_lock = threading.Lock()
+
+# Relevance scores keyed by (model, normalized query, chunk hash)
+score_cache = TTLCache(maxsize=RERANK_CACHE_SIZE, ttl=RERANK_CACHE_TTL)
+
+
+def get_reranker():
+    """
+    Get the shared cross-encoder, loading it on first use.
+
+    sentence-transformers is imported lazily so the rest of the app does not
+    pay for it when reranking is disabled.
+
+    Returns:
+        sentence_transformers.CrossEncoder instance
+    """
+    global _model
+
+    if _model is None:
+        with _lock:
+            if _model is None:
+                from sentence_transformers import CrossEncoder
+
+                kwargs = {"device": EMBEDDING_DEVICE} if EMBEDDING_DEVICE else {}
+                _model = CrossEncoder(RERANK_MODEL, **kwargs)
+
+    return _model
+
+
+def clear_reranker() -> None:
+    """Drop the loaded cross-encoder and cached scores."""
+    global _model
+
+    with _lock:
+        _model = None
+    score_cache.clear()
+
+
+def _cache_key(query: str, text: str) -> tuple:
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return RERANK_MODEL, normalize_query(query), digest
+
+
+def score_pairs(query: str, texts: List[str]) -> List[float]:
+    """
+    Score how well each text answers the query.
+
+    Cached pairs are reused, and the remaining ones go to the cross-encoder
+    in a single batched call. Raw logits are squashed to 0-1 with a sigmoid.
+
+    Args:
+        query: Search query
+        texts: Candidate chunk texts
+
+    Returns:
+        Relevance score per text
+    """
+    keys = [_cache_key(query, text) for text in texts]
+    scores = [score_cache.get(key) for key in keys]
+    missing = [i for i, score in enumerate(scores) if score is None]
+
+    if missing:
+        logits = get_reranker().predict(
+            [(query, texts[i]) for i in missing],
+            batch_size=RERANK_BATCH_SIZE,
+            show_progress_bar=False,
+        )
+        for i, logit in zip(missing, logits):
+            scores[i] = 1.0 / (1.0 + math.exp(-float(logit)))
+            score_cache.set(keys[i], scores[i])
+
+    return scores
+
+
+def rerank(query: str, results: list, top_k: Optional[int] = None) -> list:
+    """
+    Reorder retrieval results by cross-encoder relevance.
+
+    The retrieval score of each document is kept in its metadata as
+    "retrieval_score".
+
+    Args:
+        query: Search query
+        results: List of (document, score) tuples from retrieval
+        top_k: Number of results to keep, all when omitted
+
+    Returns:
+        List of (document, rerank score) tuples, best first
+    """
+    if not results:
+        return []
+
+    scores = score_pairs(query, [doc.page_content for doc, _ in results])
+
+    reranked = []
+    for (doc, retrieval_score), score in zip(results, scores):
+        doc.metadata["retrieval_score"] = retrieval_score
+        reranked.append((doc, score))
+
+    reranked.sort(key=lambda item: item[1], reverse=True)
+    return reranked[:top_k] if top_k else reranked
+
+
+async def arerank(query: str, results: list, top_k: Optional[int] = None) -> list:
+    """Async variant of rerank; inference runs in a worker thread."""
+    return await asyncio.to_thread(rerank, query, results, top_k)
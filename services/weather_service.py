@@ -1,15 +1,218 @@
+import asyncio
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from typing import Optional
+
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+
+from config import (
+    OPENWEATHER_API_KEY,
+    OPENWEATHER_URL,
+    WEATHER_CACHE_TTL,
+    WEATHER_CACHE_STALE_TTL,
+    WEATHER_CACHE_SIZE,
+    WEATHER_GEO_PRECISION,
+    WEATHER_POOL_SIZE,
+)
+from services.cache import TTLCache
+
+url = OPENWEATHER_URL
+
+# Keep-alive connections shared by every weather request
+session = requests.Session()
+session.mount(
+    "https://", HTTPAdapter(pool_connections=1, pool_maxsize=WEATHER_POOL_SIZE)
+)
+session.mount(
+    "http://", HTTPAdapter(pool_connections=1, pool_maxsize=WEATHER_POOL_SIZE)
+)
+
+# Entries are kept past their TTL for the stale window, stored as
+# (fetched_at, data) so freshness is decided on read.
+weather_cache = TTLCache(
+    maxsize=WEATHER_CACHE_SIZE, ttl=WEATHER_CACHE_TTL + WEATHER_CACHE_STALE_TTL
+)
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+# Async clients and in-flight tasks are bound to their event loop
+_async_sessions = weakref.WeakKeyDictionary()
+_async_inflight = weakref.WeakKeyDictionary()
+_background_tasks = set()
+
+
+def fetch_weather(
+    city: str, lat: Optional[float] = None, lon: Optional[float] = None
+) -> dict:
+    """OpenWeatherMap API service.
+
+    Coordinates, when known, are used instead of the city name so the API
+    does not have to geocode it again. Responses are cached; a stale entry
+    is returned immediately while a background request refreshes it.
+    """
+
+    key = cache_key(city, lat, lon)
+    entry = weather_cache.get(key)
+
+    if entry is not None:
+        fetched_at, data = entry
+        if time.time() - fetched_at >= WEATHER_CACHE_TTL and key not in _inflight:
+            threading.Thread(
+                target=_refresh, args=(key, city, lat, lon), daemon=True
+            ).start()
+        return data
+
+    return _fetch_coalesced(key, city, lat, lon)
+
+
+async def afetch_weather(
+    city: str, lat: Optional[float] = None, lon: Optional[float] = None
+) -> dict:
+    """Async variant of fetch_weather sharing the same cache."""
+
+    key = cache_key(city, lat, lon)
+    entry = weather_cache.get(key)
+    inflight = _async_inflight.setdefault(asyncio.get_running_loop(), {})
+
+    if entry is not None:
+        fetched_at, data = entry
+        if time.time() - fetched_at >= WEATHER_CACHE_TTL and key not in inflight:
+            task = asyncio.create_task(_arefresh(key, city, lat, lon))
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+        return data
+
+    return await _afetch_coalesced(key, city, lat, lon)
+
+
+def cache_key(
+    city: str, lat: Optional[float] = None, lon: Optional[float] = None
+) -> tuple:
+    """
+    Build the cache key for a weather lookup.
+
+    Coordinates are rounded to WEATHER_GEO_PRECISION decimals (about 1 km
+    at the default of 2), so nearby lookups share an entry.
+    """
+    if lat is not None and lon is not None:
+        return (
+            "geo",
+            round(lat, WEATHER_GEO_PRECISION),
+            round(lon, WEATHER_GEO_PRECISION),
+        )
+
+    return ("city", " ".join(city.casefold().replace(",", ", ").split()))
 
-from config import OPENWEATHER_API_KEY
 
-url = "https://api.openweathermap.org/data/2.5/weather"
+def _fetch_coalesced(
+    key: tuple, city: str, lat: Optional[float], lon: Optional[float]
+) -> dict:
+    """Issue one API request per key, concurrent callers share its result."""
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = Future()
+            _inflight[key] = future
 
+    if not leader:
+        return future.result()
 
-def fetch_weather(city: str) -> dict:
-    """OpenWeatherMap API service."""
+    try:
+        data = _request_weather(city, lat, lon)
+        weather_cache.set(key, (time.time(), data))
+        future.set_result(data)
+        return data
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
 
-    params = {"q": city, "appid": OPENWEATHER_API_KEY, "units": "metric"}
-    response = requests.get(url, params=params, timeout=10)
+
+async def _afetch_coalesced(
+    key: tuple, city: str, lat: Optional[float], lon: Optional[float]
+) -> dict:
+    inflight = _async_inflight.setdefault(asyncio.get_running_loop(), {})
+
+    task = inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_arequest_and_store(key, city, lat, lon))
+        inflight[key] = task
+        task.add_done_callback(lambda _: inflight.pop(key, None))
+
+    # Shielded so one cancelled caller does not cancel the shared request
+    return await asyncio.shield(task)
+
+
+async def _arequest_and_store(
+    key: tuple, city: str, lat: Optional[float], lon: Optional[float]
+) -> dict:
+    data = await _arequest_weather(city, lat, lon)
+    weather_cache.set(key, (time.time(), data))
+    return data
+
+
+async def _arefresh(
+    key: tuple, city: str, lat: Optional[float], lon: Optional[float]
+) -> None:
+    try:
+        await _afetch_coalesced(key, city, lat, lon)
+    except Exception as e:
+        print(f"Background weather refresh failed for {city}: {e}")
+
+
+def _refresh(
+    key: tuple, city: str, lat: Optional[float], lon: Optional[float]
+) -> None:
+    try:
+        _fetch_coalesced(key, city, lat, lon)
+    except Exception as e:
+        print(f"Background weather refresh failed for {city}: {e}")
+
+
+def _request_weather(
+    city: str, lat: Optional[float], lon: Optional[float]
+) -> dict:
+    response = session.get(url, params=_params(city, lat, lon), timeout=10)
     response.raise_for_status()
 
     return response.json()
+
+
+async def _arequest_weather(
+    city: str, lat: Optional[float], lon: Optional[float]
+) -> dict:
+    loop = asyncio.get_running_loop()
+
+    client = _async_sessions.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            timeout=10,
+            limits=httpx.Limits(
+                max_connections=WEATHER_POOL_SIZE,
+                max_keepalive_connections=WEATHER_POOL_SIZE,
+            ),
+        )
+        _async_sessions[loop] = client
+
+    response = await client.get(url, params=_params(city, lat, lon))
+    response.raise_for_status()
+
+    return response.json()
+
+
+def _params(city: str, lat: Optional[float], lon: Optional[float]) -> dict:
+    if lat is not None and lon is not None:
+        params = {"lat": lat, "lon": lon}
+    else:
+        params = {"q": city}
+
+    params.update({"appid": OPENWEATHER_API_KEY, "units": "metric"})
+    return params
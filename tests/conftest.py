@@ -13,6 +13,38 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 
+@pytest.fixture(autouse=True)
+def reset_shared_resources(monkeypatch):
+    """Drop process-wide caches so tests do not leak state into each other."""
+    # Keep the ingestion manifest in memory instead of the project .cache
+    monkeypatch.setattr("rag.manifest.INGESTION_MANIFEST_PATH", None)
+
+    # Fresh LLM slots and metrics per test
+    from services.llm_gateway import LLMGateway
+
+    monkeypatch.setattr("services.llm_service.llm_gateway", LLMGateway())
+
+    from rag.retriever import reset_vector_stores
+    from services.answer_cache import answer_cache
+    from services.embedding_service import clear_embeddings, query_cache
+    from services.qdrant_service import reset_qdrant_client
+    from services.rerank_service import clear_reranker
+    from services.weather_service import weather_cache
+
+    def reset():
+        clear_embeddings()
+        query_cache.clear()
+        reset_vector_stores()
+        reset_qdrant_client()
+        answer_cache.clear()
+        weather_cache.clear()
+        clear_reranker()
+
+    reset()
+    yield
+    reset()
+
+
 @pytest.fixture
 def mock_llm_response():
     """Mock LLM response fixture."""
@@ -33,13 +65,20 @@ def sample_agent_state():
     return {
         "user_query": "What is the weather in New York?",
         "route": None,
+        "route_source": None,
+        "route_confidence": None,
         "weather_city": None,
+        "weather_coords": None,
         "weather_data": None,
         "retrieved_chunks": None,
+        "retrieved_scores": None,
         "rag_context": None,
+        "context_tokens": None,
         "llm_input": None,
         "llm_response": None,
+        "llm_ttft_ms": None,
         "final_answer": None,
+        "cache_hit": None,
         "evaluation_metrics": None,
         "trace_id": None,
         "errors": None,
@@ -0,0 +1,246 @@
+"""
+Test cases for the shared TTL/LRU cache.
+"""
+import pytest
+from unittest.mock import patch, MagicMock
+from services.cache import TTLCache
+
+
+class TestTTLCache:
+    """Test suite for TTLCache."""
+
+    def test_get_returns_stored_value(self):
+        """Test basic set/get round trip."""
+        cache = TTLCache(maxsize=10)
+        cache.set("key", [0.1, 0.2])
+
+        assert cache.get("key") == [0.1, 0.2]
+
+    def test_get_missing_returns_default(self):
+        """Test that a missing key returns the default."""
+        cache = TTLCache(maxsize=10)
+
+        assert cache.get("missing") is None
+        assert cache.get("missing", "fallback") == "fallback"
+
+    def test_hit_and_miss_counters(self):
+        """Test that lookups are counted."""
+        cache = TTLCache(maxsize=10)
+        cache.set("key", 1)
+
+        cache.get("key")
+        cache.get("key")
+        cache.get("other")
+
+        stats = cache.stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == pytest.approx(2 / 3, abs=1e-4)
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = TTLCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_entries_expire_after_ttl(self):
+        """Test that expired entries are treated as misses."""
+        cache = TTLCache(maxsize=10, ttl=60)
+
+        with patch("services.cache.time.time", return_value=1000.0):
+            cache.set("key", "value")
+        with patch("services.cache.time.time", return_value=1059.0):
+            assert cache.get("key") == "value"
+        with patch("services.cache.time.time", return_value=1061.0):
+            assert cache.get("key") is None
+
+    def test_per_entry_ttl_override(self):
+        """Test that set() can override the default TTL."""
+        cache = TTLCache(maxsize=10, ttl=3600)
+
+        with patch("services.cache.time.time", return_value=1000.0):
+            cache.set("short", "value", ttl=10)
+        with patch("services.cache.time.time", return_value=1011.0):
+            assert cache.get("short") is None
+
+    def test_save_and_load_round_trip(self, tmp_path):
+        """Test persisting the cache to disk and reloading it."""
+        path = str(tmp_path / "cache.json")
+        cache = TTLCache(maxsize=10)
+        cache.set(("model", "what is ai"), [0.1, 0.2])
+        cache.save(path)
+
+        restored = TTLCache(maxsize=10)
+        loaded = restored.load(path)
+
+        assert loaded == 1
+        assert restored.get(("model", "what is ai")) == [0.1, 0.2]
+
+    def test_load_missing_file(self, tmp_path):
+        """Test that loading a missing file is a no-op."""
+        cache = TTLCache(maxsize=10)
+
+        assert cache.load(str(tmp_path / "missing.json")) == 0
+
+
+class TestSemanticAnswerCache:
+    """Test suite for the semantic answer cache."""
+
+    @pytest.fixture
+    def fake_embeddings(self):
+        """Embed queries onto fixed unit vectors so similarity is predictable."""
+        vectors = {
+            "what is machine learning?": [1.0, 0.0, 0.0],
+            "explain machine learning": [0.99, 0.14, 0.0],
+            "what is the weather in paris?": [0.0, 1.0, 0.0],
+            "weather in paris today": [0.0, 0.99, 0.14],
+            "what is the weather in rome?": [0.0, 0.99, 0.14],
+            "how do i reset the router?": [0.0, 0.0, 1.0],
+            "what is the weather in nice?": [0.0, 0.0, 1.0],
+            "weather in nice tomorrow": [0.0, 0.14, 0.99],
+            "what is the weather in venice?": [0.0, 0.14, 0.99],
+            "is it nice weather today?": [0.0, 0.14, 0.99],
+        }
+        embeddings = MagicMock()
+        embeddings.embed_query.side_effect = lambda query: vectors[query.lower()]
+
+        with patch("services.answer_cache.get_query_embeddings", return_value=embeddings):
+            yield embeddings
+
+    def test_lookup_returns_near_duplicate(self, fake_embeddings):
+        """Test that a paraphrased query hits the cache."""
+        from services.answer_cache import SemanticAnswerCache
+
+        cache = SemanticAnswerCache(threshold=0.95)
+        cache.store("What is machine learning?", "ML is...", route="other")
+
+        entry = cache.lookup("Explain machine learning")
+
+        assert entry is not None
+        assert entry["answer"] == "ML is..."
+        assert entry["similarity"] >= 0.95
+
+    def test_lookup_misses_unrelated_query(self, fake_embeddings):
+        """Test that dissimilar queries miss."""
+        from services.answer_cache import SemanticAnswerCache
+
+        cache = SemanticAnswerCache(threshold=0.95)
+        cache.store("What is machine learning?", "ML is...", route="other")
+
+        assert cache.lookup("How do I reset the router?") is None
+        assert cache.stats()["misses"] == 1
+
+    def test_weather_hit_requires_same_city(self, fake_embeddings):
+        """Test that similar weather queries for other cities miss."""
+        from services.answer_cache import SemanticAnswerCache
+
+        cache = SemanticAnswerCache(threshold=0.95)
+        cache.store(
+            "What is the weather in Paris?", "Sunny", route="weather", weather_city="Paris, FR"
+        )
+
+        assert cache.lookup("Weather in Paris today") is not None
+        assert cache.lookup("What is the weather in Rome?") is None
+
+    def test_weather_hit_compares_gazetteer_city(self, fake_embeddings):
+        """Test that a city name inside another word or phrase is not a match."""
+        from services.answer_cache import SemanticAnswerCache
+
+        cache = SemanticAnswerCache(threshold=0.95)
+        cache.store(
+            "What is the weather in Nice?", "Mild", route="weather", weather_city="Nice, FR"
+        )
+
+        assert cache.lookup("Weather in Nice tomorrow") is not None
+        assert cache.lookup("What is the weather in Venice?") is None
+        assert cache.lookup("Is it nice weather today?") is None
+
+    def test_per_route_ttl(self, fake_embeddings):
+        """Test that weather answers expire sooner than document answers."""
+        from services.answer_cache import SemanticAnswerCache
+
+        cache = SemanticAnswerCache(
+            threshold=0.95, ttls={"weather": 60, "document": 3600}
+        )
+        with patch("services.answer_cache.time.time", return_value=1000.0):
+            cache.store(
+                "What is the weather in Paris?", "Sunny", route="weather", weather_city="Paris, FR"
+            )
+            cache.store("What is machine learning?", "ML is...", route="other")
+
+        with patch("services.answer_cache.time.time", return_value=1100.0):
+            assert cache.lookup("What is the weather in Paris?") is None
+            assert cache.lookup("What is machine learning?") is not None
+
+    def test_invalidate_documents_keeps_weather(self, fake_embeddings):
+        """Test that ingestion-triggered invalidation only drops document answers."""
+        from services.answer_cache import SemanticAnswerCache
+
+        cache = SemanticAnswerCache(threshold=0.95)
+        cache.store(
+            "What is the weather in Paris?", "Sunny", route="weather", weather_city="Paris, FR"
+        )
+        cache.store("What is machine learning?", "ML is...", route="other")
+
+        removed = cache.invalidate("document")
+
+        assert removed == 1
+        assert cache.lookup("What is machine learning?") is None
+        assert cache.lookup("What is the weather in Paris?") is not None
+
+    def test_maxsize_evicts_oldest(self, fake_embeddings):
+        """Test that the oldest entry is dropped when the cache is full."""
+        from services.answer_cache import SemanticAnswerCache
+
+        cache = SemanticAnswerCache(threshold=0.95, maxsize=1)
+        cache.store("What is machine learning?", "ML is...", route="other")
+        cache.store("How do I reset the router?", "Hold the button", route="other")
+
+        assert cache.lookup("What is machine learning?") is None
+        assert cache.lookup("How do I reset the router?") is not None
+
+
+class TestCacheNodes:
+    """Test suite for the graph cache nodes."""
+
+    def test_workflow_short_circuits_on_hit(self, sample_agent_state):
+        """Test that a cache hit skips every LLM call."""
+        from graph import app
+
+        sample_agent_state["user_query"] = "What is machine learning?"
+        entry = {"answer": "ML is...", "route": "other", "weather_city": None}
+
+        with patch("graph.nodes.cache.answer_cache.lookup", return_value=entry):
+            with patch("graph.nodes.decision.get_llm_response") as mock_llm:
+                result = app.invoke({"user_query": sample_agent_state["user_query"]})
+
+                assert result["cache_hit"] is True
+                assert result["final_answer"] == "ML is..."
+                mock_llm.assert_not_called()
+
+    def test_lookup_failure_is_a_miss(self, sample_agent_state):
+        """Test that cache errors fall through to the normal graph."""
+        from graph.nodes.cache import cache_lookup_node_fn
+
+        with patch("graph.nodes.cache.answer_cache.lookup", side_effect=Exception("boom")):
+            result = cache_lookup_node_fn(sample_agent_state)
+
+            assert result["cache_hit"] is False
+
+    def test_store_skips_failed_runs(self, sample_agent_state):
+        """Test that answers from runs with errors are not cached."""
+        from graph.nodes.cache import cache_store_node_fn
+
+        sample_agent_state["llm_response"] = "partial"
+        sample_agent_state["errors"] = ["LLM error"]
+
+        with patch("graph.nodes.cache.answer_cache.store") as mock_store:
+            cache_store_node_fn(sample_agent_state)
+
+            mock_store.assert_not_called()
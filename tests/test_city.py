@@ -0,0 +1,141 @@
+"""
+Test cases for city extraction and the offline gazetteer.
+"""
+import pytest
+from unittest.mock import patch
+from graph.nodes.city import city_node_fn
+from services.gazetteer import Gazetteer, extract_city, load_gazetteer
+
+
+class TestGazetteer:
+    """Test suite for gazetteer lookups."""
+
+    @pytest.mark.parametrize(
+        "query,expected",
+        [
+            ("What's the weather in London?", "London"),
+            ("Will it rain tomorrow in New York?", "New York"),
+            ("temperature in sao paulo today", "Sao Paulo"),
+            ("Weather in São Paulo", "Sao Paulo"),
+            ("Is it cold in St. Petersburg?", "Saint Petersburg"),
+            ("how hot is it in LA", "Los Angeles"),
+        ],
+    )
+    def test_extract_city_bundled_table(self, query, expected):
+        """Test extraction of well-known cities from the bundled table."""
+        match = extract_city(query)
+
+        assert match is not None
+        assert match["name"] == expected
+
+    def test_extract_city_returns_coordinates(self):
+        """Test that matches include country code and coordinates."""
+        match = extract_city("Weather in Tokyo")
+
+        assert match["country"] == "JP"
+        assert match["lat"] == pytest.approx(35.69, abs=0.01)
+        assert match["lon"] == pytest.approx(139.69, abs=0.01)
+
+    def test_extract_city_no_match(self):
+        """Test that queries without a known city return None."""
+        assert extract_city("What is machine learning?") is None
+
+    def test_common_words_need_preposition(self):
+        """Test that city names that are everyday words are not over-matched."""
+        assert extract_city("Is it nice outside?") is None
+        assert extract_city("Is it nice in Nice?")["country"] == "FR"
+
+    def test_prefers_more_populous_city(self):
+        """Test that ambiguous names resolve to the larger city."""
+        gazetteer = Gazetteer()
+        gazetteer.add("Paris", "US", 33.66, -95.56, 25000)
+        gazetteer.add("Paris", "FR", 48.85, 2.35, 2100000)
+
+        assert gazetteer.find("weather in paris")["country"] == "FR"
+
+    def test_prefers_requested_country(self):
+        """Test that a known country code overrides population."""
+        gazetteer = Gazetteer()
+        gazetteer.add("Paris", "US", 33.66, -95.56, 25000)
+        gazetteer.add("Paris", "FR", 48.85, 2.35, 2100000)
+
+        assert gazetteer.find("Paris, US", country="US")["country"] == "US"
+
+    def test_prefers_longest_match(self):
+        """Test that multi-word names beat their single-word suffix."""
+        gazetteer = Gazetteer()
+        gazetteer.add("York", "GB", 53.96, -1.08, 150000)
+        gazetteer.add("New York", "US", 40.71, -74.0, 8800000)
+
+        assert gazetteer.find("weather in new york")["name"] == "New York"
+
+    def test_load_geonames_dump(self, tmp_path):
+        """Test loading a raw GeoNames cities file."""
+        row = [""] * 19
+        row[1], row[2], row[3] = "München", "Muenchen", "Munich,Monaco di Baviera"
+        row[4], row[5], row[8], row[14] = "48.13743", "11.57549", "DE", "1260391"
+        path = tmp_path / "cities15000.txt"
+        path.write_text("\t".join(row) + "\n", encoding="utf-8")
+
+        gazetteer = load_gazetteer(str(path))
+
+        assert gazetteer.find("weather in munich")["name"] == "München"
+
+
+class TestCityNode:
+    """Test suite for the city extraction node."""
+
+    def test_city_node_uses_gazetteer(self, sample_agent_state):
+        """Test that known cities are resolved without the LLM."""
+        sample_agent_state["user_query"] = "What is the weather in Sydney?"
+
+        with patch("graph.nodes.city.get_llm_response") as mock_llm:
+            result = city_node_fn(sample_agent_state)
+
+            assert result["weather_city"] == "Sydney, AU"
+            assert result["weather_coords"]["lat"] == pytest.approx(-33.87, abs=0.01)
+            mock_llm.assert_not_called()
+
+    def test_city_node_falls_back_to_llm(self, sample_agent_state):
+        """Test that unknown places are extracted by the LLM."""
+        sample_agent_state["user_query"] = "What is the weather in Timbuktu?"
+
+        with patch("graph.nodes.city.get_llm_response") as mock_llm:
+            mock_llm.return_value = "Timbuktu, ML"
+
+            result = city_node_fn(sample_agent_state)
+
+            assert result["weather_city"] == "Timbuktu, ML"
+            mock_llm.assert_called_once()
+
+    def test_city_node_error_handling(self, sample_agent_state):
+        """Test that extraction errors are reported in state."""
+        sample_agent_state["user_query"] = "What is the weather in Timbuktu?"
+
+        with patch("graph.nodes.city.get_llm_response", side_effect=Exception("LLM error")):
+            result = city_node_fn(sample_agent_state)
+
+            assert result["errors"] == ["LLM error"]
+
+    def test_city_node_keeps_fused_extraction(self, sample_agent_state):
+        """Test that a city from the fused route call is reused, not re-extracted."""
+        sample_agent_state["user_query"] = "How's it looking out in Timbuktu?"
+        sample_agent_state["weather_city"] = "Timbuktu, ML"
+
+        with patch("graph.nodes.city.get_llm_response") as mock_llm:
+            result = city_node_fn(sample_agent_state)
+
+            assert result["weather_city"] == "Timbuktu, ML"
+            mock_llm.assert_not_called()
+
+    def test_city_node_adds_coordinates_to_fused_city(self, sample_agent_state):
+        """Test that a fused-call city is geocoded in the requested country."""
+        sample_agent_state["user_query"] = "Weather for Paris please"
+        sample_agent_state["weather_city"] = "Paris, FR"
+
+        with patch("graph.nodes.city.get_llm_response") as mock_llm:
+            result = city_node_fn(sample_agent_state)
+
+            assert result["weather_city"] == "Paris, FR"
+            assert result["weather_coords"] is not None
+            mock_llm.assert_not_called()
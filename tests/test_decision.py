@@ -1,11 +1,19 @@
 """
 Test cases for decision making and routing logic.
 """
+import numpy as np
 import pytest
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 from graph.nodes.decision import decision_node_fn
 
 
+@pytest.fixture(autouse=True)
+def llm_only_router():
+    """Exercise the LLM routing path unless a test enables the fast path."""
+    with patch("graph.nodes.decision.ROUTER_FAST_PATH", False):
+        yield
+
+
 class TestDecisionNode:
     """Test suite for decision node and routing logic."""
 
@@ -21,6 +29,15 @@ class TestDecisionNode:
             assert result["route"] == "weather"
             mock_llm.assert_called_once()
 
+    def test_decision_node_uses_router_profile(self, sample_agent_state):
+        """Test that routing generates with the short, deterministic profile."""
+        with patch("graph.nodes.decision.get_llm_response") as mock_llm:
+            mock_llm.return_value = "weather"
+
+            decision_node_fn(sample_agent_state)
+
+            assert mock_llm.call_args.kwargs["profile"] == "router"
+
     def test_decision_node_general_route(self, sample_agent_state):
         """Test decision node routes general queries correctly."""
         sample_agent_state["user_query"] = "What is machine learning?"
@@ -143,3 +160,180 @@ class TestRoutingLogic:
             result = decision_node_fn(sample_agent_state)
 
             assert "route" in result
+
+
+class TestFastPathRouter:
+    """Test suite for the rule and embedding fast-path router."""
+
+    @pytest.fixture(autouse=True)
+    def fast_path(self):
+        with patch("graph.nodes.decision.ROUTER_FAST_PATH", True):
+            yield
+
+    @pytest.fixture
+    def exemplar_space(self):
+        """Two-dimensional embedding space: x is weather, y is other."""
+        weather = np.array([[1.0, 0.0]], dtype=np.float32)
+        other = np.array([[0.0, 1.0]], dtype=np.float32)
+        embeddings = MagicMock()
+
+        with patch("graph.router._get_exemplar_vectors", return_value=(weather, other)):
+            with patch("graph.router.get_query_embeddings", return_value=embeddings):
+                yield embeddings
+
+    @pytest.mark.parametrize(
+        "query",
+        [
+            "What's the weather in London?",
+            "Will it rain tomorrow in Rome?",
+            "Current temperature in Tokyo",
+            "Is it sunny in Madrid?",
+        ],
+    )
+    def test_rules_route_weather_without_llm(self, sample_agent_state, query):
+        """Test that obvious weather queries skip the LLM."""
+        sample_agent_state["user_query"] = query
+
+        with patch("graph.nodes.decision.get_llm_response") as mock_llm:
+            result = decision_node_fn(sample_agent_state)
+
+            assert result["route"] == "weather"
+            assert result["route_source"] == "rules"
+            mock_llm.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "query",
+        [
+            "What is the operating temperature range of the sensor?",
+            "How should storm water drainage be designed?",
+            "What is the maximum rain load for the roof in section 4?",
+            "Explain the fog computing architecture",
+            "Convert the boiling point from Celsius to Fahrenheit",
+            "Explain the forecast model in chapter 3",
+            "What is the sales forecast for next year?",
+            "What is the operating temperature right now?",
+        ],
+    )
+    def test_rules_leave_technical_weather_words_undecided(self, query):
+        """Test that weather words without a known city are left to the LLM."""
+        from graph.router import classify_by_rules
+
+        assert classify_by_rules(query) is None
+
+    def test_rules_confidence_reflects_cue(self):
+        """Test that cue-based weather matches score below explicit ones."""
+        from graph.router import classify_by_rules
+
+        assert classify_by_rules("What's the weather?") == ("weather", 0.95)
+        assert classify_by_rules("What's the forecast for Lisbon?") == ("weather", 0.85)
+        assert classify_by_rules("Is it foggy in Oslo?") == ("weather", 0.85)
+
+    def test_rules_route_document_questions(self, sample_agent_state):
+        """Test that document phrasing routes to RAG without the LLM."""
+        sample_agent_state["user_query"] = "What does the manual say about setup?"
+
+        with patch("graph.nodes.decision.get_llm_response") as mock_llm:
+            result = decision_node_fn(sample_agent_state)
+
+            assert result["route"] == "other"
+            assert result["route_confidence"] > 0
+            mock_llm.assert_not_called()
+
+    def test_embedding_classifier_confident(self, sample_agent_state, exemplar_space):
+        """Test that a clear embedding margin decides the route."""
+        exemplar_space.embed_query.return_value = [0.1, 0.9]
+        sample_agent_state["user_query"] = "Explain transformers"
+
+        with patch("graph.nodes.decision.get_llm_response") as mock_llm:
+            result = decision_node_fn(sample_agent_state)
+
+            assert result["route"] == "other"
+            assert result["route_source"] == "embedding"
+            mock_llm.assert_not_called()
+
+    def test_ambiguous_query_falls_back_to_llm(self, sample_agent_state, exemplar_space):
+        """Test that a small embedding margin defers to the LLM."""
+        exemplar_space.embed_query.return_value = [0.7, 0.7]
+        sample_agent_state["user_query"] = "Is Paris nice in spring?"
+
+        with patch("graph.nodes.decision.get_llm_response") as mock_llm:
+            mock_llm.return_value = "other"
+
+            result = decision_node_fn(sample_agent_state)
+
+            assert result["route"] == "other"
+            assert result["route_source"] == "llm"
+            mock_llm.assert_called_once()
+
+    def test_embedding_failure_falls_back_to_llm(self, sample_agent_state):
+        """Test that an unavailable embedding model does not break routing."""
+        sample_agent_state["user_query"] = "Is Paris nice in spring?"
+
+        with patch("graph.router._get_exemplar_vectors", side_effect=Exception("no model")):
+            with patch("graph.nodes.decision.get_llm_response") as mock_llm:
+                mock_llm.return_value = "other"
+
+                result = decision_node_fn(sample_agent_state)
+
+                assert result["route_source"] == "llm"
+
+
+class TestFusedRouteNode:
+    """Test suite for the fused route-and-city node."""
+
+    @pytest.fixture(autouse=True)
+    def llm_only(self):
+        with patch("graph.nodes.route.ROUTER_FAST_PATH", False):
+            yield
+
+    def test_route_node_extracts_route_and_city(self, sample_agent_state):
+        """Test that one structured call fills both route and city."""
+        from graph.nodes.route import route_node_fn
+
+        sample_agent_state["user_query"] = "Is it going to be chilly in Oslo tonight?"
+
+        with patch("graph.nodes.route.get_structured_llm_response") as mock_llm:
+            mock_llm.return_value = {"route": "weather", "city": "Oslo", "country": "no"}
+
+            result = route_node_fn(sample_agent_state)
+
+            assert result["route"] == "weather"
+            assert result["weather_city"] == "Oslo, NO"
+            assert result["route_source"] == "llm"
+            mock_llm.assert_called_once()
+
+    def test_route_node_other_route_has_no_city(self, sample_agent_state):
+        """Test that non-weather routes leave the city empty."""
+        from graph.nodes.route import route_node_fn
+
+        sample_agent_state["user_query"] = "Explain transformers"
+
+        with patch("graph.nodes.route.get_structured_llm_response") as mock_llm:
+            mock_llm.return_value = {"route": "other", "city": None, "country": None}
+
+            result = route_node_fn(sample_agent_state)
+
+            assert result["route"] == "other"
+            assert result["weather_city"] is None
+
+    def test_route_node_malformed_output_defaults_to_other(self, sample_agent_state):
+        """Test that unparseable output does not crash routing."""
+        from graph.nodes.route import route_node_fn
+
+        with patch("graph.nodes.route.get_structured_llm_response", return_value={}):
+            result = route_node_fn(sample_agent_state)
+
+            assert result["route"] == "other"
+
+    def test_route_node_error_handling(self, sample_agent_state):
+        """Test that LLM failures fall back to the RAG route."""
+        from graph.nodes.route import route_node_fn
+
+        with patch(
+            "graph.nodes.route.get_structured_llm_response",
+            side_effect=Exception("LLM error"),
+        ):
+            result = route_node_fn(sample_agent_state)
+
+            assert result["route"] == "rag"
+            assert result["errors"] == ["LLM error"]
@@ -129,3 +129,139 @@ class TestEmbeddingVectorOperations:
         )
 
         assert 0 <= sim <= 1
+
+
+class TestEmbeddingRegistry:
+    """Test suite for the shared embedding model registry."""
+
+    def test_get_embeddings_reuses_loaded_model(self):
+        """Test that the model is only constructed once per process."""
+        with patch("services.embedding_service.HuggingFaceEmbeddings") as mock_embeddings_class:
+            first = get_embeddings()
+            second = get_embeddings()
+
+            assert first is second
+            mock_embeddings_class.assert_called_once()
+
+    def test_get_embeddings_keyed_by_device(self):
+        """Test that different devices get separate model instances."""
+        with patch("services.embedding_service.HuggingFaceEmbeddings") as mock_embeddings_class:
+            mock_embeddings_class.side_effect = lambda **kwargs: MagicMock()
+
+            cpu = get_embeddings(device="cpu")
+            cuda = get_embeddings(device="cuda")
+
+            assert cpu is not cuda
+            assert mock_embeddings_class.call_count == 2
+
+    def test_get_embeddings_thread_safe(self):
+        """Test that concurrent first calls load the model only once."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        with patch("services.embedding_service.HuggingFaceEmbeddings") as mock_embeddings_class:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                results = list(executor.map(lambda _: get_embeddings(), range(16)))
+
+            assert all(result is results[0] for result in results)
+            mock_embeddings_class.assert_called_once()
+
+    def test_warmup_embeddings_runs_inference(self):
+        """Test that warmup loads the model and embeds a probe query."""
+        from services.embedding_service import warmup_embeddings
+
+        with patch("services.embedding_service.HuggingFaceEmbeddings") as mock_embeddings_class:
+            embeddings = warmup_embeddings()
+
+            embeddings.embed_query.assert_called_once()
+            mock_embeddings_class.assert_called_once()
+
+    def test_set_embedding_model_swaps_active_model(self):
+        """Test swapping the active model without a restart."""
+        from services.embedding_service import (
+            get_embedding_model_name,
+            set_embedding_model,
+        )
+
+        original = get_embedding_model_name()
+        try:
+            with patch("services.embedding_service.HuggingFaceEmbeddings") as mock_embeddings_class:
+                set_embedding_model("sentence-transformers/all-mpnet-base-v2")
+                get_embeddings()
+
+                assert "all-mpnet-base-v2" in str(mock_embeddings_class.call_args)
+        finally:
+            set_embedding_model(original)
+
+
+class TestQueryEmbeddingCache:
+    """Test suite for the cached query embeddings wrapper."""
+
+    def test_embed_query_cached(self, mock_embeddings):
+        """Test that repeated queries are only embedded once."""
+        from services.embedding_service import CachedQueryEmbeddings
+
+        cached = CachedQueryEmbeddings(mock_embeddings, "test-model")
+        first = cached.embed_query("What is AI?")
+        second = cached.embed_query("What is AI?")
+
+        assert first == second
+        mock_embeddings.embed_query.assert_called_once()
+
+    def test_embed_query_normalizes_key(self, mock_embeddings):
+        """Test that case and whitespace variants share a cache entry."""
+        from services.embedding_service import CachedQueryEmbeddings
+
+        cached = CachedQueryEmbeddings(mock_embeddings, "test-model")
+        cached.embed_query("What is AI?")
+        cached.embed_query("  what   is ai?  ")
+
+        mock_embeddings.embed_query.assert_called_once()
+
+    def test_embed_query_keyed_by_model(self, mock_embeddings):
+        """Test that different models do not share cached vectors."""
+        from services.embedding_service import CachedQueryEmbeddings
+
+        CachedQueryEmbeddings(mock_embeddings, "model-a").embed_query("query")
+        CachedQueryEmbeddings(mock_embeddings, "model-b").embed_query("query")
+
+        assert mock_embeddings.embed_query.call_count == 2
+
+    def test_embed_documents_not_cached(self, mock_embeddings):
+        """Test that document embedding passes straight through."""
+        from services.embedding_service import CachedQueryEmbeddings
+
+        mock_embeddings.embed_documents.return_value = [[0.1] * 384]
+        cached = CachedQueryEmbeddings(mock_embeddings, "test-model")
+        cached.embed_documents(["chunk"])
+        cached.embed_documents(["chunk"])
+
+        assert mock_embeddings.embed_documents.call_count == 2
+
+    def test_cache_records_hits_and_misses(self, mock_embeddings):
+        """Test that the shared cache exposes hit/miss counters."""
+        from services.embedding_service import CachedQueryEmbeddings, query_cache
+
+        cached = CachedQueryEmbeddings(mock_embeddings, "test-model")
+        cached.embed_query("query")
+        cached.embed_query("query")
+
+        stats = query_cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_embed_queries_batches_uncached(self, mock_embeddings):
+        """Uncached queries are embedded in one call and then reused."""
+        from services.embedding_service import CachedQueryEmbeddings
+
+        mock_embeddings.embed_documents.side_effect = lambda texts: [
+            [float(len(text))] for text in texts
+        ]
+        cached = CachedQueryEmbeddings(mock_embeddings, "test-model")
+        cached.embed_query("cached")
+
+        vectors = cached.embed_queries(["cached", "one", "two", "ONE"])
+
+        mock_embeddings.embed_documents.assert_called_once_with(["one", "two"])
+        assert vectors[1:] == [[3.0], [3.0], [3.0]]
+        assert cached.embed_query("two") == [3.0]
+        mock_embeddings.embed_query.assert_called_once()
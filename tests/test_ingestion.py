@@ -0,0 +1,472 @@
+"""
+Test cases for the document ingestion pipeline.
+"""
+import threading
+
+import pytest
+from unittest.mock import patch, MagicMock
+
+from rag.ingestion import (
+    create_collection,
+    ingest_directory,
+    ingest_pdf_to_qdrant,
+    quantization_config,
+    upsert_chunks,
+)
+from rag.manifest import IngestionManifest, point_id, source_key
+from rag.pipeline import run_ingestion_pipeline
+
+
+def write_pdf(path, pages):
+    """Write a minimal PDF with one line of text per page."""
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        content_id = len(objects)
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    body = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(body))
+        body += f"{number} 0 obj\n{obj}\nendobj\n".encode()
+    xref = len(body)
+    body += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        body += f"{offset:010d} 00000 n \n".encode()
+    body += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    path.write_bytes(body)
+    return path
+
+
+@pytest.fixture
+def pdf_dir(tmp_path):
+    """Directory with two small PDFs."""
+    write_pdf(tmp_path / "a.pdf", ["Alpha page one", "Alpha page two"])
+    write_pdf(tmp_path / "b.pdf", ["Beta page one"])
+    return tmp_path
+
+
+@pytest.fixture
+def fake_embeddings():
+    embeddings = MagicMock()
+    embeddings.embed_documents.side_effect = lambda texts: [[0.1, 0.2, 0.3] for _ in texts]
+    return embeddings
+
+
+class TestUpsertChunks:
+    """Test suite for batched point upserts."""
+
+    def test_upsert_chunks_batches_points(self):
+        """Points are split into upsert requests of at most batch_size."""
+        client = MagicMock()
+        chunks = [MagicMock(page_content=f"chunk {i}", metadata={"page": i}) for i in range(5)]
+        vectors = [[float(i)] for i in range(5)]
+
+        written = upsert_chunks(client, "documents", chunks, vectors, batch_size=2)
+
+        assert written == 5
+        sizes = [len(c.kwargs["points"]) for c in client.upsert.call_args_list]
+        assert sizes == [2, 2, 1]
+
+    def test_upsert_chunks_payload_layout(self):
+        """Payload matches the QdrantVectorStore page_content/metadata keys."""
+        client = MagicMock()
+        chunk = MagicMock(page_content="hello", metadata={"source": "a.pdf"})
+
+        upsert_chunks(client, "documents", [chunk], [[0.5, 0.5]])
+
+        point = client.upsert.call_args.kwargs["points"][0]
+        assert point.payload == {"page_content": "hello", "metadata": {"source": "a.pdf"}}
+        assert point.vector == [0.5, 0.5]
+
+
+class TestCollectionSettings:
+    """Test suite for collection storage and index settings."""
+
+    def test_quantization_modes(self):
+        """Each mode maps to its Qdrant quantization config."""
+        assert quantization_config("none") is None
+        assert quantization_config("scalar").scalar.always_ram is True
+        assert quantization_config("binary").binary.always_ram is True
+
+    def test_unknown_quantization_is_rejected(self):
+        """A typo in VECTOR_QUANTIZATION fails instead of storing float32."""
+        with pytest.raises(ValueError):
+            quantization_config("int4")
+
+    def test_create_collection_applies_settings(self):
+        """On-disk, HNSW and quantization settings reach Qdrant."""
+        client = MagicMock()
+
+        with patch("rag.ingestion.VECTORS_ON_DISK", True), \
+                patch("rag.ingestion.PAYLOAD_ON_DISK", True), \
+                patch("rag.ingestion.HNSW_M", 32):
+            create_collection(client, "documents", 384, quantization="scalar")
+
+        kwargs = client.create_collection.call_args.kwargs
+        assert kwargs["vectors_config"].size == 384
+        assert kwargs["vectors_config"].on_disk is True
+        assert kwargs["on_disk_payload"] is True
+        assert kwargs["hnsw_config"].m == 32
+        assert kwargs["quantization_config"].scalar is not None
+        assert kwargs["sparse_vectors_config"]["sparse"].index.on_disk is True
+
+
+class TestIngestionPipeline:
+    """Test suite for the parallel directory ingestion pipeline."""
+
+    @pytest.mark.parametrize("workers", [0, 2])
+    def test_pipeline_ingests_all_files(self, pdf_dir, fake_embeddings, workers):
+        """Every page is parsed, embedded and upserted."""
+        client = MagicMock()
+        with patch("rag.pipeline.get_embeddings", return_value=fake_embeddings):
+            with patch("rag.pipeline.get_qdrant_client", return_value=client):
+                stats = run_ingestion_pipeline(
+                    [str(pdf_dir / "a.pdf"), str(pdf_dir / "b.pdf")],
+                    workers=workers,
+                )
+
+        assert stats["files"] == 2
+        assert stats["pages"] == 3
+        assert stats["chunks"] == 3
+        assert stats["points"] == 3
+        assert "pages_per_sec" in stats and "chunks_per_sec" in stats
+        texts = [p.payload["page_content"] for c in client.upsert.call_args_list for p in c.kwargs["points"]]
+        assert sorted(texts) == ["Alpha page one", "Alpha page two", "Beta page one"]
+
+    def test_pipeline_batches_embeddings_across_files(self, pdf_dir, fake_embeddings):
+        """Chunks from different files share embedding batches."""
+        with patch("rag.pipeline.get_embeddings", return_value=fake_embeddings):
+            with patch("rag.pipeline.get_qdrant_client", return_value=MagicMock()):
+                run_ingestion_pipeline(
+                    [str(pdf_dir / "a.pdf"), str(pdf_dir / "b.pdf")],
+                    workers=0,
+                    embed_batch_size=2,
+                )
+
+        sizes = [len(c.args[0]) for c in fake_embeddings.embed_documents.call_args_list]
+        assert sizes == [2, 1]
+
+    def test_pipeline_skips_unreadable_files(self, pdf_dir, fake_embeddings):
+        """A broken PDF is counted as failed without stopping the run."""
+        (pdf_dir / "broken.pdf").write_bytes(b"not a pdf")
+        with patch("rag.pipeline.get_embeddings", return_value=fake_embeddings):
+            with patch("rag.pipeline.get_qdrant_client", return_value=MagicMock()):
+                stats = run_ingestion_pipeline(
+                    [str(pdf_dir / "broken.pdf"), str(pdf_dir / "b.pdf")],
+                    workers=0,
+                )
+
+        assert stats["failed"] == 1
+        assert stats["files"] == 1
+
+    @pytest.mark.parametrize("workers", [0, 2])
+    def test_pipeline_raises_upload_errors(self, pdf_dir, fake_embeddings, workers):
+        """Qdrant failures surface to the caller without hanging the workers."""
+        client = MagicMock()
+        client.upsert.side_effect = ConnectionError("qdrant down")
+        with patch("rag.pipeline.get_embeddings", return_value=fake_embeddings):
+            with patch("rag.pipeline.get_qdrant_client", return_value=client):
+                with pytest.raises(ConnectionError):
+                    run_ingestion_pipeline(
+                        [str(pdf_dir / "a.pdf"), str(pdf_dir / "b.pdf")],
+                        workers=workers,
+                        embed_batch_size=1,
+                        queue_size=1,
+                    )
+
+    def test_ingest_directory_invalidates_answer_cache(self, pdf_dir):
+        """Directory ingestion initialises the collection and drops document answers."""
+        with patch("rag.ingestion.initialize_qdrant_collection") as mock_init:
+            with patch(
+                "rag.pipeline.run_ingestion_pipeline",
+                return_value={"files": 2, "points": 3, "removed": 0},
+            ) as mock_run:
+                with patch("rag.ingestion.answer_cache") as mock_cache:
+                    stats = ingest_directory(str(pdf_dir), workers=0)
+
+        assert stats["files"] == 2
+        mock_init.assert_called_once_with("documents")
+        assert len(mock_run.call_args.args[0]) == 2
+        mock_cache.invalidate.assert_called_once_with("document")
+
+
+class TestIncrementalIngestion:
+    """Test suite for manifest-driven incremental ingestion."""
+
+    def run(self, paths, manifest, embeddings, client=None):
+        with patch("rag.pipeline.get_embeddings", return_value=embeddings):
+            with patch("rag.pipeline.get_qdrant_client", return_value=client or MagicMock()):
+                return run_ingestion_pipeline(
+                    [str(p) for p in paths], workers=0, manifest=manifest
+                )
+
+    def test_point_ids_are_deterministic(self):
+        """The same chunk of the same file always gets the same ID."""
+        assert point_id("/docs/a.pdf", "abc") == point_id("/docs/a.pdf", "abc")
+        assert point_id("/docs/a.pdf", "abc") != point_id("/docs/b.pdf", "abc")
+
+    def test_unchanged_file_is_skipped(self, pdf_dir, fake_embeddings):
+        """A second run over the same file embeds and upserts nothing."""
+        manifest = IngestionManifest()
+        path = pdf_dir / "a.pdf"
+        self.run([path], manifest, fake_embeddings)
+        fake_embeddings.embed_documents.reset_mock()
+        client = MagicMock()
+
+        stats = self.run([path], manifest, fake_embeddings, client)
+
+        assert stats["skipped"] == 1
+        assert stats["points"] == 0
+        fake_embeddings.embed_documents.assert_not_called()
+        client.upsert.assert_not_called()
+
+    def test_changed_file_only_embeds_new_chunks(self, pdf_dir, fake_embeddings):
+        """Kept chunks are reused, new ones embedded, removed ones deleted."""
+        manifest = IngestionManifest()
+        path = pdf_dir / "a.pdf"
+        self.run([path], manifest, fake_embeddings)
+        old_ids = manifest.point_ids("documents", source_key(str(path)))
+
+        write_pdf(path, ["Alpha page one", "Alpha page three"])
+        fake_embeddings.embed_documents.reset_mock()
+        client = MagicMock()
+        stats = self.run([path], manifest, fake_embeddings, client)
+
+        fake_embeddings.embed_documents.assert_called_once_with(["Alpha page three"])
+        assert stats["points"] == 1
+        assert stats["removed"] == 1
+        deleted = client.delete.call_args.kwargs["points_selector"].points
+        assert len(deleted) == 1 and deleted[0] in old_ids
+
+    def test_duplicate_chunks_are_stored_once(self, tmp_path, fake_embeddings):
+        """Identical chunks within a file collapse to a single point."""
+        path = write_pdf(tmp_path / "dup.pdf", ["Same text", "Same text"])
+
+        stats = self.run([path], IngestionManifest(), fake_embeddings)
+
+        assert stats["pages"] == 2
+        assert stats["points"] == 1
+
+    def test_manifest_persists_between_runs(self, tmp_path, pdf_dir, fake_embeddings):
+        """A saved manifest lets a new process skip already ingested files."""
+        manifest_path = str(tmp_path / "manifest.json")
+        self.run([pdf_dir / "b.pdf"], IngestionManifest(manifest_path), fake_embeddings)
+
+        stats = self.run([pdf_dir / "b.pdf"], IngestionManifest(manifest_path), fake_embeddings)
+
+        assert stats["skipped"] == 1
+
+    def test_concurrent_saves_keep_both_entries(self, tmp_path):
+        """Two runs sharing a manifest file do not drop each other's sources."""
+        manifest_path = str(tmp_path / "manifest.json")
+        stale = IngestionManifest(manifest_path)
+        stale.update("documents", "/docs/old.pdf", "h0", ["p0"])
+        stale.save()
+
+        manifests = [IngestionManifest(manifest_path) for _ in range(2)]
+        manifests[0].update("documents", "/docs/a.pdf", "h1", ["p1"])
+        manifests[1].update("documents", "/docs/b.pdf", "h2", ["p2"])
+        manifests[1].remove("documents", "/docs/old.pdf")
+        barrier = threading.Barrier(2)
+
+        def save(manifest):
+            barrier.wait()
+            manifest.save()
+
+        threads = [threading.Thread(target=save, args=(m,)) for m in manifests]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        manifest = IngestionManifest(manifest_path)
+        assert sorted(manifest.sources("documents")) == ["/docs/a.pdf", "/docs/b.pdf"]
+        assert manifest.point_ids("documents", "/docs/a.pdf") == {"p1"}
+
+    def test_failed_upload_does_not_update_manifest(self, tmp_path, pdf_dir, fake_embeddings):
+        """Files are retried after an upsert failure."""
+        manifest_path = str(tmp_path / "manifest.json")
+        client = MagicMock()
+        client.upsert.side_effect = ConnectionError("qdrant down")
+        with pytest.raises(ConnectionError):
+            self.run([pdf_dir / "b.pdf"], IngestionManifest(manifest_path), fake_embeddings, client)
+
+        stats = self.run([pdf_dir / "b.pdf"], IngestionManifest(manifest_path), fake_embeddings)
+
+        assert stats["skipped"] == 0
+        assert stats["points"] == 1
+
+    def test_ingest_directory_removes_deleted_files(self, tmp_path, pdf_dir, fake_embeddings):
+        """Points of a PDF removed from the directory are deleted."""
+        manifest_path = str(tmp_path / "manifest.json")
+        client = MagicMock()
+        with patch("rag.manifest.INGESTION_MANIFEST_PATH", manifest_path):
+            with patch("rag.ingestion.initialize_qdrant_collection"):
+                with patch("rag.ingestion.get_qdrant_client", return_value=client):
+                    with patch("rag.pipeline.get_qdrant_client", return_value=client):
+                        with patch("rag.pipeline.get_embeddings", return_value=fake_embeddings):
+                            ingest_directory(str(pdf_dir), workers=0)
+                            (pdf_dir / "b.pdf").unlink()
+                            stats = ingest_directory(str(pdf_dir), workers=0)
+
+        assert stats["skipped"] == 1
+        assert stats["removed"] == 1
+        manifest = IngestionManifest(manifest_path)
+        assert manifest.get("documents", source_key(str(pdf_dir / "b.pdf"))) is None
+
+    def test_ingest_pdf_raises_on_unreadable_file(self, tmp_path):
+        """Single-file ingestion surfaces parse errors to the caller."""
+        path = tmp_path / "broken.pdf"
+        path.write_bytes(b"not a pdf")
+        with patch("rag.ingestion.initialize_qdrant_collection"):
+            with patch("rag.pipeline.get_qdrant_client", return_value=MagicMock()):
+                with patch("rag.pipeline.get_embeddings", return_value=MagicMock()):
+                    with pytest.raises(ValueError):
+                        ingest_pdf_to_qdrant(str(path))
+
+
+class TestStreamingIngestion:
+    """Test suite for page-by-page streaming ingestion."""
+
+    def test_pages_are_streamed_lazily(self, tmp_path):
+        """Chunks of the first page are available before later pages are read."""
+        from rag.ingestion import iter_page_chunks
+
+        path = write_pdf(tmp_path / "long.pdf", [f"Page {i}" for i in range(5)])
+        with patch("rag.ingestion.PyPDFLoader") as mock_loader:
+            pages = iter(
+                [MagicMock(page_content=f"Page {i}", metadata={"page": i}) for i in range(5)]
+            )
+            mock_loader.return_value.lazy_load.return_value = pages
+            with patch("rag.ingestion.make_splitter") as mock_splitter:
+                mock_splitter.return_value.split_documents.side_effect = lambda docs: docs
+                stream = iter_page_chunks(str(path))
+                first = next(stream)
+
+        assert first[0].page_content == "Page 0"
+        mock_loader.return_value.load.assert_not_called()
+        assert len(list(pages)) == 4
+
+    def test_embedding_batches_span_pages(self, tmp_path, fake_embeddings):
+        """Embedding batches are filled across page boundaries."""
+        path = write_pdf(tmp_path / "long.pdf", [f"Page {i}" for i in range(5)])
+        with patch("rag.pipeline.get_embeddings", return_value=fake_embeddings):
+            with patch("rag.pipeline.get_qdrant_client", return_value=MagicMock()):
+                stats = run_ingestion_pipeline([str(path)], workers=0, embed_batch_size=2)
+
+        sizes = [len(c.args[0]) for c in fake_embeddings.embed_documents.call_args_list]
+        assert sizes == [2, 2, 1]
+        assert stats["pages"] == 5
+
+    def test_peak_memory_is_reported(self, pdf_dir, fake_embeddings):
+        """Each run reports its memory high-water mark."""
+        with patch("rag.pipeline.get_embeddings", return_value=fake_embeddings):
+            with patch("rag.pipeline.get_qdrant_client", return_value=MagicMock()):
+                stats = run_ingestion_pipeline([str(pdf_dir / "a.pdf")], workers=0)
+
+        assert stats["peak_memory_mb"] > 0
+        assert stats["peak_worker_memory_mb"] == 0
+
+    def test_peak_memory_covers_this_run_only(self, pdf_dir, fake_embeddings):
+        """The peak is the largest sample of the run, not of the process."""
+        samples = []
+
+        def rss(values):
+            def sample():
+                samples.append(values[min(len(samples), len(values) - 1)])
+                return samples[-1]
+            return sample
+
+        with patch("rag.pipeline.get_embeddings", return_value=fake_embeddings):
+            with patch("rag.pipeline.get_qdrant_client", return_value=MagicMock()):
+                with patch("rag.pipeline._rss_mb", side_effect=rss([900.0])):
+                    first = run_ingestion_pipeline([str(pdf_dir / "a.pdf")], workers=0)
+                samples.clear()
+                with patch("rag.pipeline._rss_mb", side_effect=rss([100.0, 180.0, 120.0])):
+                    second = run_ingestion_pipeline([str(pdf_dir / "a.pdf")], workers=0)
+
+        assert first["peak_memory_mb"] == 900.0
+        assert second["peak_memory_mb"] == 180.0
+        assert len(samples) > 3
+
+    def test_workers_report_their_peak_memory(self, pdf_dir, fake_embeddings):
+        """Parsing processes send the peak they sampled for their files."""
+        with patch("rag.pipeline.get_embeddings", return_value=fake_embeddings):
+            with patch("rag.pipeline.get_qdrant_client", return_value=MagicMock()):
+                stats = run_ingestion_pipeline(
+                    [str(pdf_dir / "a.pdf"), str(pdf_dir / "b.pdf")], workers=1
+                )
+
+        assert stats["files"] == 2
+        assert stats["peak_worker_memory_mb"] > 0
+
+    def test_peak_memory_does_not_trace_allocations(self, pdf_dir, fake_embeddings):
+        """Reporting memory leaves Python allocation tracing off."""
+        import tracemalloc
+
+        with patch("rag.pipeline.get_embeddings", return_value=fake_embeddings):
+            with patch("rag.pipeline.get_qdrant_client", return_value=MagicMock()):
+                run_ingestion_pipeline([str(pdf_dir / "a.pdf")], workers=0)
+
+        assert not tracemalloc.is_tracing()
+
+    def test_peak_memory_can_be_disabled(self, pdf_dir, fake_embeddings):
+        """Memory tracing is skipped when turned off."""
+        with patch("rag.pipeline.INGESTION_TRACE_MEMORY", False):
+            with patch("rag.pipeline.get_embeddings", return_value=fake_embeddings):
+                with patch("rag.pipeline.get_qdrant_client", return_value=MagicMock()):
+                    stats = run_ingestion_pipeline([str(pdf_dir / "a.pdf")], workers=0)
+
+        assert "peak_memory_mb" not in stats
+
+    def test_progress_is_reported_per_page(self, tmp_path, fake_embeddings):
+        """The progress callback sees running page and chunk counts."""
+        path = write_pdf(tmp_path / "long.pdf", [f"Page {i}" for i in range(3)])
+        updates = []
+        with patch("rag.pipeline.get_embeddings", return_value=fake_embeddings):
+            with patch("rag.pipeline.get_qdrant_client", return_value=MagicMock()):
+                run_ingestion_pipeline([str(path)], workers=0, progress=updates.append)
+
+        assert [u["pages"] for u in updates] == [1, 2, 3]
+        assert updates[-1]["chunks"] == 3
+
+    def test_cancel_keeps_uploaded_pages_resumable(self, tmp_path, fake_embeddings):
+        """A cancelled run uploads what it parsed and the next run finishes the rest."""
+        from rag.pipeline import IngestionCancelled
+
+        path = write_pdf(tmp_path / "long.pdf", [f"Page {i}" for i in range(4)])
+        manifest = IngestionManifest()
+        cancel = threading.Event()
+
+        def stop_after_two(counts):
+            if counts["pages"] == 2:
+                cancel.set()
+
+        with patch("rag.pipeline.get_embeddings", return_value=fake_embeddings):
+            with patch("rag.pipeline.get_qdrant_client", return_value=MagicMock()):
+                with pytest.raises(IngestionCancelled):
+                    run_ingestion_pipeline(
+                        [str(path)],
+                        workers=0,
+                        manifest=manifest,
+                        progress=stop_after_two,
+                        cancel_event=cancel,
+                    )
+                fake_embeddings.embed_documents.reset_mock()
+                stats = run_ingestion_pipeline([str(path)], workers=0, manifest=manifest)
+
+        assert stats["points"] == 2
+        fake_embeddings.embed_documents.assert_called_once_with(["Page 2", "Page 3"])
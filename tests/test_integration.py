@@ -3,6 +3,7 @@ Integration tests for the complete agentic workflow.
 """
 import pytest
 from unittest.mock import patch, MagicMock
+from langchain_core.documents import Document
 from graph.state import AgentState
 
 
@@ -174,3 +175,461 @@ class TestEndToEndScenarios:
 
         assert sample_agent_state["user_query"] == query
         assert expected_field in sample_agent_state
+
+
+class TestAsyncWorkflow:
+    """Test suite for the async execution path."""
+
+    @pytest.fixture(autouse=True)
+    def offline_graph(self):
+        """Disable the answer cache and keep LangSmith off the network."""
+        with patch("graph.nodes.cache.SEMANTIC_CACHE_ENABLED", False):
+            with patch("graph.nodes.evaluation.Client"):
+                yield
+
+    def test_weather_query_ainvoke(self):
+        """Test the weather path end to end through app.ainvoke."""
+        import asyncio
+        from unittest.mock import AsyncMock
+        from graph import app
+
+        async def answer_tokens(prompt, system=None):
+            for token in ["It's 15°C", " in London"]:
+                yield token
+
+        with patch("graph.nodes.weather.afetch_weather", new_callable=AsyncMock) as mock_weather:
+            with patch("graph.nodes.answer.astream_llm_response", side_effect=answer_tokens):
+                with patch("graph.nodes.answer.stream_llm_response") as mock_sync_answer:
+                    mock_weather.return_value = {"main": {"temp": 15}}
+
+                    result = asyncio.run(app.ainvoke({"user_query": "What's the weather in London?"}))
+
+                    assert result["route"] == "weather"
+                    assert result["weather_city"] == "London, GB"
+                    assert result["llm_response"] == "It's 15°C in London"
+                    mock_weather.assert_awaited_once()
+                    mock_sync_answer.assert_not_called()
+
+    def test_document_query_ainvoke(self):
+        """Test the RAG path end to end through app.ainvoke."""
+        import asyncio
+        from unittest.mock import AsyncMock
+        from graph import app
+
+        docs = [(Document(page_content="ML content"), 0.9)]
+
+        async def answer_tokens(prompt, system=None):
+            yield "Machine learning is..."
+
+        with patch("graph.nodes.context.aretrieve_with_scores", new_callable=AsyncMock) as mock_retrieve:
+            with patch("graph.nodes.answer.astream_llm_response", side_effect=answer_tokens):
+                mock_retrieve.return_value = docs
+
+                result = asyncio.run(
+                    app.ainvoke({"user_query": "Summarize the uploaded document"})
+                )
+
+                assert result["rag_context"] == "ML content"
+                assert result["llm_response"] == "Machine learning is..."
+
+    def test_concurrent_conversations_share_event_loop(self):
+        """Test that many conversations overlap instead of running serially."""
+        import asyncio
+        import time
+        from graph import app
+
+        async def slow_answer(prompt, system=None):
+            await asyncio.sleep(0.1)
+            yield "answer"
+
+        async def slow_retrieve(query, k):
+            await asyncio.sleep(0.1)
+            return [(Document(page_content="content"), 0.9)]
+
+        async def run_all():
+            return await asyncio.gather(*(
+                app.ainvoke({"user_query": f"Summarize the document, part {i}"})
+                for i in range(50)
+            ))
+
+        with patch("graph.nodes.context.aretrieve_with_scores", side_effect=slow_retrieve):
+            with patch("graph.nodes.answer.astream_llm_response", side_effect=slow_answer):
+                start = time.perf_counter()
+                results = asyncio.run(run_all())
+                elapsed = time.perf_counter() - start
+
+        assert all(result["llm_response"] == "answer" for result in results)
+        # 50 serial runs would take at least 10 seconds
+        assert elapsed < 5
+
+
+class TestStreaming:
+    """Test suite for token streaming through the graph."""
+
+    @pytest.fixture(autouse=True)
+    def offline_graph(self):
+        with patch("graph.nodes.cache.SEMANTIC_CACHE_ENABLED", False):
+            with patch("graph.nodes.evaluation.Client"):
+                yield
+
+    def test_answer_node_records_ttft(self, sample_agent_state):
+        """Test that the answer node joins tokens and records time to first token."""
+        from graph.nodes.answer import answer_node_fn
+
+        sample_agent_state["route"] = "other"
+        sample_agent_state["rag_context"] = "context"
+
+        with patch("graph.nodes.answer.stream_llm_response", return_value=iter(["Hello", " world"])):
+            result = answer_node_fn(sample_agent_state)
+
+        assert result["llm_response"] == "Hello world"
+        assert result["llm_ttft_ms"] is not None
+        assert result["llm_ttft_ms"] >= 0
+
+    def test_graph_streams_answer_tokens(self):
+        """Test that answer tokens surface through stream_mode="messages"."""
+        from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+        from langchain_core.messages import AIMessage
+        from graph import app
+
+        fake_llm = GenericFakeChatModel(messages=iter([AIMessage(content="Machine learning is fun")]))
+        docs = [(Document(page_content="ML content"), 0.9)]
+
+        with patch("services.llm_service.llm", fake_llm):
+            with patch("graph.nodes.context.retrieve_with_scores", return_value=docs):
+                tokens = []
+                final = None
+                for mode, payload in app.stream(
+                    {"user_query": "Summarize the document"},
+                    stream_mode=["messages", "values"],
+                ):
+                    if mode == "messages":
+                        chunk, metadata = payload
+                        if metadata.get("langgraph_node") == "answer_node":
+                            tokens.append(chunk.content)
+                    else:
+                        final = payload
+
+        assert len(tokens) > 1
+        assert "".join(tokens) == "Machine learning is fun"
+        assert final["llm_response"] == "Machine learning is fun"
+        assert final["evaluation_metrics"]["ttft_ms"] is not None
+
+
+class TestNoContextShortCircuit:
+    """Test suite for answering when retrieval finds nothing relevant."""
+
+    def state(self, **overrides):
+        state = {"user_query": "What is the warranty period?", "route": "other", "rag_context": ""}
+        state.update(overrides)
+        return state
+
+    def test_skip_mode_answers_without_llm(self):
+        """No context and skip mode returns the canned answer."""
+        from graph.nodes.answer import answer_node_fn
+        from prompts import NO_CONTEXT_ANSWER
+
+        with patch("graph.nodes.answer.NO_CONTEXT_MODE", "skip"):
+            with patch("graph.nodes.answer.stream_llm_response") as mock_stream:
+                state = answer_node_fn(self.state())
+
+        mock_stream.assert_not_called()
+        assert state["llm_response"] == NO_CONTEXT_ANSWER
+        assert state["llm_input"] is None
+
+    def test_shrink_mode_sends_short_prompt(self):
+        """No context and shrink mode calls the LLM with the short prompt."""
+        from graph.nodes.answer import answer_node_fn
+
+        with patch("graph.nodes.answer.NO_CONTEXT_MODE", "shrink"):
+            with patch("graph.nodes.answer.stream_llm_response", return_value=iter(["General answer"])):
+                state = answer_node_fn(self.state())
+
+        assert state["llm_response"] == "General answer"
+        assert "Data context" not in state["llm_input"]
+        assert state["user_query"] in state["llm_input"]
+
+    def test_context_present_uses_document_prompt(self):
+        """Relevant context keeps the normal document answer path."""
+        from graph.nodes.answer import answer_node_fn
+
+        with patch("graph.nodes.answer.NO_CONTEXT_MODE", "skip"):
+            with patch("graph.nodes.answer.stream_llm_response", return_value=iter(["Two years"])):
+                state = answer_node_fn(self.state(rag_context="Warranty: two years."))
+
+        assert state["llm_response"] == "Two years"
+        assert "Warranty: two years." in state["llm_input"]
+
+    def test_weather_route_is_not_short_circuited(self):
+        """Weather answers never depend on document context."""
+        from graph.nodes.answer import answer_node_fn
+
+        with patch("graph.nodes.answer.NO_CONTEXT_MODE", "skip"):
+            with patch("graph.nodes.answer.stream_llm_response", return_value=iter(["Sunny"])):
+                state = answer_node_fn(self.state(route="weather", weather_data={"temp": 20}))
+
+        assert state["llm_response"] == "Sunny"
+
+    @pytest.mark.parametrize("mode", ["skip", "shrink"])
+    def test_retrieval_failure_is_not_reported_as_no_context(self, mode):
+        """A failed search answers with an error, not "nothing relevant"."""
+        from graph.nodes.answer import answer_node_fn
+        from graph.nodes.context import context_node_fn
+        from prompts import NO_CONTEXT_ANSWER, RETRIEVAL_ERROR_ANSWER
+
+        state = {"user_query": "What is the warranty period?", "route": "other"}
+        with patch("graph.nodes.context.retrieve_with_scores", side_effect=ConnectionError("Qdrant down")):
+            state.update(context_node_fn(dict(state)))
+
+        with patch("graph.nodes.answer.NO_CONTEXT_MODE", mode):
+            with patch("graph.nodes.answer.stream_llm_response") as mock_stream:
+                state = answer_node_fn(state)
+
+        mock_stream.assert_not_called()
+        assert state["llm_response"] == RETRIEVAL_ERROR_ANSWER
+        assert state["llm_response"] != NO_CONTEXT_ANSWER
+        assert state["errors"] == ["Qdrant down"]
+
+    def test_async_skip_mode(self):
+        """The async answer node short-circuits the same way."""
+        import asyncio
+        from graph.nodes.answer import aanswer_node_fn
+        from prompts import NO_CONTEXT_ANSWER
+
+        with patch("graph.nodes.answer.NO_CONTEXT_MODE", "skip"):
+            with patch("graph.nodes.answer.astream_llm_response") as mock_stream:
+                state = asyncio.run(aanswer_node_fn(self.state()))
+
+        mock_stream.assert_not_called()
+        assert state["llm_response"] == NO_CONTEXT_ANSWER
+
+
+class TestBatchRunner:
+    """Test suite for the batch query runner."""
+
+    @pytest.fixture(autouse=True)
+    def offline_graph(self):
+        """Disable the answer cache and keep LangSmith off the network."""
+        with patch("graph.nodes.cache.SEMANTIC_CACHE_ENABLED", False):
+            with patch("graph.nodes.evaluation.Client"):
+                with patch("graph.batch.get_query_embeddings"):
+                    yield
+
+    def test_results_in_order_with_prefetched_docs(self):
+        """Each query gets its own answer and retrieval is batched per window."""
+        from graph.batch import run_batch
+
+        def batch_docs(queries, k):
+            return [[(Document(page_content=f"About {q}"), 0.9)] for q in queries]
+
+        queries = [f"Summarize the document, part {i}" for i in range(5)]
+
+        with patch("graph.batch.retrieve_batch", side_effect=batch_docs) as mock_batch:
+            with patch("graph.nodes.context.retrieve_with_scores") as mock_single:
+                with patch(
+                    "graph.nodes.answer.stream_llm_response",
+                    side_effect=lambda prompt: iter([prompt.split("About ")[1][:30]]),
+                ):
+                    results = run_batch(queries, window=2, max_concurrency=2)
+
+        assert [r["user_query"] for r in results] == queries
+        assert [r["rag_context"] for r in results] == [f"About {q}" for q in queries]
+        assert all("prefetched_docs" not in r for r in results)
+        assert mock_batch.call_count == 3
+        mock_single.assert_not_called()
+
+    def test_weather_queries_skip_prefetch(self):
+        """Queries the rules route to weather are not searched."""
+        from graph.batch import prefetch
+
+        with patch("graph.batch.retrieve_batch", return_value=[[]]) as mock_batch:
+            states = prefetch(["What's the weather in Paris?", "Summarize the report"])
+
+        mock_batch.assert_called_once_with(["Summarize the report"], k=3)
+        assert "prefetched_docs" not in states[0]
+        assert states[1]["prefetched_docs"] == []
+
+    def test_prefetch_failure_falls_back_to_graph_retrieval(self):
+        """A failed batch search leaves retrieval to the context node."""
+        from graph.batch import run_batch
+
+        docs = [(Document(page_content="Fallback content"), 0.9)]
+
+        with patch("graph.batch.retrieve_batch", side_effect=ConnectionError("down")):
+            with patch("graph.nodes.context.retrieve_with_scores", return_value=docs):
+                with patch("graph.nodes.answer.stream_llm_response", return_value=iter(["ok"])):
+                    results = run_batch(["Summarize the document"])
+
+        assert results[0]["rag_context"] == "Fallback content"
+
+    def test_failed_item_reports_error(self):
+        """An exception in one query is returned as that item's error."""
+        from graph.batch import run_batch
+
+        with patch("graph.batch.retrieve_batch", return_value=[[], []]):
+            with patch("graph.batch.app") as mock_app:
+                mock_app.batch.return_value = [{"user_query": "a"}, ValueError("boom")]
+                results = run_batch(["a", "b"])
+
+        assert results[0] == {"user_query": "a"}
+        assert results[1] == {"user_query": "b", "errors": ["boom"]}
+        assert mock_app.batch.call_args.kwargs["return_exceptions"] is True
+
+    def test_concurrency_is_capped(self):
+        """No more than max_concurrency queries reach the LLM at once."""
+        import threading
+        import time
+        from graph.batch import run_batch
+
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+
+        def slow_answer(prompt, system=None):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+            yield "answer"
+
+        docs = [(Document(page_content="content"), 0.9)]
+        with patch("graph.batch.retrieve_batch", side_effect=lambda q, k: [docs] * len(q)):
+            with patch("graph.nodes.answer.stream_llm_response", side_effect=slow_answer):
+                results = run_batch(
+                    (f"Summarize the document, part {i}" for i in range(12)),
+                    window=6,
+                    max_concurrency=3,
+                )
+
+        assert len(results) == 12
+        assert all(r["llm_response"] == "answer" for r in results)
+        assert 1 < peak[0] <= 3
+
+
+class TestSpeculativeBranches:
+    """Test suite for running both graph branches alongside routing."""
+
+    docs = [(Document(page_content="ML content"), 0.9)]
+
+    @staticmethod
+    def slow_route(route):
+        import time
+
+        def route_fn(state):
+            time.sleep(0.2)
+            state["route"] = route
+            return state
+
+        async def aroute_fn(state):
+            import asyncio
+
+            await asyncio.sleep(0.2)
+            state["route"] = route
+            return state
+
+        return route_fn, aroute_fn
+
+    def test_retrieval_overlaps_routing(self):
+        """Document queries get their search results while routing runs."""
+        import time
+        from graph.nodes import speculative_node
+
+        def slow_retrieve(query, k):
+            time.sleep(0.2)
+            return self.docs
+
+        node, _ = speculative_node(*self.slow_route("other"))
+
+        with patch("graph.nodes.speculate.retrieve_with_scores", side_effect=slow_retrieve):
+            start = time.perf_counter()
+            state = node({"user_query": "Explain transformers"})
+            elapsed = time.perf_counter() - start
+
+        assert state["prefetched_docs"] == self.docs
+        assert elapsed < 0.35
+
+    def test_weather_route_discards_retrieval(self):
+        """Weather queries drop the search and leave the city to the city node."""
+        from graph.nodes import speculative_node, speculation_stats
+
+        node, _ = speculative_node(*self.slow_route("weather"))
+
+        with patch("graph.nodes.speculate.retrieve_with_scores", return_value=self.docs):
+            state = node({"user_query": "Is Paris nice in spring?"})
+
+        assert state.get("prefetched_docs") is None
+        assert state.get("weather_city") is None
+        assert speculation_stats["discarded"] >= 1
+
+    def test_busy_pool_routes_without_speculation(self):
+        """With every worker busy the search runs after routing, not queued."""
+        import threading
+        from graph.nodes import speculative_node
+
+        node, _ = speculative_node(*self.slow_route("other"))
+        busy = threading.BoundedSemaphore(1)
+        busy.acquire()
+
+        with patch("graph.nodes.speculate._slots", busy):
+            with patch("graph.nodes.speculate.retrieve_with_scores") as mock_retrieve:
+                state = node({"user_query": "Explain transformers"})
+
+        mock_retrieve.assert_not_called()
+        assert state["route"] == "other"
+        assert state.get("prefetched_docs") is None
+
+    def test_rules_decided_query_is_not_speculated(self):
+        """Queries the rules route at once skip speculative retrieval."""
+        from graph.nodes import speculative_node
+
+        route_fn, aroute_fn = self.slow_route("weather")
+        node, _ = speculative_node(route_fn, aroute_fn)
+
+        with patch("graph.nodes.speculate.retrieve_with_scores") as mock_retrieve:
+            state = node({"user_query": "What's the weather in London?"})
+
+        mock_retrieve.assert_not_called()
+        assert state["route"] == "weather"
+
+    def test_async_weather_route_cancels_retrieval(self):
+        """The async node cancels the losing search instead of awaiting it."""
+        import asyncio
+        from graph.nodes import speculative_node
+
+        cancelled = []
+
+        async def slow_retrieve(query, k):
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(query)
+                raise
+
+        async def run(anode):
+            state = await anode({"user_query": "Is Paris nice in spring?"})
+            await asyncio.sleep(0)
+            return state
+
+        _, anode = speculative_node(*self.slow_route("weather"))
+
+        with patch("graph.nodes.speculate.aretrieve_with_scores", side_effect=slow_retrieve):
+            state = asyncio.run(run(anode))
+
+        assert cancelled == ["Is Paris nice in spring?"]
+        assert state["route"] == "weather"
+
+    def test_graph_uses_speculative_results(self):
+        """The context node builds the answer context from the prefetched search."""
+        from graph.nodes import context_node_fn, speculative_node
+
+        node, _ = speculative_node(*self.slow_route("other"))
+
+        with patch("graph.nodes.speculate.retrieve_with_scores", return_value=self.docs):
+            state = node({"user_query": "Explain transformers"})
+        with patch("graph.nodes.context.retrieve_with_scores") as mock_retrieve:
+            state = context_node_fn(state)
+
+        mock_retrieve.assert_not_called()
+        assert state["rag_context"] == "ML content"
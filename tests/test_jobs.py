@@ -0,0 +1,152 @@
+"""
+Test cases for the background ingestion job queue.
+"""
+import threading
+import time
+
+import pytest
+from unittest.mock import patch
+
+from rag.jobs import IngestionJobQueue
+from rag.pipeline import IngestionCancelled
+
+
+def wait_for(queue, job_id, statuses, timeout=5.0):
+    """Poll until the job reaches one of the given statuses."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job stayed {queue.get(job_id)['status']}")
+
+
+@pytest.fixture
+def job_queue(tmp_path):
+    queue = IngestionJobQueue(str(tmp_path / "jobs.db"), retry_delay=0)
+    yield queue
+    queue.shutdown()
+
+
+def fake_ingest(pdf_path, progress=None, cancel_event=None, **kwargs):
+    for page in range(1, 4):
+        progress({"pages": page, "chunks": page * 2, "points": page})
+    return {"pages": 3, "chunks": 6, "points": 3}
+
+
+class TestIngestionJobQueue:
+    """Test suite for IngestionJobQueue."""
+
+    def test_job_completes_with_progress(self, job_queue):
+        """A finished job records its final counts."""
+        with patch("rag.jobs.ingest_pdf_to_qdrant", side_effect=fake_ingest):
+            job_id = job_queue.submit("doc.pdf")
+            job = wait_for(job_queue, job_id, {"done"})
+
+        assert job["pages"] == 3
+        assert job["chunks"] == 6
+        assert job["attempts"] == 1
+
+    def test_progress_is_visible_while_running(self, job_queue):
+        """Page progress is written while ingestion is still running."""
+        release = threading.Event()
+
+        def slow_ingest(pdf_path, progress=None, cancel_event=None, **kwargs):
+            progress({"pages": 1, "chunks": 2, "points": 0})
+            release.wait(5)
+            return {"pages": 2, "chunks": 4, "points": 4}
+
+        with patch("rag.jobs.ingest_pdf_to_qdrant", side_effect=slow_ingest):
+            job_id = job_queue.submit("doc.pdf")
+            deadline = time.time() + 5
+            while job_queue.get(job_id)["pages"] != 1 and time.time() < deadline:
+                time.sleep(0.01)
+            job = job_queue.get(job_id)
+            release.set()
+            wait_for(job_queue, job_id, {"done"})
+
+        assert job["status"] == "running"
+        assert job["pages"] == 1
+
+    def test_failed_job_is_retried(self, job_queue):
+        """A transient failure is retried automatically."""
+        calls = []
+
+        def flaky_ingest(pdf_path, **kwargs):
+            calls.append(pdf_path)
+            if len(calls) == 1:
+                raise ConnectionError("qdrant down")
+            return fake_ingest(pdf_path, **kwargs)
+
+        with patch("rag.jobs.ingest_pdf_to_qdrant", side_effect=flaky_ingest):
+            job_id = job_queue.submit("doc.pdf")
+            job = wait_for(job_queue, job_id, {"done"})
+
+        assert job["attempts"] == 2
+        assert job["error"] is None
+
+    def test_job_fails_after_max_attempts(self, job_queue):
+        """Persistent errors mark the job failed with the last message."""
+        with patch("rag.jobs.ingest_pdf_to_qdrant", side_effect=ValueError("bad pdf")):
+            job_id = job_queue.submit("doc.pdf")
+            job = wait_for(job_queue, job_id, {"failed"})
+
+        assert job["attempts"] == job_queue.max_attempts
+        assert job["error"] == "bad pdf"
+
+    def test_cancel_running_job(self, job_queue):
+        """Cancelling sets the event seen by the ingestion pipeline."""
+        started = threading.Event()
+
+        def blocking_ingest(pdf_path, cancel_event=None, **kwargs):
+            started.set()
+            cancel_event.wait(5)
+            raise IngestionCancelled("stopped")
+
+        with patch("rag.jobs.ingest_pdf_to_qdrant", side_effect=blocking_ingest):
+            job_id = job_queue.submit("doc.pdf")
+            started.wait(5)
+            assert job_queue.cancel(job_id) is True
+            job = wait_for(job_queue, job_id, {"cancelled"})
+
+        assert job["attempts"] == 1
+
+    def test_retry_cancelled_job(self, job_queue):
+        """A cancelled job can be run again."""
+        with patch("rag.jobs.ingest_pdf_to_qdrant", side_effect=IngestionCancelled("stopped")):
+            job_id = job_queue.submit("doc.pdf")
+            wait_for(job_queue, job_id, {"cancelled"})
+
+        with patch("rag.jobs.ingest_pdf_to_qdrant", side_effect=fake_ingest):
+            assert job_queue.retry(job_id) is True
+            job = wait_for(job_queue, job_id, {"done"})
+
+        assert job["attempts"] == 1
+        assert job_queue.retry(job_id) is False
+
+    def test_unfinished_jobs_resume_after_restart(self, tmp_path):
+        """Jobs left queued by a previous process run when the queue reopens."""
+        db_path = str(tmp_path / "jobs.db")
+        with patch("rag.jobs.ingest_pdf_to_qdrant", side_effect=IngestionCancelled("stopped")):
+            first = IngestionJobQueue(db_path, retry_delay=0)
+            job_id = first.submit("doc.pdf")
+            first._stopping = True
+            wait_for(first, job_id, {"queued"})
+            first.shutdown()
+
+        with patch("rag.jobs.ingest_pdf_to_qdrant", side_effect=fake_ingest):
+            second = IngestionJobQueue(db_path, retry_delay=0)
+            job = wait_for(second, job_id, {"done"})
+            second.shutdown()
+
+        assert job["pages"] == 3
+
+    def test_list_jobs_newest_first(self, job_queue):
+        """Jobs are listed most recent first."""
+        with patch("rag.jobs.ingest_pdf_to_qdrant", side_effect=fake_ingest):
+            first = job_queue.submit("a.pdf")
+            second = job_queue.submit("b.pdf")
+            wait_for(job_queue, second, {"done"})
+
+        assert [job["id"] for job in job_queue.list_jobs()] == [second, first]
@@ -2,7 +2,7 @@
 Test cases for LLM service and processing.
 """
 import pytest
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 from services.llm_service import get_llm_response
 
 
@@ -76,3 +76,356 @@ class TestLLMService:
             response = get_llm_response(prompt)
 
             assert isinstance(response, str)
+
+
+class TestStructuredLLMResponse:
+    """Test suite for JSON-mode LLM calls."""
+
+    def test_structured_response_passes_schema(self, mock_chat_ollama):
+        """Test that the JSON schema is sent as Ollama's format option."""
+        from services.llm_service import get_structured_llm_response
+
+        mock_chat_ollama.invoke.return_value.content = '{"route": "weather"}'
+        schema = {"type": "object"}
+
+        with patch("services.llm_service.llm", mock_chat_ollama):
+            result = get_structured_llm_response("prompt", schema)
+
+            assert result == {"route": "weather"}
+            assert mock_chat_ollama.invoke.call_args.kwargs["format"] == schema
+
+    @pytest.mark.parametrize(
+        "text,expected",
+        [
+            ('{"route": "other"}', {"route": "other"}),
+            ('```json\n{"route": "other"}\n```', {"route": "other"}),
+            ('Sure! {"route": "weather", "city": "Oslo"} Hope this helps.', {"route": "weather", "city": "Oslo"}),
+            ("weather", {}),
+            ("[1, 2]", {}),
+        ],
+    )
+    def test_parse_json_response(self, text, expected):
+        """Test tolerant parsing of model JSON output."""
+        from services.llm_service import parse_json_response
+
+        assert parse_json_response(text) == expected
+
+
+class TestLLMProfiles:
+    """Test suite for per-node LLM profiles."""
+
+    def test_default_profile_uses_client_settings(self):
+        """Calls without a profile send no per-call overrides."""
+        from services.llm_service import profile_kwargs
+
+        assert profile_kwargs() == {}
+        assert profile_kwargs("answer") == {}
+
+    def test_profile_overrides_model_and_options(self):
+        """A named profile sends its model, options and keep_alive."""
+        from services.llm_service import profile_kwargs
+
+        profiles = {"router": {
+            "model": "tiny:0.5b", "temperature": 0.0, "max_tokens": 8,
+            "stop": ["\n"], "keep_alive": "30m", "num_ctx": 0,
+        }}
+        with patch("services.llm_service.LLM_PROFILES", profiles):
+            kwargs = profile_kwargs("router")
+
+        assert kwargs == {
+            "model": "tiny:0.5b",
+            "options": {"temperature": 0.0, "num_predict": 8, "stop": ["\n"]},
+            "keep_alive": "30m",
+        }
+
+    def test_unknown_profile_raises(self):
+        """A typo in a profile name is an error, not the default model."""
+        from services.llm_service import profile_kwargs
+
+        with pytest.raises(ValueError):
+            profile_kwargs("routr")
+
+    def test_profile_reaches_ollama_request(self):
+        """The profile replaces the client's options in the Ollama request."""
+        from langchain_core.messages import HumanMessage
+        from services.llm_service import llm, profile_kwargs
+
+        params = llm._chat_params([HumanMessage(content="hi")], **profile_kwargs("city"))
+
+        assert params["options"]["temperature"] == 0.0
+        assert params["options"]["num_predict"] == 16
+        assert params["options"]["stop"] == ["\n"]
+
+    def test_get_llm_response_passes_profile(self, mock_chat_ollama):
+        """The profile is applied to the shared client per call."""
+        with patch("services.llm_service.llm", mock_chat_ollama):
+            get_llm_response("Classify this", profile="router")
+
+        kwargs = mock_chat_ollama.invoke.call_args.kwargs
+        assert kwargs["options"]["num_predict"] == 8
+        assert kwargs["options"]["temperature"] == 0.0
+
+
+class TestPromptPrefix:
+    """Test suite for static prompt prefixes and model warmup."""
+
+    def test_system_prompt_sent_first(self, mock_chat_ollama):
+        """The static prefix is a leading system message."""
+        with patch("services.llm_service.llm", mock_chat_ollama):
+            get_llm_response("User query: hi", system="Classify queries.")
+
+        messages = mock_chat_ollama.invoke.call_args.args[0]
+        assert [m.type for m in messages] == ["system", "human"]
+        assert messages[0].content == "Classify queries."
+        assert messages[1].content == "User query: hi"
+
+    def test_system_prompt_is_byte_identical_across_queries(self):
+        """Nodes send the same system prompt whatever the query."""
+        from graph.nodes.decision import decision_node_fn
+
+        systems = []
+        with patch("graph.nodes.decision.ROUTER_FAST_PATH", False):
+            with patch("graph.nodes.decision.get_llm_response", return_value="other") as mock_llm:
+                for query in ("Summarize the report", "Weather in Oslo?"):
+                    decision_node_fn({"user_query": query})
+                    systems.append(mock_llm.call_args.kwargs["system"])
+
+        assert systems[0] == systems[1]
+        assert "{" not in systems[0]
+
+    def test_warmup_prefills_each_prefix(self, mock_chat_ollama):
+        """Warmup sends each system prompt once with a one-token cap."""
+        from services.llm_service import warmup_llm
+
+        with patch("services.llm_service.llm", mock_chat_ollama):
+            timings = warmup_llm({
+                "router": ("router", "Route it."),
+                "document_answer": ("answer", "Answer it."),
+            })
+
+        assert set(timings) == {"router", "document_answer"}
+        calls = mock_chat_ollama.invoke.call_args_list
+        assert calls[0].args[0][0].content == "Route it."
+        assert all(call.kwargs["options"]["num_predict"] == 1 for call in calls)
+        assert calls[1].kwargs["options"]["temperature"] == 0.7
+
+    def test_warmup_failure_is_skipped(self, mock_chat_ollama):
+        """An unreachable Ollama server does not stop the app from starting."""
+        from services.llm_service import warmup_llm
+
+        mock_chat_ollama.invoke.side_effect = ConnectionError("refused")
+        with patch("services.llm_service.llm", mock_chat_ollama):
+            timings = warmup_llm({"router": ("router", "Route it.")})
+
+        assert timings == {}
+
+
+class TestLLMGateway:
+    """Test suite for the LLM admission gateway."""
+
+    def test_in_flight_requests_are_capped(self):
+        """No more than max_in_flight requests hold a slot at once."""
+        import threading
+        import time
+        from services.llm_gateway import LLMGateway
+
+        gateway = LLMGateway(max_in_flight=2, max_queue=10, queue_timeout=5)
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+
+        def request():
+            with gateway.slot():
+                with lock:
+                    running[0] += 1
+                    peak[0] = max(peak[0], running[0])
+                time.sleep(0.02)
+                with lock:
+                    running[0] -= 1
+
+        threads = [threading.Thread(target=request) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert peak[0] == 2
+        stats = gateway.stats()
+        assert stats["completed"] == 6
+        assert stats["in_flight"] == 0
+        assert stats["peak_queue_depth"] >= 1
+
+    def test_interactive_requests_overtake_batch(self):
+        """Queued interactive requests get the next free slot first."""
+        import threading
+        import time
+        from services.llm_gateway import BATCH, INTERACTIVE, LLMGateway
+
+        gateway = LLMGateway(max_in_flight=1, max_queue=10, queue_timeout=5)
+        order = []
+        held = gateway.acquire()
+
+        def request(name, priority):
+            with gateway.slot(priority=priority):
+                order.append(name)
+
+        threads = [
+            threading.Thread(target=request, args=("batch-1", BATCH)),
+            threading.Thread(target=request, args=("batch-2", BATCH)),
+            threading.Thread(target=request, args=("chat", INTERACTIVE)),
+        ]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.02)
+        gateway.release(held)
+        for thread in threads:
+            thread.join()
+
+        assert order == ["chat", "batch-1", "batch-2"]
+
+    def test_full_queue_rejects(self):
+        """Requests beyond max_queue fail fast instead of waiting."""
+        import threading
+        import time
+        from services.llm_gateway import LLMGateway, LLMQueueFull
+
+        gateway = LLMGateway(max_in_flight=1, max_queue=1, queue_timeout=5)
+        held = gateway.acquire()
+        waiter = threading.Thread(target=lambda: gateway.release(gateway.acquire()))
+        waiter.start()
+        time.sleep(0.02)
+
+        with pytest.raises(LLMQueueFull):
+            gateway.acquire()
+
+        gateway.release(held)
+        waiter.join()
+        assert gateway.stats()["rejected"] == 1
+
+    def test_queue_timeout(self):
+        """Waiting longer than the queue timeout raises LLMTimeout."""
+        from services.llm_gateway import LLMGateway, LLMTimeout
+
+        gateway = LLMGateway(max_in_flight=1, max_queue=5, queue_timeout=0.05)
+        held = gateway.acquire()
+
+        with pytest.raises(LLMTimeout):
+            gateway.acquire()
+
+        gateway.release(held)
+        stats = gateway.stats()
+        assert stats["timeouts"] == 1
+        assert stats["queue_depth"] == 0
+        assert stats["in_flight"] == 0
+
+    def test_cancel_event_aborts_wait(self):
+        """A set cancel event removes the request from the queue."""
+        import threading
+        from services.llm_gateway import LLMCancelled, LLMGateway
+
+        gateway = LLMGateway(max_in_flight=1, max_queue=5, queue_timeout=5)
+        held = gateway.acquire()
+        cancel = threading.Event()
+        threading.Timer(0.05, cancel.set).start()
+
+        with pytest.raises(LLMCancelled):
+            gateway.acquire(cancel_event=cancel)
+
+        gateway.release(held)
+        assert gateway.stats()["cancelled"] == 1
+
+    def test_cancelled_async_waiter_leaves_queue(self):
+        """Cancelling a waiting task frees its place and leaks no slot."""
+        import asyncio
+        from services.llm_gateway import LLMGateway
+
+        gateway = LLMGateway(max_in_flight=1, max_queue=5, queue_timeout=5)
+
+        async def scenario():
+            held = await gateway.aacquire()
+            waiter = asyncio.create_task(gateway.aacquire())
+            await asyncio.sleep(0.01)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+            gateway.release(held)
+            async with gateway.aslot():
+                return gateway.stats()
+
+        stats = asyncio.run(scenario())
+
+        assert stats["cancelled"] == 1
+        assert stats["queue_depth"] == 0
+        assert stats["in_flight"] == 1
+
+    def test_priority_context_applies_to_calls(self):
+        """llm_priority sets the default priority of requests in the block."""
+        from services.llm_gateway import BATCH, LLMGateway, llm_priority
+
+        gateway = LLMGateway(max_in_flight=1)
+
+        with llm_priority(BATCH):
+            ticket = gateway.acquire()
+        gateway.release(ticket)
+
+        assert ticket.priority == BATCH
+
+    def test_stream_stops_at_request_timeout(self):
+        """A stream running past the request timeout is cut off."""
+        import time
+        from services.llm_gateway import LLMGateway, LLMTimeout
+        from services.llm_service import stream_llm_response
+
+        def slow_stream(messages):
+            for token in ["a", "b", "c"]:
+                time.sleep(0.05)
+                yield MagicMock(content=token)
+
+        fake_llm = MagicMock()
+        fake_llm.stream.side_effect = slow_stream
+        gateway = LLMGateway(max_in_flight=1, request_timeout=0.07)
+
+        with patch("services.llm_service.llm", fake_llm):
+            with patch("services.llm_service.llm_gateway", gateway):
+                tokens = []
+                with pytest.raises(LLMTimeout):
+                    for token in stream_llm_response("prompt"):
+                        tokens.append(token)
+
+        assert tokens == ["a"]
+        assert gateway.stats()["in_flight"] == 0
+
+    def test_llm_calls_go_through_gateway(self, mock_chat_ollama):
+        """Every LLM call takes and returns a gateway slot."""
+        from services.llm_service import llm_gateway
+
+        with patch("services.llm_service.llm", mock_chat_ollama):
+            get_llm_response("What is AI?")
+
+        stats = llm_gateway.stats()
+        assert stats["requests"] == 1
+        assert stats["completed"] == 1
+
+    @pytest.mark.parametrize("request_timeout,expected", [(5, "one two three"), (0.08, None)])
+    def test_sync_call_enforces_request_deadline(self, monkeypatch, request_timeout, expected):
+        """A blocking call stops once generation runs past the request timeout."""
+        import time
+        from langchain_ollama import ChatOllama
+        from services.llm_gateway import LLMGateway, LLMTimeout
+
+        def slow_stream(self, messages, stop=None, **kwargs):
+            for word in ["one ", "two ", "three"]:
+                time.sleep(0.05)
+                yield {"model": "m", "message": {"role": "assistant", "content": word}, "done": False}
+            yield {"model": "m", "message": {"role": "assistant", "content": ""}, "done": True}
+
+        monkeypatch.setattr(
+            "services.llm_service.llm_gateway", LLMGateway(request_timeout=request_timeout)
+        )
+
+        with patch.object(ChatOllama, "_create_chat_stream", slow_stream):
+            if expected is None:
+                with pytest.raises(LLMTimeout):
+                    get_llm_response("hi")
+            else:
+                assert get_llm_response("hi") == expected
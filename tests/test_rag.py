@@ -6,33 +6,42 @@ from unittest.mock import patch, MagicMock
 from rag.retriever import get_vector_store, retrieve_with_scores
 
 
+@pytest.fixture(autouse=True)
+def dense_only_retrieval():
+    """Exercise the dense retrieval path unless a test enables hybrid search."""
+    with patch("rag.retriever.HYBRID_SEARCH", False):
+        yield
+
+
 class TestRetrieval:
     """Test suite for retrieval logic."""
 
     def test_get_vector_store_success(self, mock_embeddings):
         """Test successful vector store initialization."""
         with patch("rag.retriever.get_embeddings", return_value=mock_embeddings):
-            with patch("rag.retriever.QdrantVectorStore.from_existing_collection") as mock_from_collection:
-                mock_vector_store = MagicMock()
-                mock_from_collection.return_value = mock_vector_store
+            with patch("rag.retriever.get_qdrant_client"):
+                with patch("rag.retriever.QdrantVectorStore") as mock_store_class:
+                    mock_vector_store = MagicMock()
+                    mock_store_class.return_value = mock_vector_store
 
-                vector_store = get_vector_store(collection_name="documents")
+                    vector_store = get_vector_store(collection_name="documents")
 
-                assert vector_store == mock_vector_store
-                mock_from_collection.assert_called_once()
+                    assert vector_store == mock_vector_store
+                    mock_store_class.assert_called_once()
 
     def test_get_vector_store_with_custom_collection(self, mock_embeddings):
         """Test vector store with custom collection name."""
         with patch("rag.retriever.get_embeddings", return_value=mock_embeddings):
-            with patch("rag.retriever.QdrantVectorStore.from_existing_collection") as mock_from_collection:
-                mock_vector_store = MagicMock()
-                mock_from_collection.return_value = mock_vector_store
+            with patch("rag.retriever.get_qdrant_client"):
+                with patch("rag.retriever.QdrantVectorStore") as mock_store_class:
+                    mock_vector_store = MagicMock()
+                    mock_store_class.return_value = mock_vector_store
 
-                collection_name = "custom_collection"
-                get_vector_store(collection_name=collection_name)
+                    collection_name = "custom_collection"
+                    get_vector_store(collection_name=collection_name)
 
-                call_args = mock_from_collection.call_args
-                assert call_args.kwargs["collection_name"] == collection_name
+                    call_args = mock_store_class.call_args
+                    assert call_args.kwargs["collection_name"] == collection_name
 
     def test_retrieve_with_scores_success(self):
         """Test successful document retrieval with scores."""
@@ -141,3 +150,575 @@ class TestRetrieval:
 
             with pytest.raises(Exception):
                 retrieve_with_scores("query")
+
+    def test_retrieve_passes_search_params(self):
+        """Quantized collections are searched with oversampling and rescoring."""
+        with patch("rag.retriever.get_vector_store") as mock_get_store:
+            mock_vector_store = MagicMock()
+            mock_vector_store.similarity_search_with_relevance_scores.return_value = []
+            mock_get_store.return_value = mock_vector_store
+
+            with patch("rag.retriever.VECTOR_QUANTIZATION", "binary"):
+                with patch("rag.retriever.SEARCH_OVERSAMPLING", 3.0):
+                    with patch("rag.retriever.SEARCH_HNSW_EF", 128):
+                        retrieve_with_scores("query")
+
+            call_args = mock_vector_store.similarity_search_with_relevance_scores.call_args
+            params = call_args.kwargs["search_params"]
+            assert params.hnsw_ef == 128
+            assert params.quantization.oversampling == 3.0
+            assert params.quantization.rescore is True
+
+
+class TestSearchParams:
+    """Test suite for search-time tuning parameters."""
+
+    def test_defaults_send_no_params(self):
+        """Unquantized search with the default ef needs no parameters."""
+        from rag.retriever import search_params
+
+        assert search_params(hnsw_ef=0, quantized=False) is None
+
+    def test_ef_without_quantization(self):
+        """ef is sent on its own for float32 collections."""
+        from rag.retriever import search_params
+
+        params = search_params(hnsw_ef=256, quantized=False)
+
+        assert params.hnsw_ef == 256
+        assert params.quantization is None
+
+    def test_quantized_search_rescoring_can_be_disabled(self):
+        """Rescoring can be turned off to skip reading the original vectors."""
+        from rag.retriever import search_params
+
+        params = search_params(hnsw_ef=0, oversampling=1.5, rescore=False, quantized=True)
+
+        assert params.hnsw_ef is None
+        assert params.quantization.oversampling == 1.5
+        assert params.quantization.rescore is False
+
+
+class TestVectorStorePooling:
+    """Test suite for shared Qdrant client and vector store handles."""
+
+    def test_get_vector_store_reuses_handle(self, mock_embeddings):
+        """Test that repeated lookups reuse one vector store per collection."""
+        with patch("rag.retriever.get_embeddings", return_value=mock_embeddings):
+            with patch("rag.retriever.get_qdrant_client", return_value=MagicMock()):
+                with patch("rag.retriever.QdrantVectorStore") as mock_store_class:
+                    first = get_vector_store("documents")
+                    second = get_vector_store("documents")
+
+                    assert first is second
+                    mock_store_class.assert_called_once()
+
+    def test_get_vector_store_rebuilds_after_reconnect(self, mock_embeddings):
+        """Test that a new client invalidates the cached handle."""
+        with patch("rag.retriever.get_embeddings", return_value=mock_embeddings):
+            with patch("rag.retriever.get_qdrant_client") as mock_get_client:
+                with patch("rag.retriever.QdrantVectorStore") as mock_store_class:
+                    mock_get_client.return_value = MagicMock()
+                    get_vector_store("documents")
+                    mock_get_client.return_value = MagicMock()
+                    get_vector_store("documents")
+
+                    assert mock_store_class.call_count == 2
+
+    def test_retrieve_with_scores_reconnects_on_connection_error(self):
+        """Test that a dropped connection is retried once on a fresh client."""
+        from qdrant_client.http.exceptions import ResponseHandlingException
+
+        with patch("rag.retriever.get_vector_store") as mock_get_store:
+            with patch("rag.retriever.reset_qdrant_client") as mock_reset:
+                mock_vector_store = MagicMock()
+                mock_vector_store.similarity_search_with_relevance_scores.side_effect = [
+                    ResponseHandlingException(ConnectionError("closed")),
+                    [(MagicMock(), 0.9)],
+                ]
+                mock_get_store.return_value = mock_vector_store
+
+                results = retrieve_with_scores("query")
+
+                assert len(results) == 1
+                mock_reset.assert_called_once()
+
+    def test_qdrant_client_is_shared(self):
+        """Test that the Qdrant client is created once and reused."""
+        from services.qdrant_service import get_qdrant_client
+
+        with patch("services.qdrant_service.QdrantClient") as mock_client_class:
+            first = get_qdrant_client()
+            second = get_qdrant_client()
+
+            assert first is second
+            mock_client_class.assert_called_once()
+
+    def test_qdrant_client_reconnects_when_unhealthy(self):
+        """Test that a failed health check replaces the client."""
+        from services.qdrant_service import get_qdrant_client
+
+        with patch("services.qdrant_service.QdrantClient") as mock_client_class:
+            with patch("services.qdrant_service.QDRANT_HEALTHCHECK_INTERVAL", 0):
+                mock_client_class.side_effect = lambda **kwargs: MagicMock()
+                first = get_qdrant_client()
+                first.get_collections.side_effect = Exception("connection refused")
+
+                second = get_qdrant_client()
+
+                assert second is not first
+
+    def test_replaced_client_is_closed_after_grace_period(self):
+        """Test that in-flight requests can finish on a replaced client."""
+        import time
+        from services.qdrant_service import get_qdrant_client, reset_qdrant_client
+
+        with patch("services.qdrant_service.QdrantClient") as mock_client_class:
+            with patch("services.qdrant_service.QDRANT_TIMEOUT", 0.2):
+                mock_client_class.side_effect = lambda **kwargs: MagicMock()
+                first = get_qdrant_client()
+                reset_qdrant_client()
+
+                first.close.assert_not_called()
+                assert get_qdrant_client() is not first
+
+                deadline = time.monotonic() + 5
+                while not first.close.called and time.monotonic() < deadline:
+                    time.sleep(0.05)
+                first.close.assert_called_once()
+
+    def test_qdrant_health_check_does_not_block_other_callers(self):
+        """Test that a slow health check runs outside the client lock."""
+        import threading
+        from services.qdrant_service import get_qdrant_client
+
+        pinging = threading.Event()
+        release = threading.Event()
+
+        def slow_ping():
+            pinging.set()
+            release.wait(5)
+            return MagicMock()
+
+        with patch("services.qdrant_service.QdrantClient") as mock_client_class:
+            mock_client_class.side_effect = lambda **kwargs: MagicMock()
+            first = get_qdrant_client()
+            first.get_collections.side_effect = slow_ping
+
+            with patch("services.qdrant_service.QDRANT_HEALTHCHECK_INTERVAL", 0):
+                checker = threading.Thread(target=get_qdrant_client)
+                checker.start()
+                assert pinging.wait(5)
+
+            # The check is in flight; another caller gets the client at once
+            result = []
+            caller = threading.Thread(target=lambda: result.append(get_qdrant_client()))
+            caller.start()
+            try:
+                caller.join(1)
+                assert result == [first]
+            finally:
+                release.set()
+                checker.join(5)
+                caller.join(5)
+
+            mock_client_class.assert_called_once()
+
+
+class TestAsyncRetrieval:
+    """Test suite for async retrieval."""
+
+    def test_aretrieve_with_scores(self, mock_embeddings):
+        """Test async retrieval through the async Qdrant client."""
+        import asyncio
+        from unittest.mock import AsyncMock
+        from rag.retriever import aretrieve_with_scores
+
+        point = MagicMock(
+            id="abc",
+            score=0.8,
+            payload={"page_content": "Content 1", "metadata": {"page": 2}},
+        )
+        client = MagicMock()
+        client.query_points = AsyncMock(return_value=MagicMock(points=[point]))
+
+        with patch("rag.retriever.get_embeddings", return_value=mock_embeddings):
+            with patch("rag.retriever.get_async_qdrant_client", return_value=client):
+                results = asyncio.run(aretrieve_with_scores("query", k=2))
+
+        document, score = results[0]
+        assert document.page_content == "Content 1"
+        assert document.metadata["page"] == 2
+        assert score == pytest.approx(0.9)
+        assert client.query_points.call_args.kwargs["limit"] == 2
+
+
+class TestHybridRetrieval:
+    """Test suite for dense + BM25 sparse retrieval."""
+
+    @pytest.fixture(autouse=True)
+    def hybrid(self):
+        with patch("rag.retriever.HYBRID_SEARCH", True):
+            yield
+
+    @pytest.fixture
+    def parts_collection(self):
+        """In-memory collection where dense vectors favour the wrong chunk."""
+        from qdrant_client import QdrantClient
+        from rag.ingestion import initialize_qdrant_collection, upsert_chunks
+
+        client = QdrantClient(":memory:")
+        embeddings = MagicMock()
+        embeddings.embed_query.return_value = [1.0, 0.0, 0.0]
+        with patch("rag.ingestion.get_qdrant_client", return_value=client):
+            with patch("rag.ingestion.get_query_embeddings", return_value=embeddings):
+                with patch("rag.ingestion.HYBRID_SEARCH", True):
+                    initialize_qdrant_collection("parts")
+
+        chunks = [
+            MagicMock(page_content="General valve maintenance guide", metadata={"page": 0}),
+            MagicMock(page_content="Replace gasket XK-4471 every 500 hours", metadata={"page": 1}),
+            MagicMock(page_content="Pump overview and safety notes", metadata={"page": 2}),
+        ]
+        vectors = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.9, 0.1, 0.0]]
+        upsert_chunks(client, "parts", chunks, vectors, ids=[1, 2, 3], sparse=True)
+
+        with patch("rag.retriever.get_qdrant_client", return_value=client):
+            with patch("rag.retriever.get_embeddings", return_value=embeddings):
+                yield client
+
+    def test_tokenize_keeps_part_numbers(self):
+        """Joined codes are indexed whole and by their parts."""
+        from rag.sparse import tokenize
+
+        terms = tokenize("Replace the gasket XK-4471")
+
+        assert "xk-4471" in terms
+        assert "xk" in terms and "4471" in terms
+        assert "the" not in terms
+
+    def test_document_vector_saturates_term_frequency(self):
+        """Repeated terms gain weight with diminishing returns."""
+        from rag.sparse import document_vector, term_index
+
+        once = document_vector("valve")
+        many = document_vector("valve valve valve valve")
+        index = term_index("valve")
+
+        weight_once = once.values[once.indices.index(index)]
+        weight_many = many.values[many.indices.index(index)]
+        assert weight_once < weight_many < 4 * weight_once
+
+    def test_fuse_results_scales_to_unit_range(self):
+        """A point ranked first in both lists scores 1.0."""
+        from rag.retriever import fuse_results
+
+        def point(point_id, score):
+            return MagicMock(id=point_id, score=score, payload={"page_content": str(point_id)})
+
+        dense = MagicMock(points=[point(1, 0.8), point(2, 0.5)])
+        sparse = MagicMock(points=[point(1, 7.0), point(3, 2.0)])
+
+        results = fuse_results([dense, sparse], k=3, collection_name="documents")
+
+        assert [doc.page_content for doc, _ in results] == ["1", "2", "3"]
+        assert results[0][1] == pytest.approx(1.0)
+        assert all(0.0 <= score <= 1.0 for _, score in results)
+        assert results[0][0].metadata["dense_score"] == pytest.approx(0.9)
+        assert "dense_score" not in results[2][0].metadata
+
+    def test_exact_term_match_is_retrieved(self, parts_collection):
+        """A part number finds its chunk even though the dense vector disagrees."""
+        results = retrieve_with_scores("gasket XK-4471", k=2, collection_name="parts")
+
+        contents = [doc.page_content for doc, _ in results]
+        assert "Replace gasket XK-4471 every 500 hours" in contents
+
+    def test_dense_fallback_without_sparse_vectors(self, mock_embeddings):
+        """Collections without sparse vectors use dense search."""
+        with patch("rag.retriever.collection_has_sparse", return_value=False):
+            with patch("rag.retriever.get_vector_store") as mock_get_store:
+                mock_get_store.return_value.similarity_search_with_relevance_scores.return_value = []
+                retrieve_with_scores("query")
+
+        mock_get_store.return_value.similarity_search_with_relevance_scores.assert_called_once()
+
+    def test_collection_has_sparse(self, parts_collection):
+        """The sparse flag is read from the collection config."""
+        from rag.retriever import collection_has_sparse
+
+        assert collection_has_sparse("parts") is True
+        assert collection_has_sparse("missing") is False
+
+    def test_async_hybrid_retrieval(self, mock_embeddings):
+        """The async path sends one batched dense + sparse request."""
+        import asyncio
+        from unittest.mock import AsyncMock
+        from rag.retriever import aretrieve_with_scores
+
+        point = MagicMock(id=1, score=0.6, payload={"page_content": "hit", "metadata": {}})
+        async_client = MagicMock()
+        async_client.query_batch_points = AsyncMock(
+            return_value=[MagicMock(points=[point]), MagicMock(points=[point])]
+        )
+
+        with patch("rag.retriever.get_embeddings", return_value=mock_embeddings):
+            with patch("rag.retriever.get_async_qdrant_client", return_value=async_client):
+                with patch("rag.retriever.collection_has_sparse", return_value=True):
+                    results = asyncio.run(aretrieve_with_scores("query", k=1))
+
+        assert results[0][0].page_content == "hit"
+        assert results[0][1] == pytest.approx(1.0)
+        requests = async_client.query_batch_points.call_args.kwargs["requests"]
+        assert [r.using for r in requests] == [None, "sparse"]
+
+    def test_batch_retrieval_matches_single_queries(self, parts_collection):
+        """Batched hybrid retrieval returns the same results per query."""
+        from rag.retriever import retrieve_batch
+
+        embeddings = MagicMock()
+        embeddings.embed_query.return_value = [1.0, 0.0, 0.0]
+        embeddings.embed_documents.side_effect = lambda texts: [[1.0, 0.0, 0.0]] * len(texts)
+        queries = ["gasket XK-4471", "pump safety"]
+
+        with patch("rag.retriever.get_embeddings", return_value=embeddings):
+            batched = retrieve_batch(queries, k=2, collection_name="parts")
+            single = [retrieve_with_scores(q, k=2, collection_name="parts") for q in queries]
+
+        embeddings.embed_documents.assert_called_once_with(queries)
+        for batch_results, single_results in zip(batched, single):
+            assert [d.page_content for d, _ in batch_results] == [
+                d.page_content for d, _ in single_results
+            ]
+            assert [s for _, s in batch_results] == pytest.approx([s for _, s in single_results])
+
+    def test_batch_retrieval_sends_one_request(self, mock_embeddings):
+        """Dense searches for every query go out in one batch call."""
+        from rag.retriever import retrieve_batch
+
+        mock_embeddings.embed_documents.side_effect = lambda texts: [[0.1] * 384] * len(texts)
+        point = MagicMock(id=1, score=0.6, payload={"page_content": "hit", "metadata": {}})
+        client = MagicMock()
+        client.query_batch_points.return_value = [MagicMock(points=[point])] * 3
+
+        with patch("rag.retriever.get_embeddings", return_value=mock_embeddings):
+            with patch("rag.retriever.get_qdrant_client", return_value=client):
+                results = retrieve_batch(["a", "b", "c"], k=1)
+
+        client.query_batch_points.assert_called_once()
+        assert len(client.query_batch_points.call_args.kwargs["requests"]) == 3
+        assert [r[0][1] for r in results] == [pytest.approx(0.8)] * 3
+        assert results[0][0][0].metadata["dense_score"] == pytest.approx(0.8)
+
+
+class TestReranking:
+    """Test suite for the cross-encoder rerank stage."""
+
+    @pytest.fixture
+    def cross_encoder(self):
+        """Cross-encoder whose logit is the number of query words in the text."""
+        model = MagicMock()
+
+        def predict(pairs, **kwargs):
+            return [float(sum(w in text for w in query.split())) for query, text in pairs]
+
+        model.predict.side_effect = predict
+        with patch("services.rerank_service.get_reranker", return_value=model):
+            yield model
+
+    def candidates(self):
+        from langchain_core.documents import Document
+
+        texts = ["pump manual", "valve gasket torque", "valve overview"]
+        return [(Document(page_content=t, metadata={"dense_score": 0.8}), 0.5) for t in texts]
+
+    def test_rerank_orders_by_cross_encoder(self, cross_encoder):
+        """The best cross-encoder match comes first and top_k is applied."""
+        from services.rerank_service import rerank
+
+        results = rerank("valve gasket", self.candidates(), top_k=2)
+
+        assert [doc.page_content for doc, _ in results] == ["valve gasket torque", "valve overview"]
+        assert all(0.0 < score < 1.0 for _, score in results)
+        assert results[0][0].metadata["retrieval_score"] == 0.5
+
+    def test_rerank_scores_in_one_batch(self, cross_encoder):
+        """All uncached pairs go to the model in a single call."""
+        from services.rerank_service import rerank
+
+        rerank("valve", self.candidates())
+
+        cross_encoder.predict.assert_called_once()
+        assert len(cross_encoder.predict.call_args.args[0]) == 3
+
+    def test_rerank_reuses_cached_pair_scores(self, cross_encoder):
+        """Only pairs not seen before are scored again."""
+        from langchain_core.documents import Document
+        from services.rerank_service import rerank
+
+        rerank("valve", self.candidates())
+        extra = [(Document(page_content="valve seals", metadata={}), 0.4)]
+        rerank("Valve", self.candidates() + extra)
+
+        assert cross_encoder.predict.call_count == 2
+        assert cross_encoder.predict.call_args.args[0] == [("Valve", "valve seals")]
+
+    def test_context_node_overfetches_when_reranking(self, cross_encoder):
+        """The context node fetches RERANK_CANDIDATES and keeps RETRIEVAL_K."""
+        from graph.nodes.context import context_node_fn
+
+        with patch("graph.nodes.context.RERANK_ENABLED", True):
+            with patch("graph.nodes.context.RERANK_CANDIDATES", 30):
+                with patch("graph.nodes.context.retrieve_with_scores", return_value=self.candidates()) as mock_retrieve:
+                    state = context_node_fn({"user_query": "valve gasket"})
+
+        assert mock_retrieve.call_args.kwargs["k"] == 30
+        assert state["retrieved_chunks"][0] == "valve gasket torque"
+        assert len(state["retrieved_chunks"]) == 3
+
+
+class TestContextBuilder:
+    """Test suite for token-budgeted context assembly."""
+
+    def doc(self, text, score, page=0, start=None, source="manual.pdf"):
+        from langchain_core.documents import Document
+
+        metadata = {"source": source, "page": page}
+        if start is not None:
+            metadata["start_index"] = start
+        return Document(page_content=text, metadata=metadata), score
+
+    def test_overlapping_chunks_are_merged(self):
+        """Chunks sharing overlap text on one page become a single block."""
+        from rag.context import build_context
+
+        page = "alpha beta gamma delta epsilon zeta eta theta iota kappa"
+        first = self.doc(page[:30], 0.9, start=0)
+        second = self.doc(page[20:], 0.8, start=20)
+
+        chunks, _, _ = build_context([first, second], budget=1000)
+
+        assert chunks == [page]
+
+    def test_overlap_detected_without_start_index(self):
+        """Older chunks without offsets are merged by matching text."""
+        from rag.context import build_context
+
+        page = "The pump must be primed before start. Check the seal for leaks daily."
+        first = self.doc(page[:45], 0.9)
+        second = self.doc(page[15:], 0.7)
+
+        chunks, _, _ = build_context([second, first], budget=1000)
+
+        assert chunks == [page]
+
+    def test_different_pages_are_not_merged(self):
+        """Only chunks of the same page are merged."""
+        from rag.context import build_context
+
+        chunks, _, _ = build_context(
+            [self.doc("page one text", 0.9, page=1, start=0), self.doc("page two text", 0.8, page=2, start=0)],
+            budget=1000,
+        )
+
+        assert chunks == ["page one text", "page two text"]
+
+    def test_duplicates_are_dropped(self):
+        """Identical chunk text is only included once."""
+        from rag.context import build_context
+
+        chunks, _, _ = build_context(
+            [self.doc("same", 0.9, source="a.pdf"), self.doc("same", 0.8, source="b.pdf")],
+            budget=1000,
+        )
+
+        assert chunks == ["same"]
+
+    def test_budget_prefers_high_scores_and_skips_oversized_blocks(self):
+        """Blocks are added by score; one that does not fit is skipped."""
+        from rag.context import build_context
+
+        results = [
+            self.doc("a" * 40, 0.9, page=1),
+            self.doc("b" * 400, 0.8, page=2),
+            self.doc("c" * 40, 0.7, page=3),
+        ]
+
+        with patch("rag.context.count_tokens", side_effect=lambda text: len(text) // 4):
+            chunks, _, tokens = build_context(results, budget=25)
+
+        assert chunks == ["a" * 40, "c" * 40]
+        assert tokens <= 25
+
+    def test_best_block_is_truncated_when_nothing_fits(self):
+        """A single oversized block is cut down to the budget."""
+        from rag.context import build_context
+
+        with patch("rag.context.count_tokens", side_effect=lambda text: len(text) // 4):
+            chunks, _, tokens = build_context([self.doc("x" * 400, 0.9)], budget=10)
+
+        assert len(chunks) == 1
+        assert tokens <= 10
+
+    def test_count_tokens_falls_back_to_characters(self):
+        """Without a tokenizer, tokens are estimated from the length."""
+        from services.llm_service import count_tokens
+
+        with patch("services.llm_service.get_tokenizer", return_value=None):
+            assert count_tokens("x" * 40) == 10
+
+    def test_context_node_records_token_count(self):
+        """The context node stores the budgeted context and its size."""
+        from graph.nodes.context import context_node_fn
+
+        docs = [self.doc("first chunk", 0.9, page=1), self.doc("second chunk", 0.8, page=2)]
+        with patch("graph.nodes.context.retrieve_with_scores", return_value=docs):
+            state = context_node_fn({"user_query": "question"})
+
+        assert state["rag_context"] == "first chunk\n\nsecond chunk"
+        assert state["context_tokens"] > 0
+
+
+class TestRelevanceThreshold:
+    """Test suite for score-threshold retrieval."""
+
+    def doc(self, text, dense_score, score=None):
+        from langchain_core.documents import Document
+
+        return Document(page_content=text, metadata={"dense_score": dense_score}), score or dense_score
+
+    def test_low_relevance_chunks_are_dropped(self):
+        """Only chunks at or above MIN_RELEVANCE_SCORE reach the context."""
+        from graph.nodes.context import context_node_fn
+
+        docs = [self.doc("relevant", 0.8), self.doc("noise", 0.55)]
+        with patch("graph.nodes.context.MIN_RELEVANCE_SCORE", 0.6):
+            with patch("graph.nodes.context.retrieve_with_scores", return_value=docs):
+                state = context_node_fn({"user_query": "question"})
+
+        assert state["retrieved_chunks"] == ["relevant"]
+        assert state["retrieved_scores"] == [0.8]
+
+    def test_threshold_uses_dense_relevance_for_fused_scores(self):
+        """Hybrid results are judged by dense relevance, not their RRF score."""
+        from graph.nodes.context import context_node_fn
+
+        docs = [self.doc("fused hit", 0.4, score=0.95)]
+        with patch("graph.nodes.context.MIN_RELEVANCE_SCORE", 0.6):
+            with patch("graph.nodes.context.retrieve_with_scores", return_value=docs):
+                state = context_node_fn({"user_query": "question"})
+
+        assert state["retrieved_chunks"] == []
+        assert state["rag_context"] == ""
+
+    def test_sparse_only_hits_get_dense_relevance(self, mock_embeddings):
+        """Fusion computes dense relevance from the vectors of sparse hits."""
+        from rag.retriever import fuse_results
+
+        dense = MagicMock(points=[])
+        sparse_hit = MagicMock(id=1, score=3.0, payload={"page_content": "hit"}, vector=[0.0, 1.0])
+        sparse = MagicMock(points=[sparse_hit])
+
+        results = fuse_results([dense, sparse], k=1, collection_name="documents", vector=[0.0, 2.0])
+
+        assert results[0][0].metadata["dense_score"] == pytest.approx(1.0)
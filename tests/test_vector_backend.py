@@ -0,0 +1,232 @@
+"""
+Test cases for the in-process vector store backend.
+"""
+import asyncio
+import uuid
+
+import pytest
+from unittest.mock import patch, MagicMock
+from qdrant_client.models import (
+    Distance,
+    PointIdsList,
+    PointStruct,
+    QueryRequest,
+    SparseVector,
+    VectorParams,
+)
+
+from services.vector_backend import AsyncLocalVectorBackend, LocalVectorBackend
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = LocalVectorBackend(str(tmp_path / "vectors"))
+    backend.create_collection(
+        "documents", vectors_config=VectorParams(size=3, distance=Distance.COSINE)
+    )
+    yield backend
+    backend.close()
+
+
+def point(point_id, vector, text=""):
+    return PointStruct(
+        id=point_id, vector=vector, payload={"page_content": text, "metadata": {}}
+    )
+
+
+class TestLocalVectorBackend:
+    """Test suite for LocalVectorBackend."""
+
+    def test_query_returns_nearest_by_cosine(self, backend):
+        """Results are ordered by cosine similarity with payloads attached."""
+        backend.upsert("documents", [
+            point(1, [1.0, 0.0, 0.0], "x axis"),
+            point(2, [0.0, 1.0, 0.0], "y axis"),
+            point(3, [0.7, 0.7, 0.0], "diagonal"),
+        ])
+
+        response = backend.query_points("documents", query=[2.0, 0.1, 0.0], limit=2)
+
+        assert [p.id for p in response.points] == [1, 3]
+        assert response.points[0].score == pytest.approx(0.9988, abs=1e-3)
+        assert response.points[0].payload["page_content"] == "x axis"
+
+    def test_uuid_ids_and_named_dense_vector(self, backend):
+        """UUID point IDs and {"": vector} points are accepted."""
+        point_id = str(uuid.uuid4())
+        backend.upsert("documents", [point(point_id, {"": [0.0, 0.0, 1.0]})])
+
+        response = backend.query_points("documents", query=[0.0, 0.0, 1.0], limit=5)
+
+        assert [p.id for p in response.points] == [point_id]
+
+    def test_upsert_replaces_existing_point(self, backend):
+        """Upserting an existing ID overwrites its vector and payload."""
+        backend.upsert("documents", [point(1, [1.0, 0.0, 0.0], "old")])
+        backend.upsert("documents", [point(1, [0.0, 1.0, 0.0], "new")])
+
+        response = backend.query_points("documents", query=[0.0, 1.0, 0.0], limit=5)
+
+        assert len(response.points) == 1
+        assert response.points[0].payload["page_content"] == "new"
+        assert backend.get_collection("documents").points_count == 1
+
+    def test_delete_removes_points(self, backend):
+        """Deleted points are no longer returned."""
+        backend.upsert("documents", [point(1, [1.0, 0.0, 0.0]), point(2, [0.0, 1.0, 0.0])])
+
+        backend.delete("documents", points_selector=PointIdsList(points=[1]))
+        response = backend.query_points("documents", query=[1.0, 0.0, 0.0], limit=5)
+
+        assert [p.id for p in response.points] == [2]
+
+    def test_collection_grows_past_initial_capacity(self, backend):
+        """The memory-mapped matrix is extended when it fills up."""
+        with patch("services.vector_backend.INITIAL_CAPACITY", 2):
+            backend.create_collection(
+                "small", vectors_config=VectorParams(size=3, distance=Distance.COSINE)
+            )
+            backend.upsert("small", [point(i, [1.0, float(i), 0.0]) for i in range(5)])
+
+        response = backend.query_points("small", query=[1.0, 4.0, 0.0], limit=1)
+
+        assert response.points[0].id == 4
+        assert backend.get_collection("small").points_count == 5
+
+    @pytest.mark.parametrize("ram_cache", [True, False])
+    def test_flat_search_with_and_without_ram_cache(self, tmp_path, ram_cache):
+        """The RAM copy and the block scan of the file return the same results."""
+        backend = LocalVectorBackend(str(tmp_path / "vectors"), ram_cache=ram_cache)
+        with patch("services.vector_backend.INITIAL_CAPACITY", 2):
+            backend.create_collection(
+                "documents", vectors_config=VectorParams(size=3, distance=Distance.COSINE)
+            )
+            backend.upsert("documents", [point(i, [1.0, float(i), 0.0]) for i in range(7)])
+        backend.delete("documents", points_selector=PointIdsList(points=[5]))
+
+        with patch("services.vector_backend.SCAN_BLOCK_ROWS", 3):
+            response = backend.query_points("documents", query=[1.0, 5.0, 0.0], limit=2)
+        backend.close()
+
+        assert [p.id for p in response.points] == [6, 4]
+        assert response.points[0].score == pytest.approx(0.9995, abs=1e-3)
+
+    def test_data_persists_across_instances(self, tmp_path):
+        """Vectors and payloads are read back from disk after a restart."""
+        path = str(tmp_path / "vectors")
+        first = LocalVectorBackend(path)
+        first.create_collection(
+            "documents", vectors_config=VectorParams(size=3, distance=Distance.COSINE)
+        )
+        first.upsert("documents", [point(7, [0.0, 1.0, 0.0], "kept")])
+        first.close()
+
+        second = LocalVectorBackend(path)
+        response = second.query_points("documents", query=[0.0, 1.0, 0.0], limit=1)
+        second.close()
+
+        assert response.points[0].id == 7
+        assert response.points[0].payload["page_content"] == "kept"
+
+    def test_batch_queries_keep_their_limits(self, backend):
+        """Each request in a batch gets its own result list and limit."""
+        backend.upsert("documents", [point(i, [1.0, float(i), 0.0]) for i in range(4)])
+
+        responses = backend.query_batch_points("documents", requests=[
+            QueryRequest(query=[1.0, 0.0, 0.0], limit=1, with_payload=True),
+            QueryRequest(query=[0.0, 1.0, 0.0], limit=3, with_payload=True),
+        ])
+
+        assert [p.id for p in responses[0].points] == [0]
+        assert [p.id for p in responses[1].points] == [3, 2, 1]
+
+    def test_no_sparse_vectors(self, backend):
+        """Collections report no sparse vectors and reject sparse queries."""
+        info = backend.get_collection("documents")
+
+        assert info.config.params.sparse_vectors is None
+        with pytest.raises(ValueError):
+            backend.query_points("documents", query=SparseVector(indices=[1], values=[1.0]))
+
+    def test_missing_collection_raises(self, backend):
+        """Unknown collections raise like the Qdrant client does."""
+        assert backend.collection_exists("missing") is False
+        with pytest.raises(ValueError):
+            backend.get_collection("missing")
+
+    def test_dimension_mismatch_is_rejected(self, backend):
+        """Vectors of the wrong size are refused before anything is written."""
+        with pytest.raises(ValueError):
+            backend.upsert("documents", [point(1, [1.0, 0.0, 0.0]), point(2, [1.0, 0.0])])
+
+        assert backend.get_collection("documents").points_count == 0
+
+    def test_async_facade(self, backend):
+        """The async wrapper exposes the same methods as coroutines."""
+        backend.upsert("documents", [point(1, [1.0, 0.0, 0.0])])
+        client = AsyncLocalVectorBackend(backend)
+
+        response = asyncio.run(client.query_points("documents", query=[1.0, 0.0, 0.0], limit=1))
+
+        assert response.points[0].id == 1
+
+    def test_hnsw_index(self, tmp_path):
+        """Approximate search finds the same neighbour on a small collection."""
+        pytest.importorskip("hnswlib")
+
+        backend = LocalVectorBackend(str(tmp_path / "vectors"), index="hnsw")
+        backend.create_collection(
+            "documents", vectors_config=VectorParams(size=3, distance=Distance.COSINE)
+        )
+        backend.upsert("documents", [point(i, [1.0, float(i), 0.5]) for i in range(20)])
+        backend.delete("documents", points_selector=PointIdsList(points=[19]))
+
+        response = backend.query_points("documents", query=[1.0, 19.0, 0.5], limit=1)
+        backend.close()
+
+        assert response.points[0].id == 18
+
+
+class TestLocalBackendPipeline:
+    """Test suite for ingestion and retrieval on the local backend."""
+
+    def test_ingested_chunks_are_retrieved(self, tmp_path, mock_embeddings):
+        """Chunks written by ingestion are found by dense retrieval."""
+        from rag.ingestion import initialize_qdrant_collection, upsert_chunks
+        from rag.retriever import retrieve_with_scores
+
+        backend = LocalVectorBackend(str(tmp_path / "vectors"))
+        embeddings = MagicMock()
+        embeddings.embed_query.return_value = [0.0, 1.0, 0.0]
+        chunks = [
+            MagicMock(page_content="Warranty lasts two years", metadata={"page": 0}),
+            MagicMock(page_content="Shipping takes a week", metadata={"page": 1}),
+        ]
+
+        with patch("rag.ingestion.get_qdrant_client", return_value=backend), \
+                patch("rag.ingestion.get_query_embeddings", return_value=embeddings), \
+                patch("rag.ingestion.HYBRID_SEARCH", True):
+            initialize_qdrant_collection("documents")
+        upsert_chunks(backend, "documents", chunks, [[0.0, 1.0, 0.0], [1.0, 0.0, 0.0]])
+
+        with patch("rag.retriever.VECTOR_BACKEND", "local"), \
+                patch("rag.retriever.HYBRID_SEARCH", True), \
+                patch("rag.retriever.get_qdrant_client", return_value=backend), \
+                patch("rag.retriever.get_embeddings", return_value=embeddings):
+            results = retrieve_with_scores("How long is the warranty?", k=1)
+        backend.close()
+
+        document, score = results[0]
+        assert document.page_content == "Warranty lasts two years"
+        assert score == pytest.approx(1.0, abs=1e-3)
+        assert document.metadata["dense_score"] == score
+
+    def test_client_factory_selects_local_backend(self):
+        """VECTOR_BACKEND=local replaces the Qdrant client."""
+        from services.qdrant_service import get_qdrant_client
+
+        with patch("services.qdrant_service.VECTOR_BACKEND", "local"):
+            with patch("services.qdrant_service.LocalVectorBackend") as mock_backend:
+                client = get_qdrant_client()
+
+        assert client is mock_backend.return_value
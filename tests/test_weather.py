@@ -11,7 +11,7 @@ class TestWeatherAPIHandling:
 
     def test_fetch_weather_success(self, mock_weather_api_response):
         """Test successful weather API call."""
-        with patch("services.weather_service.requests.get") as mock_get:
+        with patch("services.weather_service.session.get") as mock_get:
             mock_response = MagicMock()
             mock_response.status_code = 200
             mock_response.json.return_value = {
@@ -32,7 +32,7 @@ class TestWeatherAPIHandling:
 
     def test_fetch_weather_invalid_city(self):
         """Test weather API with invalid city name."""
-        with patch("services.weather_service.requests.get") as mock_get:
+        with patch("services.weather_service.session.get") as mock_get:
             mock_response = MagicMock()
             mock_response.status_code = 404
             mock_response.raise_for_status.side_effect = Exception("404 Not Found")
@@ -43,7 +43,7 @@ class TestWeatherAPIHandling:
 
     def test_fetch_weather_api_error(self):
         """Test weather API error handling."""
-        with patch("services.weather_service.requests.get") as mock_get:
+        with patch("services.weather_service.session.get") as mock_get:
             mock_get.side_effect = Exception("API connection error")
 
             with pytest.raises(Exception):
@@ -51,7 +51,7 @@ class TestWeatherAPIHandling:
 
     def test_fetch_weather_returns_dict(self, mock_weather_api_response):
         """Test that weather service returns a dictionary."""
-        with patch("services.weather_service.requests.get") as mock_get:
+        with patch("services.weather_service.session.get") as mock_get:
             mock_response = MagicMock()
             mock_response.status_code = 200
             mock_response.json.return_value = {
@@ -71,7 +71,7 @@ class TestWeatherAPIHandling:
 
     def test_fetch_weather_contains_required_fields(self):
         """Test that weather response contains required fields."""
-        with patch("services.weather_service.requests.get") as mock_get:
+        with patch("services.weather_service.session.get") as mock_get:
             mock_response = MagicMock()
             mock_response.status_code = 200
             mock_response.json.return_value = {
@@ -90,7 +90,7 @@ class TestWeatherAPIHandling:
 
     def test_fetch_weather_timeout(self):
         """Test weather API timeout handling."""
-        with patch("services.weather_service.requests.get") as mock_get:
+        with patch("services.weather_service.session.get") as mock_get:
             import requests
 
             mock_get.side_effect = requests.Timeout("API timeout")
@@ -102,7 +102,7 @@ class TestWeatherAPIHandling:
         """Test weather API with different city names."""
         cities = ["London", "Tokyo", "Paris", "Sydney"]
 
-        with patch("services.weather_service.requests.get") as mock_get:
+        with patch("services.weather_service.session.get") as mock_get:
             mock_response = MagicMock()
             mock_response.status_code = 200
             mock_response.json.return_value = {
@@ -119,7 +119,7 @@ class TestWeatherAPIHandling:
 
     def test_fetch_weather_empty_city_name(self):
         """Test weather API with empty city name."""
-        with patch("services.weather_service.requests.get") as mock_get:
+        with patch("services.weather_service.session.get") as mock_get:
             mock_get.side_effect = ValueError("City name cannot be empty")
 
             with pytest.raises(ValueError):
@@ -127,7 +127,7 @@ class TestWeatherAPIHandling:
 
     def test_fetch_weather_special_characters_in_name(self):
         """Test weather API with special characters in city name."""
-        with patch("services.weather_service.requests.get") as mock_get:
+        with patch("services.weather_service.session.get") as mock_get:
             mock_response = MagicMock()
             mock_response.status_code = 200
             mock_response.json.return_value = {
@@ -140,3 +140,151 @@ class TestWeatherAPIHandling:
 
             result = fetch_weather("São Paulo")
             assert result is not None
+
+    def test_fetch_weather_uses_coordinates(self):
+        """Test that known coordinates are sent instead of the city name."""
+        with patch("services.weather_service.session.get") as mock_get:
+            mock_get.return_value = MagicMock()
+
+            fetch_weather("Paris, FR", lat=48.85, lon=2.35)
+
+            params = mock_get.call_args.kwargs["params"]
+            assert params["lat"] == 48.85
+            assert params["lon"] == 2.35
+            assert "q" not in params
+
+
+class TestWeatherCache:
+    """Test suite for weather response caching against a local stub server."""
+
+    @pytest.fixture
+    def stub_server(self):
+        """Serve canned OpenWeatherMap responses on localhost."""
+        import json
+        import threading
+        import time
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from urllib.parse import parse_qs, urlparse
+
+        requests_seen = []
+
+        class Handler(BaseHTTPRequestHandler):
+            delay = 0.0
+
+            def do_GET(self):
+                params = parse_qs(urlparse(self.path).query)
+                requests_seen.append(params)
+                time.sleep(Handler.delay)
+
+                if params.get("q") == ["Nowhere"]:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+
+                body = json.dumps({
+                    "name": params.get("q", ["Geo"])[0],
+                    "main": {"temp": 20 + len(requests_seen)},
+                    "weather": [{"description": "Clear"}],
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        thread = threading.Thread(
+            target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        thread.start()
+
+        stub_url = f"http://127.0.0.1:{server.server_address[1]}/data/2.5/weather"
+        with patch("services.weather_service.url", stub_url):
+            yield Handler, requests_seen
+
+        server.shutdown()
+        server.server_close()
+
+    def test_repeated_city_served_from_cache(self, stub_server):
+        """Test that a second lookup for the same city makes no request."""
+        _, requests_seen = stub_server
+
+        first = fetch_weather("London, GB")
+        second = fetch_weather("  london,  gb ")
+
+        assert first == second
+        assert len(requests_seen) == 1
+
+    def test_nearby_coordinates_share_entry(self, stub_server):
+        """Test that coordinates are bucketed before caching."""
+        _, requests_seen = stub_server
+
+        fetch_weather("Paris, FR", lat=48.8534, lon=2.3488)
+        fetch_weather("Paris", lat=48.8512, lon=2.3521)
+
+        assert len(requests_seen) == 1
+
+    def test_errors_are_not_cached(self, stub_server):
+        """Test that failed lookups are retried on the next call."""
+        import requests
+
+        _, requests_seen = stub_server
+
+        for _ in range(2):
+            with pytest.raises(requests.HTTPError):
+                fetch_weather("Nowhere")
+
+        assert len(requests_seen) == 2
+
+    def test_concurrent_requests_are_coalesced(self, stub_server):
+        """Test that simultaneous lookups for one city share one request."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        handler, requests_seen = stub_server
+        handler.delay = 0.2
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: fetch_weather("Tokyo, JP"), range(8)))
+
+        assert len(requests_seen) == 1
+        assert all(result == results[0] for result in results)
+
+    def test_stale_entry_served_while_revalidating(self, stub_server):
+        """Test that an expired entry is returned immediately and refreshed."""
+        import time
+        from services.weather_service import cache_key, weather_cache
+
+        _, requests_seen = stub_server
+
+        with patch("services.weather_service.WEATHER_CACHE_TTL", 0):
+            first = fetch_weather("Oslo, NO")
+            stale = fetch_weather("Oslo, NO")
+
+            assert stale == first
+
+            deadline = time.time() + 2
+            while weather_cache.get(cache_key("Oslo, NO"))[1] == first and time.time() < deadline:
+                time.sleep(0.01)
+
+        assert len(requests_seen) == 2
+        assert fetch_weather("Oslo, NO")["main"]["temp"] != first["main"]["temp"]
+
+    def test_async_requests_are_coalesced(self, stub_server):
+        """Test that concurrent async lookups share one request and the cache."""
+        import asyncio
+        from services.weather_service import afetch_weather
+
+        handler, requests_seen = stub_server
+        handler.delay = 0.1
+
+        async def run():
+            return await asyncio.gather(*(afetch_weather("Lima, PE") for _ in range(10)))
+
+        results = asyncio.run(run())
+
+        assert len(requests_seen) == 1
+        assert all(result == results[0] for result in results)
+        assert fetch_weather("Lima, PE") == results[0]